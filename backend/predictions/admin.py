@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
-from .models import Department, Employee, EmployeePerformanceData, TurnoverPrediction, MLModel
+from .models import (
+    Department, Employee, EmployeeActivityFeatures, EmployeePerformanceData, TurnoverPrediction, MLModel,
+    ModelVersion, ScoringRun, TrainingJob
+)
+from . import model_store
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
@@ -106,6 +110,13 @@ class TurnoverPredictionAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         return False  # Predictions are created programmatically
 
+class ModelVersionInline(admin.TabularInline):
+    model = ModelVersion
+    extra = 0
+    can_delete = False
+    fields = ['sha256', 'model_type', 'metrics', 'file_path', 'created_at']
+    readonly_fields = fields
+
 @admin.register(MLModel)
 class MLModelAdmin(admin.ModelAdmin):
     list_display = [
@@ -116,8 +127,58 @@ class MLModelAdmin(admin.ModelAdmin):
     search_fields = ['name']
     list_editable = ['is_active']
     readonly_fields = ['created_at', 'last_trained']
+    inlines = [ModelVersionInline]
+    actions = ['rollback_to_previous_version']
     
     def get_readonly_fields(self, request, obj=None):
         if obj:  # editing an existing object
             return self.readonly_fields + ['name', 'model_type', 'model_file_path']
         return self.readonly_fields
+    
+    def rollback_to_previous_version(self, request, queryset):
+        for ml_model in queryset:
+            try:
+                version = model_store.rollback(ml_model)
+                self.message_user(request, f"{ml_model.name} rolled back to {version.sha256[:12]}")
+            except ValueError as e:
+                self.message_user(request, str(e), level='error')
+    rollback_to_previous_version.short_description = 'Roll back to the previous version'
+
+@admin.register(ScoringRun)
+class ScoringRunAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'mode', 'model_version', 'employees_scored', 'high_water_mark',
+        'started_at', 'finished_at'
+    ]
+    list_filter = ['mode', 'started_at']
+    readonly_fields = [
+        'mode', 'model_version', 'high_water_mark', 'employees_scored',
+        'last_processed_pk', 'started_at', 'finished_at'
+    ]
+
+@admin.register(TrainingJob)
+class TrainingJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'status', 'source', 'stage', 'rows_processed', 'ml_model',
+        'submitted_by', 'created_at', 'finished_at'
+    ]
+    list_filter = ['status', 'source', 'created_at']
+    readonly_fields = [
+        'status', 'source', 'parameters', 'submitted_by', 'stage', 'rows_processed',
+        'ml_model', 'results', 'error', 'created_at', 'started_at', 'finished_at', 'updated_at'
+    ]
+
+@admin.register(EmployeeActivityFeatures)
+class EmployeeActivityFeaturesAdmin(admin.ModelAdmin):
+    """Maintained by signals; read-only here (rebuild_feature_store repairs drift)"""
+    list_display = [
+        'employee', 'goals_total', 'goals_completed', 'feedback_count',
+        'learning_minutes', 'meetings_completed', 'review_rating_count', 'updated_at'
+    ]
+    search_fields = ['employee__first_name', 'employee__last_name', 'employee__email']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
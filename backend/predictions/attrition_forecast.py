@@ -0,0 +1,190 @@
+"""
+Monte Carlo attrition forecast per department.
+
+Every active employee's latest TurnoverPrediction probability is treated as an
+independent Bernoulli event. A trial draws all of them at once, and the
+number of leavers per department in that trial is one sample of the
+department's leaver distribution. Employees are sorted by department, and
+the simulation runs over (employees x trials) blocks of raw 32-bit random
+integers compared against ``probability * 2**32``. Each block is reduced to
+per-department counts with ``np.add.reduceat``, so memory stays bounded
+however large the workforce.
+
+Only the per-department histograms of leaver counts are kept. Expected
+leavers, confidence intervals and "probability that at least K leave" are
+all read off them. A forecast is cached under the latest finished ScoringRun
+and the newest TurnoverPrediction, so a rescore or any prediction made
+through the API gives a new key. Changes that touch no prediction
+(deactivated employees, department moves) show up once the entry expires
+after ML_FORECAST_CACHE_TIMEOUT seconds.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Department, ScoringRun, TurnoverPrediction
+
+FORECAST_KEY = 'turnover:forecast:{run}:{latest}:{trials}:{seed}'
+
+# Random draws per simulated block (rows x trials)
+BLOCK_SIZE = 4_000_000
+# Trials per block; even, since each 64-bit raw draw yields two 32-bit ones
+TRIAL_BLOCK = 1000
+
+UNASSIGNED = 'Unassigned'
+
+
+def latest_probabilities():
+    """
+    (department ids, probabilities) of the latest prediction of every active
+    employee, sorted by department (employees without one have department None)
+    """
+    # Predictions are only ever inserted, so the highest id per employee is the latest
+    latest_ids = TurnoverPrediction.objects.filter(employee__is_active=True).values('employee_id').annotate(
+        latest=Max('id')
+    ).values('latest')
+    rows = TurnoverPrediction.objects.filter(id__in=latest_ids).values_list(
+        'employee__department_id', 'prediction_probability'
+    )
+    departments, probabilities = [], []
+    for department_id, probability in rows.iterator(chunk_size=10000):
+        departments.append(department_id)
+        probabilities.append(probability)
+
+    departments = np.array([-1 if value is None else value for value in departments], dtype=np.int64)
+    probabilities = np.clip(np.array(probabilities, dtype=np.float64), 0.0, 1.0)
+    order = np.argsort(departments, kind='stable')
+    return departments[order], probabilities[order]
+
+
+def simulate_leavers(groups, probabilities, n_trials, seed=None, block_size=BLOCK_SIZE):
+    """
+    Simulated leaver counts, an (n_groups, n_trials) int32 array for
+    ``groups`` (group index per employee, sorted ascending) and their leave
+    probabilities
+    """
+    n_groups = int(groups[-1]) + 1 if len(groups) else 0
+    counts = np.zeros((n_groups, n_trials), dtype=np.int32)
+    if not len(groups):
+        return counts
+
+    # P(u < threshold) for uniform 32-bit u is threshold / 2**32, i.e. the probability to 2**-32
+    thresholds = np.minimum(np.round(probabilities * 2.0 ** 32), 2 ** 32 - 1).astype(np.uint32)
+    bit_generator = np.random.PCG64DXSM(seed)
+
+    trial_block = min(TRIAL_BLOCK, n_trials + n_trials % 2)
+    rows_per_block = max(1, block_size // trial_block)
+    for trial_start in range(0, n_trials, trial_block):
+        trials = min(trial_block, n_trials - trial_start)
+        for start in range(0, len(groups), rows_per_block):
+            stop = min(start + rows_per_block, len(groups))
+            draws = bit_generator.random_raw((stop - start) * trial_block // 2).view(np.uint32)
+            left = draws.reshape(stop - start, trial_block)[:, :trials] < thresholds[start:stop, None]
+
+            # One row per group present in this block of (sorted) employees
+            block_groups = groups[start:stop]
+            segments = np.flatnonzero(np.r_[True, block_groups[1:] != block_groups[:-1]])
+            sums = np.add.reduceat(left.view(np.uint8), segments, axis=0, dtype=np.int32)
+            counts[block_groups[segments], trial_start:trial_start + trials] += sums
+    return counts
+
+
+def histogram(counts):
+    """Compact distribution of simulated counts: the smallest count and occurrences from there up"""
+    if not len(counts):
+        return {'offset': 0, 'frequencies': []}
+    offset = int(counts.min())
+    return {'offset': offset, 'frequencies': np.bincount(counts - offset).tolist()}
+
+
+def run_forecast(n_trials=None, seed=None):
+    """Simulate the current predictions; returns the (uncached) forecast dict"""
+    n_trials = n_trials or settings.ML_FORECAST_TRIALS
+    seed = settings.ML_FORECAST_SEED if seed is None else seed
+
+    department_ids, probabilities = latest_probabilities()
+    keys, groups = np.unique(department_ids, return_inverse=True)
+    counts = simulate_leavers(groups, probabilities, n_trials, seed=seed)
+
+    sizes = np.bincount(groups, minlength=len(keys))
+    expected = np.bincount(groups, weights=probabilities, minlength=len(keys))
+    names = dict(Department.objects.filter(id__in=keys.tolist()).values_list('id', 'name'))
+    departments = []
+    for index, key in enumerate(keys.tolist()):
+        departments.append({
+            'department_id': None if key == -1 else key,
+            'department': names.get(key, UNASSIGNED),
+            'employees': int(sizes[index]),
+            'expected_leavers': float(expected[index]),
+            'histogram': histogram(counts[index]),
+        })
+
+    return {
+        'trials': n_trials,
+        'seed': seed,
+        'employees': len(probabilities),
+        'generated_at': timezone.now().isoformat(),
+        'departments': departments,
+        'total': {
+            'department_id': None,
+            'department': 'All departments',
+            'employees': len(probabilities),
+            'expected_leavers': float(probabilities.sum()),
+            'histogram': histogram(counts.sum(axis=0)),
+        },
+    }
+
+
+def get_forecast(n_trials=None, seed=None, refresh=False):
+    """
+    The forecast of the current predictions, simulated on first use and
+    cached until a run finishes, a prediction is added or the entry expires
+    """
+    n_trials = n_trials or settings.ML_FORECAST_TRIALS
+    seed = settings.ML_FORECAST_SEED if seed is None else seed
+    run = ScoringRun.objects.filter(finished_at__isnull=False).first()
+    latest = TurnoverPrediction.objects.aggregate(latest=Max('id'))['latest']
+    key = FORECAST_KEY.format(
+        run=run.pk if run else 'none', latest=latest or 'none', trials=n_trials, seed=seed
+    )
+
+    forecast = None if refresh else cache.get(key)
+    cached = forecast is not None
+    if forecast is None:
+        forecast = dict(run_forecast(n_trials, seed), scoring_run=run.pk if run else None)
+        cache.set(key, forecast, settings.ML_FORECAST_CACHE_TIMEOUT)
+    return forecast, cached
+
+
+def summarize(entry, trials, confidence=0.9, at_least=()):
+    """Expected leavers, spread, confidence interval and P(at least K leave) from a forecast entry"""
+    offset = entry['histogram']['offset']
+    frequencies = np.asarray(entry['histogram']['frequencies'], dtype=np.float64)
+    values = offset + np.arange(len(frequencies))
+    mean = float(frequencies @ values / trials) if trials else 0.0
+    std = float(np.sqrt(frequencies @ (values - mean) ** 2 / trials)) if trials else 0.0
+
+    cumulative = np.cumsum(frequencies) / trials
+    tail = (1 - confidence) / 2
+    low = int(values[np.searchsorted(cumulative, tail)]) if len(values) else 0
+    high = int(values[min(np.searchsorted(cumulative, 1 - tail), len(values) - 1)]) if len(values) else 0
+
+    # P(X >= k) = 1 - P(X <= k - 1)
+    probabilities = {}
+    for k in at_least:
+        below = cumulative[k - 1 - offset] if 0 <= k - 1 - offset < len(cumulative) else float(k - 1 - offset >= 0)
+        probabilities[str(k)] = round(float(1 - below), 4) if k > 0 else 1.0
+
+    return {
+        'department_id': entry['department_id'],
+        'department': entry['department'],
+        'employees': entry['employees'],
+        'expected_leavers': round(entry['expected_leavers'], 2),
+        'simulated_mean': round(mean, 2),
+        'std': round(std, 2),
+        'confidence_interval': {'level': confidence, 'low': low, 'high': high},
+        'probability_at_least': probabilities,
+    }
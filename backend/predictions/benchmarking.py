@@ -0,0 +1,256 @@
+"""
+Benchmarks for the training and scoring pipeline at growing dataset sizes.
+
+``synthesize_training_data`` bootstraps rows of the bundled HR analytics CSV
+(with a little noise on the continuous features) to any size, so the data has
+the real schema, category mix and feature/label relationships.
+``run_benchmark`` times every stage of a training run on such a set in a
+forked process, so each scale reports its own peak RSS, and returns a
+JSON-serializable report that can be compared across commits with
+``compare_reports``.
+"""
+
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .training_data import TrainingData
+
+STAGES = ['prepare_columns', 'train_models', 'save_model', 'load_model', 'batch_inference', 'single_inference']
+
+# Rows per predict call in batch inference, as in rescore_workforce
+INFERENCE_CHUNK_SIZE = 2000
+
+
+def synthesize_training_data(n_rows, source, seed=0):
+    """
+    ``n_rows`` rows drawn with replacement from the TrainingData ``source``,
+    with Gaussian noise on satisfaction, evaluation and monthly hours
+    """
+    rng = np.random.RandomState(seed)
+    index = rng.randint(0, source.n_rows, size=n_rows)
+
+    numeric = {name: values[index] for name, values in source.numeric.items()}
+    for name, sigma in (('satisfaction_level', 0.02), ('last_evaluation', 0.02)):
+        if name in numeric:
+            noisy = numeric[name] + rng.normal(0, sigma, n_rows).astype(np.float32)
+            numeric[name] = np.clip(noisy, 0.09, 1.0).astype(source.numeric[name].dtype)
+    if 'average_monthly_hours' in numeric:
+        noisy = numeric['average_monthly_hours'] + rng.randint(-5, 6, n_rows)
+        numeric['average_monthly_hours'] = np.clip(noisy, 96, 310).astype(source.numeric['average_monthly_hours'].dtype)
+
+    categorical = {name: (codes[index], labels) for name, (codes, labels) in source.categorical.items()}
+    target = source.target[index] if source.target is not None else None
+    return TrainingData(numeric, categorical, target)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _inference_columns(training_data):
+    """Columnar scoring input (source name -> values) for a TrainingData set"""
+    columns = {name: values for name, values in training_data.numeric.items()}
+    for name, (codes, labels) in training_data.categorical.items():
+        columns[name] = np.asarray(labels, dtype=object)[codes]
+    return columns
+
+
+def benchmark_scale(training_data, model_names=None, parallel=False, single_rows=200, n_jobs=None):
+    """Time each stage of training and scoring on ``training_data`` in this process"""
+    import joblib
+    from .ml_utils import TurnoverPredictor
+    from .model_registry import LoadedModel
+
+    stages = {}
+
+    def timed(name, func):
+        started = time.perf_counter()
+        result = func()
+        stages[name] = {'seconds': round(time.perf_counter() - started, 4), 'peak_rss_mb': round(_peak_rss_mb(), 1)}
+        return result
+
+    predictor = TurnoverPredictor()
+    if model_names:
+        predictor.models = {name: model for name, model in predictor.models.items() if name in model_names}
+
+    X, y = timed('prepare_columns', lambda: predictor.prepare_columns(training_data))
+    results, best_model_name = timed(
+        'train_models', lambda: predictor.train_models(X, y, parallel=parallel, n_jobs=n_jobs)
+    )
+    del X, y
+
+    work_dir = tempfile.mkdtemp(prefix='ml-benchmark-')
+    try:
+        model_path = os.path.join(work_dir, 'benchmark.joblib')
+        timed('save_model', lambda: predictor.save_model(model_path))
+        loaded = timed('load_model', lambda: LoadedModel(joblib.load(model_path), model_path, 'benchmark'))
+        artifact_mb = os.path.getsize(model_path) / 1024 / 1024
+    finally:
+        shutil.rmtree(work_dir)
+
+    columns = _inference_columns(training_data)
+
+    def batch_inference():
+        for start in range(0, training_data.n_rows, INFERENCE_CHUNK_SIZE):
+            chunk = {name: values[start:start + INFERENCE_CHUNK_SIZE] for name, values in columns.items()}
+            loaded.predict_proba(loaded.build_feature_matrix(chunk))
+
+    timed('batch_inference', batch_inference)
+
+    records = [
+        {name: values[i].item() if hasattr(values[i], 'item') else values[i] for name, values in columns.items()}
+        for i in range(min(single_rows, training_data.n_rows))
+    ]
+
+    def single_inference():
+        latencies = []
+        for record in records:
+            started = time.perf_counter()
+            loaded.predict_one(record, salary=record.get('salary'), department=record.get('department'))
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    latencies = timed('single_inference', single_inference)
+
+    batch_seconds = stages['batch_inference']['seconds']
+    return {
+        'rows': training_data.n_rows,
+        'training_data_mb': round(training_data.nbytes / 1024 / 1024, 2),
+        'stages': stages,
+        'total_seconds': round(sum(stage['seconds'] for stage in stages.values()), 4),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'best_model': best_model_name,
+        'training_workers': predictor.training_workers,
+        'models': {
+            name: {key: round(float(value), 4) for key, value in metrics.items()}
+            for name, metrics in results.items()
+        },
+        'artifact_mb': round(artifact_mb, 2),
+        'batch_rows_per_sec': round(training_data.n_rows / batch_seconds) if batch_seconds else None,
+        'single_row_ms': {
+            'p50': round(float(np.percentile(latencies, 50)) * 1000, 4),
+            'p95': round(float(np.percentile(latencies, 95)) * 1000, 4),
+        },
+    }
+
+
+def _benchmark_in_child(connection, source, n_rows, seed, model_names, parallel, n_jobs):
+    """Process target: send ('ok', scale report) or ('error', traceback) back over ``connection``"""
+    import traceback
+
+    try:
+        baseline = _peak_rss_mb()
+        report = benchmark_scale(
+            synthesize_training_data(n_rows, source, seed), model_names, parallel, n_jobs=n_jobs
+        )
+        report['baseline_rss_mb'] = round(baseline, 1)
+        connection.send(('ok', report))
+    except BaseException:
+        connection.send(('error', traceback.format_exc()))
+    finally:
+        connection.close()
+        if parallel:
+            # The exiting child joins its (non-daemonic) loky workers, which
+            # only stop once their executor is shut down
+            from joblib.externals.loky import get_reusable_executor
+
+            get_reusable_executor().shutdown(wait=True)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(source, scales, seed=0, model_names=None, parallel=False, n_jobs=None, on_scale=None):
+    """
+    Benchmark each row count in ``scales`` in its own forked process (so peak
+    RSS is per scale) and return the full report.
+
+    The child is a plain, non-daemonic Process rather than a Pool worker:
+    joblib cannot start worker processes from a daemonic one and would
+    silently fit the ``parallel`` candidates one after another.
+    """
+    import multiprocessing
+
+    import sklearn
+
+    scale_reports = []
+    context = multiprocessing.get_context('fork')
+    for n_rows in scales:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_benchmark_in_child, args=(sender, source, n_rows, seed, model_names, parallel, n_jobs)
+        )
+        process.start()
+        sender.close()
+        try:
+            status, scale_report = receiver.recv()
+        except EOFError:
+            status, scale_report = 'error', "the process exited without a report"
+        finally:
+            receiver.close()
+        process.join()
+        if status != 'ok':
+            raise RuntimeError(f"Benchmark of {n_rows} rows failed:\n{scale_report}")
+        scale_reports.append(scale_report)
+        if on_scale is not None:
+            on_scale(scale_report)
+
+    return {
+        'git_commit': _git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'cpu_count': os.cpu_count(),
+            'platform': platform.platform(),
+        },
+        'options': {
+            'seed': seed,
+            'models': sorted(model_names) if model_names else None,
+            'parallel': parallel,
+            'n_jobs': n_jobs,
+        },
+        'scales': scale_reports,
+    }
+
+
+def compare_reports(baseline, current):
+    """Per scale and stage (seconds, peak RSS) of ``current`` relative to ``baseline``"""
+    baseline_scales = {scale['rows']: scale for scale in baseline.get('scales', [])}
+    comparison = []
+    for scale in current['scales']:
+        previous = baseline_scales.get(scale['rows'])
+        if previous is None:
+            continue
+        for name in STAGES + ['total']:
+            before = previous['stages'].get(name) if name != 'total' else {
+                'seconds': previous['total_seconds'], 'peak_rss_mb': previous['peak_rss_mb']}
+            after = scale['stages'].get(name) if name != 'total' else {
+                'seconds': scale['total_seconds'], 'peak_rss_mb': scale['peak_rss_mb']}
+            if not before or not after:
+                continue
+            comparison.append({
+                'rows': scale['rows'],
+                'stage': name,
+                'seconds': (before['seconds'], after['seconds']),
+                'ratio': round(after['seconds'] / before['seconds'], 3) if before['seconds'] else None,
+                'peak_rss_mb': (before['peak_rss_mb'], after['peak_rss_mb']),
+            })
+    return comparison
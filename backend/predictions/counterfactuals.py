@@ -0,0 +1,243 @@
+"""
+Counterfactual recommendations: the smallest actionable changes that bring
+an employee's predicted turnover probability below a target.
+
+The actionable levers are monthly hours, number of projects, promotion and
+a salary band raise. Every combination of moves is a candidate, and its cost
+is the sum of the move costs (10 hours or one project is 1, a promotion or
+a salary step is 2). Candidates are evaluated in increasing cost order, in
+batches. Each round stacks the next batch of every unresolved employee
+into one matrix and scores it with a single ``predict_proba`` call. An
+employee is resolved in the first round that produces a candidate below
+the target, so the answer is the cheapest change set. The search also stops
+when the time budget runs out. A whole department is therefore searched in a
+few batched rounds rather than one model call per candidate.
+"""
+
+import time
+
+import numpy as np
+
+from .ml_utils import get_risk_levels
+from .scenarios import CATEGORICAL_FEATURES, score_columns
+
+# Probability from which get_risk_levels reports 'high'
+HIGH_RISK_THRESHOLD = 0.7
+
+HOURS_STEP = 10
+HOURS_RANGE = (120, 260)
+MAX_HOURS_STEPS = 8
+PROJECT_RANGE = (2, 7)
+SALARY_LEVELS = ['low', 'medium', 'high']
+
+# Cost of one step of each lever
+STEP_COSTS = {
+    'average_monthly_hours': 1.0,
+    'number_project': 1.0,
+    'promotion_last_5years': 2.0,
+    'salary': 2.0,
+}
+
+RECOMMENDATION_TEXT = {
+    'average_monthly_hours': ('Workload', "{verb} average monthly hours from {old:g} to {new:g}"),
+    'number_project': ('Workload', "{verb} concurrent projects from {old:g} to {new:g}"),
+    'promotion_last_5years': ('Career Development', "Promote the employee"),
+    'salary': ('Compensation', "Raise salary band from {old} to {new}"),
+}
+
+
+def _moves(record):
+    """
+    (feature, values, costs) per lever for one employee; index 0 is always
+    'no change', which is the only option of levers that do not apply
+    """
+    moves = []
+
+    hours = float(record['average_monthly_hours'])
+    values, costs = [hours], [0.0]
+    for step in range(1, MAX_HOURS_STEPS + 1):
+        for value in (hours - step * HOURS_STEP, hours + step * HOURS_STEP):
+            if HOURS_RANGE[0] <= value <= HOURS_RANGE[1]:
+                values.append(value)
+                costs.append(step * STEP_COSTS['average_monthly_hours'])
+    moves.append(('average_monthly_hours', values, costs))
+
+    projects = float(record['number_project'])
+    values, costs = [projects], [0.0]
+    for value in range(PROJECT_RANGE[0], PROJECT_RANGE[1] + 1):
+        if value != projects:
+            values.append(float(value))
+            costs.append(abs(value - projects) * STEP_COSTS['number_project'])
+    moves.append(('number_project', values, costs))
+
+    if record['promotion_last_5years']:
+        moves.append(('promotion_last_5years', [1.0], [0.0]))
+    else:
+        moves.append(('promotion_last_5years', [0.0, 1.0], [0.0, STEP_COSTS['promotion_last_5years']]))
+
+    if record.get('salary') in SALARY_LEVELS:
+        values = SALARY_LEVELS[SALARY_LEVELS.index(record['salary']):]
+        moves.append(('salary', values, [step * STEP_COSTS['salary'] for step in range(len(values))]))
+    else:
+        moves.append(('salary', [record.get('salary')], [0.0]))
+    return moves
+
+
+def candidate_changes(record):
+    """
+    Every combination of moves for one employee, cheapest first (fewer
+    changed levers first among equal costs). Returns (features, value
+    columns, costs, changed mask) with the no-change combination left out.
+    """
+    moves = _moves(record)
+    sizes = [len(values) for _, values, _ in moves]
+    index = np.indices(sizes).reshape(len(moves), -1)
+
+    costs = sum(np.asarray(move_costs)[index[k]] for k, (_, _, move_costs) in enumerate(moves))
+    changed = index > 0
+    order = np.lexsort((changed.sum(axis=0), costs))
+    order = order[changed[:, order].any(axis=0)]
+
+    features = [feature for feature, _, _ in moves]
+    columns = {
+        feature: np.asarray(values, dtype=object if feature in CATEGORICAL_FEATURES else np.float64)[index[k, order]]
+        for k, (feature, values, _) in enumerate(moves)
+    }
+    return features, columns, costs[order], changed[:, order]
+
+
+def _stack(records, overrides, counts):
+    """Model input columns: record i repeated ``counts[i]`` times, with ``overrides`` (feature -> array) applied"""
+    columns = {}
+    for name in records[0]:
+        if name in overrides:
+            columns[name] = overrides[name]
+            continue
+        values = [record[name] for record in records]
+        if name in CATEGORICAL_FEATURES:
+            columns[name] = np.repeat(np.asarray(values, dtype=object), counts)
+        else:
+            columns[name] = np.repeat(np.array([np.nan if value is None else value for value in values]), counts)
+    return columns
+
+
+def _describe(features, columns, changed, record, position, probability, cost):
+    changes = []
+    for k, feature in enumerate(features):
+        if not changed[k, position]:
+            continue
+        new = columns[feature][position]
+        changes.append({
+            'feature': feature,
+            'from': record[feature],
+            'to': new if feature in CATEGORICAL_FEATURES else float(new),
+        })
+    return {
+        'changes': changes,
+        'probability': round(float(probability), 4),
+        'risk_level': str(get_risk_levels([probability])[0]),
+        'cost': float(cost),
+    }
+
+
+def search_counterfactuals(loaded_model, records, target=HIGH_RISK_THRESHOLD, max_results=3,
+                           batch_size=256, time_budget=None):
+    """
+    Counterfactuals for each record (a dict of model inputs as built by
+    scenarios.employee_record). Returns one result dict per record with the
+    current probability, a status ('found', 'below_target', 'not_found' or
+    'time_budget_exceeded'), the number of candidates scored and up to
+    ``max_results`` cheapest change sets found in the resolving round
+    (none of which is another one plus extra changes).
+    """
+    started = time.perf_counter()
+    records = [dict(record) for record in records]
+    if not records:
+        return []
+
+    current = score_columns(loaded_model, _stack(records, {}, np.ones(len(records), dtype=np.intp)))
+    results = []
+    searches = {}
+    for i, (record, probability) in enumerate(zip(records, current)):
+        results.append({
+            'current_probability': round(float(probability), 4),
+            'current_risk_level': str(get_risk_levels([probability])[0]),
+            'target': target,
+            'status': 'below_target' if probability < target else 'not_found',
+            'evaluated': 0,
+            'counterfactuals': [],
+        })
+        if probability >= target:
+            searches[i] = {'candidates': candidate_changes(record), 'next': 0}
+
+    while searches:
+        if time_budget is not None and time.perf_counter() - started > time_budget:
+            for i in searches:
+                results[i]['status'] = 'time_budget_exceeded'
+            break
+
+        # The next batch of every unresolved employee, scored together
+        batch = []
+        for i, search in searches.items():
+            start = search['next']
+            batch.append((i, start, min(start + batch_size, len(search['candidates'][2]))))
+        overrides = {
+            feature: np.concatenate([
+                searches[i]['candidates'][1][feature][start:stop] for i, start, stop in batch
+            ])
+            for feature in STEP_COSTS
+        }
+        counts = np.array([stop - start for _, start, stop in batch], dtype=np.intp)
+        probabilities = score_columns(loaded_model, _stack([records[i] for i, _, _ in batch], overrides, counts))
+
+        offset = 0
+        for (i, start, stop), count in zip(batch, counts):
+            features, columns, costs, changed = searches[i]['candidates']
+            scores = probabilities[offset:offset + count]
+            offset += count
+            results[i]['evaluated'] += int(count)
+
+            hits = np.flatnonzero(scores < target)
+            if hits.size:
+                # Alternatives that merely add changes to a cheaper hit are not worth listing
+                kept = []
+                for hit in hits:
+                    mask = changed[:, start + hit]
+                    if not any((mask >= changed[:, start + other]).all() for other in kept):
+                        kept.append(hit)
+                        if len(kept) == max_results:
+                            break
+                results[i]['status'] = 'found'
+                results[i]['counterfactuals'] = [
+                    _describe(features, columns, changed, records[i], start + hit, scores[hit], costs[start + hit])
+                    for hit in kept
+                ]
+                del searches[i]
+            elif stop >= len(costs):
+                del searches[i]
+            else:
+                searches[i]['next'] = stop
+    return results
+
+
+def counterfactual_recommendations(result):
+    """The cheapest counterfactual of a search result as recommendation dicts (empty if none was found)"""
+    if not result['counterfactuals']:
+        return []
+    best = result['counterfactuals'][0]
+    recommendations = []
+    for change in best['changes']:
+        category, text = RECOMMENDATION_TEXT[change['feature']]
+        old, new = change['from'], change['to']
+        verb = 'Reduce' if not isinstance(new, str) and new < old else 'Increase'
+        recommendations.append({
+            'category': category,
+            'issue': (
+                f"Predicted turnover probability {result['current_probability']:.0%} "
+                f"is above the {result['target']:.0%} target"
+            ),
+            'recommendation': text.format(verb=verb, old=old, new=new),
+            'priority': 'high',
+            'expected_probability': best['probability'],
+        })
+    return recommendations
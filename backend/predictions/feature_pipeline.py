@@ -0,0 +1,199 @@
+"""
+Compiled inference feature pipeline.
+
+A FeaturePipeline is built once from what training fitted (column order,
+label encoder vocabularies, fill values, StandardScaler parameters) and is
+saved with the model as a plain dict. At prediction time it maps an employee
+dict, an EmployeePerformanceData row or a batch of columns straight to scaled
+float vectors with dictionary lookups and NumPy arrays, so the request path
+never builds a DataFrame and training and serving always agree on the layout.
+"""
+
+import numpy as np
+
+from .ml_utils import BASE_FEATURE_NAMES, FEATURE_DEFAULTS
+
+SALARY_ORDINALS = {'low': 0, 'medium': 1, 'high': 2}
+
+# Department names used in the database -> labels used by training data and older artifacts
+DEPARTMENT_ALIASES = {
+    'Human Resources': ['HR', 'hr'],
+    'Information Technology': ['IT'],
+    'Research & Development': ['R&D', 'RandD'],
+    'Customer Service': ['Support', 'support'],
+    'Sales': ['sales'],
+    'Marketing': ['marketing'],
+    'Finance': ['accounting'],
+}
+
+CATEGORICAL_SOURCES = ('salary', 'department')
+
+
+class FeaturePipeline:
+    """
+    Maps employee records to model input vectors.
+
+    Each column is a dict with ``name``, ``kind`` and ``source``:
+        numeric  float(record[source]); missing values use ``fill``
+        lookup   table[record[source]] (label-encoded or ordinal); unknown uses ``fill``
+        onehot   1.0 when record[source] resolves to ``value``
+    Categorical values are resolved against the artifact's vocabulary (with
+    DEPARTMENT_ALIASES for database department names). Resolutions are cached
+    only for values that are in the vocabulary, so arbitrary request values
+    cannot grow the cache.
+    """
+
+    def __init__(self, columns, mean=None, scale=None):
+        self.columns = [dict(column) for column in columns]
+        self.feature_names = [column['name'] for column in self.columns]
+        self.n_features = len(self.columns)
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+
+        # Vocabulary of each categorical source, for alias resolution
+        self._vocabulary = {source: set() for source in CATEGORICAL_SOURCES}
+        for column in self.columns:
+            if column['kind'] == 'lookup':
+                self._vocabulary[column['source']].update(column['table'])
+            elif column['kind'] == 'onehot':
+                self._vocabulary[column['source']].add(column['value'])
+        self._resolved = {source: {} for source in CATEGORICAL_SOURCES}
+
+    # ---- construction -------------------------------------------------
+
+    @classmethod
+    def compile(cls, feature_columns, label_encoders=None, scaler=None, fill_values=None):
+        """Build a pipeline from the columns, encoders and scaler fitted in prepare_data"""
+        label_encoders = label_encoders or {}
+        fill_values = fill_values or {}
+        columns = []
+        for name in feature_columns:
+            if name in label_encoders:
+                table = {str(label): code for code, label in enumerate(label_encoders[name].classes_)}
+                columns.append({'name': name, 'kind': 'lookup', 'source': name, 'table': table, 'fill': 0})
+            else:
+                fill = fill_values.get(name, FEATURE_DEFAULTS.get(name, 0))
+                columns.append({'name': name, 'kind': 'numeric', 'source': name, 'fill': float(fill)})
+
+        mean = getattr(scaler, 'mean_', None)
+        scale = getattr(scaler, 'scale_', None)
+        return cls(columns, mean=mean, scale=scale)
+
+    @classmethod
+    def from_feature_names(cls, feature_names, label_encoders=None, scaler=None):
+        """
+        Build a pipeline for artifacts saved without one, inferring column kinds
+        from their names (``salary_ordinal``, ``department_<name>`` one-hots)
+        """
+        label_encoders = label_encoders or {}
+        columns = []
+        for name in feature_names:
+            if name == 'salary_ordinal':
+                columns.append({'name': name, 'kind': 'lookup', 'source': 'salary',
+                                'table': dict(SALARY_ORDINALS), 'fill': SALARY_ORDINALS['medium']})
+            elif name.startswith('department_'):
+                columns.append({'name': name, 'kind': 'onehot', 'source': 'department',
+                                'value': name[len('department_'):]})
+            elif name in label_encoders:
+                table = {str(label): code for code, label in enumerate(label_encoders[name].classes_)}
+                columns.append({'name': name, 'kind': 'lookup', 'source': name, 'table': table, 'fill': 0})
+            else:
+                columns.append({'name': name, 'kind': 'numeric', 'source': name,
+                                'fill': float(FEATURE_DEFAULTS.get(name, 0))})
+
+        mean = getattr(scaler, 'mean_', None)
+        scale = getattr(scaler, 'scale_', None)
+        return cls(columns, mean=mean, scale=scale)
+
+    def to_dict(self):
+        """Plain, JSON-serializable form stored inside model artifacts"""
+        return {
+            'columns': self.columns,
+            'mean': None if self.mean is None else self.mean.tolist(),
+            'scale': None if self.scale is None else self.scale.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['columns'], mean=data.get('mean'), scale=data.get('scale'))
+
+    # ---- transformation -----------------------------------------------
+
+    def _resolve(self, source, value):
+        """Map a raw categorical value onto the artifact's vocabulary (None if unknown)"""
+        cache = self._resolved[source]
+        if value in cache:
+            return cache[value]
+
+        vocabulary = self._vocabulary[source]
+        resolved = None
+        if value is not None:
+            candidates = [str(value)] + DEPARTMENT_ALIASES.get(str(value), [])
+            resolved = next((candidate for candidate in candidates if candidate in vocabulary), None)
+        if resolved is not None:
+            cache[value] = resolved
+        return resolved
+
+    def _scale(self, X):
+        if self.mean is not None:
+            X -= self.mean
+        if self.scale is not None:
+            X /= self.scale
+        return X
+
+    def transform_record(self, record, out=None):
+        """
+        Scaled feature vector for one employee dict (base features plus
+        ``salary`` and ``department``). ``out`` may be a preallocated
+        float64 array of length ``n_features``.
+        """
+        if out is None:
+            out = np.empty(self.n_features, dtype=np.float64)
+        for j, column in enumerate(self.columns):
+            kind = column['kind']
+            value = record.get(column['source'])
+            if kind == 'numeric':
+                out[j] = column['fill'] if value is None or value != value else value
+            elif kind == 'lookup':
+                out[j] = column['table'].get(self._resolve(column['source'], value), column['fill'])
+            else:
+                out[j] = self._resolve(column['source'], value) == column['value']
+        return self._scale(out)
+
+    def transform_instance(self, performance_data, out=None):
+        """Scaled feature vector straight from an EmployeePerformanceData row"""
+        employee = performance_data.employee
+        record = {name: getattr(performance_data, name) for name in BASE_FEATURE_NAMES}
+        record['salary'] = employee.salary
+        record['department'] = employee.department.name if employee.department_id else None
+        return self.transform_record(record, out=out)
+
+    def transform_columns(self, columns, out=None):
+        """
+        Scaled (n, n_features) matrix from columnar input: a dict mapping each
+        source name to a sequence (e.g. built from ``values_list`` rows)
+        """
+        n_rows = len(next(iter(columns.values())))
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=np.float64)
+
+        resolved = {}
+        for j, column in enumerate(self.columns):
+            source = column['source']
+            if column['kind'] == 'numeric':
+                if source not in columns:
+                    out[:, j] = column['fill']
+                    continue
+                values = np.asarray(columns[source], dtype=np.float64)
+                out[:, j] = np.where(np.isnan(values), column['fill'], values)
+                continue
+
+            if source not in resolved:
+                resolved[source] = [self._resolve(source, value) for value in columns.get(source, [None] * n_rows)]
+            if column['kind'] == 'lookup':
+                table, fill = column['table'], column['fill']
+                out[:, j] = [table.get(value, fill) for value in resolved[source]]
+            else:
+                target = column['value']
+                out[:, j] = [value == target for value in resolved[source]]
+        return self._scale(out)
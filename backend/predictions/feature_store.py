@@ -0,0 +1,290 @@
+"""
+Materialized per-employee features from performance-app activity.
+
+EmployeeActivityFeatures keeps running sums and counts over an employee's
+goals, received feedback, learning progress, one-on-one meetings and
+performance reviews. Signal receivers (see signals) turn every save or
+delete of one of those rows into the difference between its old and new
+contribution and apply it with a single ``UPDATE ... SET x = x + delta``,
+so keeping the table current costs O(1) per write and never rescans an
+employee's history. Averages and rates (``ACTIVITY_FEATURE_NAMES``) are
+derived from the aggregates when the table is read as a dense matrix for
+training or scoring.
+
+Bulk writes that bypass signals (``QuerySet.update``, ``bulk_create``,
+raw SQL) leave the aggregates stale; ``rebuild`` (the
+``rebuild_feature_store`` command) recomputes them from the source tables.
+"""
+
+from collections import Counter, namedtuple
+
+import numpy as np
+
+# A source model: the field holding the employee id, the fields its
+# contribution is computed from, and the function computing it
+ActivitySource = namedtuple('ActivitySource', ['employee_field', 'fields', 'contribution'])
+
+
+def _goal_contribution(values):
+    if values['status'] == 'cancelled':
+        return {}
+    return {
+        'goals_total': 1,
+        'goals_completed': int(values['status'] == 'completed'),
+        'goal_progress_sum': values['progress_percentage'] or 0,
+    }
+
+
+def _feedback_contribution(values):
+    contribution = {'feedback_count': 1}
+    if values['rating'] is not None:
+        contribution.update(feedback_rating_sum=values['rating'], feedback_rating_count=1)
+    return contribution
+
+
+def _learning_contribution(values):
+    return {
+        'learning_minutes': values['time_spent_minutes'] or 0,
+        'learning_modules_started': 1,
+        'learning_modules_completed': int(bool(values['is_completed'])),
+    }
+
+
+def _meeting_contribution(values):
+    contribution = {}
+    if values['status'] == 'completed':
+        contribution['meetings_completed'] = 1
+    if values['satisfaction_rating'] is not None:
+        contribution.update(meeting_rating_sum=values['satisfaction_rating'], meeting_rating_count=1)
+    return contribution
+
+
+def _review_contribution(values):
+    if values['overall_rating'] is None:
+        return {}
+    return {'review_rating_sum': values['overall_rating'], 'review_rating_count': 1}
+
+
+SOURCES = {
+    'performance.Goal': ActivitySource('owner_id', ['status', 'progress_percentage'], _goal_contribution),
+    'performance.Feedback': ActivitySource('to_employee_id', ['rating'], _feedback_contribution),
+    'performance.LearningProgress': ActivitySource(
+        'employee_id', ['time_spent_minutes', 'is_completed'], _learning_contribution
+    ),
+    'performance.OneOnOneMeeting': ActivitySource(
+        'employee_id', ['status', 'satisfaction_rating'], _meeting_contribution
+    ),
+    'performance.PerformanceReview': ActivitySource('employee_id', ['overall_rating'], _review_contribution),
+}
+
+AGGREGATE_FIELDS = [
+    'goals_total', 'goals_completed', 'goal_progress_sum',
+    'feedback_count', 'feedback_rating_sum', 'feedback_rating_count',
+    'learning_minutes', 'learning_modules_started', 'learning_modules_completed',
+    'meetings_completed', 'meeting_rating_sum', 'meeting_rating_count',
+    'review_rating_sum', 'review_rating_count',
+]
+
+# Model features derived from the aggregates; averages and rates are NaN
+# (filled like any missing value) for employees without the activity
+ACTIVITY_FEATURE_NAMES = [
+    'goal_completion_rate',
+    'avg_goal_progress',
+    'feedback_received',
+    'avg_feedback_rating',
+    'learning_hours',
+    'learning_completion_rate',
+    'meetings_completed',
+    'avg_meeting_satisfaction',
+    'avg_review_rating',
+]
+
+# Employee ids per ``IN (...)`` query when reading the table
+READ_BATCH_SIZE = 1000
+
+
+def _source(sender):
+    return SOURCES.get(sender._meta.label)
+
+
+def _contribution(source, values):
+    return source.contribution(values) if values[source.employee_field] is not None else {}
+
+
+def _instance_values(source, instance):
+    return {name: getattr(instance, name) for name in [source.employee_field] + source.fields}
+
+
+# Write path (called from the signal receivers)
+
+def remember_previous(sender, instance):
+    """Before a save or delete, keep the stored row's values on the instance (one primary key lookup)"""
+    source = _source(sender)
+    if source is None or instance.pk is None or instance._state.adding:
+        return
+    previous = sender._default_manager.filter(pk=instance.pk).values(source.employee_field, *source.fields).first()
+    instance._activity_previous = previous
+
+
+def record_save(sender, instance):
+    """Apply the difference between a saved row's new and previous contribution"""
+    source = _source(sender)
+    if source is None:
+        return
+    current = _instance_values(source, instance)
+    previous = instance.__dict__.pop('_activity_previous', None)
+    new_contribution = _contribution(source, current)
+
+    if previous is None:
+        apply_delta(current[source.employee_field], new_contribution)
+        return
+
+    old_contribution = _contribution(source, previous)
+    if previous[source.employee_field] == current[source.employee_field]:
+        delta = Counter(new_contribution)
+        delta.subtract(old_contribution)
+        apply_delta(current[source.employee_field], delta)
+    else:
+        apply_delta(previous[source.employee_field], {name: -value for name, value in old_contribution.items()})
+        apply_delta(current[source.employee_field], new_contribution)
+
+
+def record_delete(sender, instance):
+    """Remove a deleted row's contribution"""
+    source = _source(sender)
+    if source is None:
+        return
+    # The stored row, not the instance: a stale instance would subtract values that were since changed
+    values = instance.__dict__.pop('_activity_previous', None) or _instance_values(source, instance)
+    delta = {name: -value for name, value in _contribution(source, values).items()}
+    # Never create rows here: during an employee's cascade delete theirs may already be gone
+    apply_delta(values[source.employee_field], delta, create=False)
+
+
+def apply_delta(employee_id, delta, create=True):
+    """
+    Add ``delta`` (aggregate field -> change) to an employee's row in one
+    UPDATE. An employee without a row yet (first activity since the table
+    was built) gets one computed from the source tables, which already
+    include the write that triggered this.
+    """
+    from django.db.models import F
+    from django.utils import timezone
+    from .models import EmployeeActivityFeatures
+
+    delta = {name: value for name, value in delta.items() if value}
+    if employee_id is None or not delta:
+        return
+    updated = EmployeeActivityFeatures.objects.filter(employee_id=employee_id).update(
+        updated_at=timezone.now(), **{name: F(name) + value for name, value in delta.items()}
+    )
+    if not updated and create:
+        rebuild(employee_ids=[employee_id])
+
+
+# Rebuild
+
+def compute_aggregates(employee_ids=None):
+    """Aggregates per employee id recomputed from the source tables (all employees, or just ``employee_ids``)"""
+    from django.apps import apps
+
+    aggregates = {}
+    for label, source in SOURCES.items():
+        queryset = apps.get_model(label)._default_manager.order_by()
+        if employee_ids is not None:
+            queryset = queryset.filter(**{f"{source.employee_field}__in": employee_ids})
+        fields = [source.employee_field] + source.fields
+        for row in queryset.values_list(*fields).iterator(chunk_size=5000):
+            values = dict(zip(fields, row))
+            contribution = _contribution(source, values)
+            if contribution:
+                aggregates.setdefault(values[source.employee_field], Counter()).update(contribution)
+    return aggregates
+
+
+def rebuild(employee_ids=None, batch_size=1000):
+    """
+    Recompute the table (or the rows of ``employee_ids``) from the source
+    tables. A full rebuild writes a row for every employee, so later writes
+    only ever UPDATE. Returns the number of rows written.
+    """
+    from django.db import transaction
+    from .models import Employee, EmployeeActivityFeatures
+
+    aggregates = compute_aggregates(employee_ids)
+    employees = Employee.objects.all()
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+    rows = [
+        EmployeeActivityFeatures(employee_id=employee_id, **aggregates.get(employee_id, {}))
+        for employee_id in employees.values_list('pk', flat=True)
+    ]
+
+    with transaction.atomic():
+        stale = EmployeeActivityFeatures.objects.all()
+        if employee_ids is not None:
+            stale = stale.filter(employee_id__in=employee_ids)
+        stale.delete()
+        EmployeeActivityFeatures.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+# Read path
+
+def load_aggregates(employee_ids):
+    """(len(employee_ids), len(AGGREGATE_FIELDS)) float64 matrix; employees without a row get zeros"""
+    from .models import EmployeeActivityFeatures
+
+    employee_ids = list(employee_ids)
+    position = {employee_id: i for i, employee_id in enumerate(employee_ids)}
+    aggregates = np.zeros((len(employee_ids), len(AGGREGATE_FIELDS)), dtype=np.float64)
+    for start in range(0, len(employee_ids), READ_BATCH_SIZE):
+        rows = EmployeeActivityFeatures.objects.filter(
+            employee_id__in=employee_ids[start:start + READ_BATCH_SIZE]
+        ).values_list('employee_id', *AGGREGATE_FIELDS)
+        for row in rows:
+            aggregates[position[row[0]]] = row[1:]
+    return aggregates
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def derive_features(aggregates):
+    """ACTIVITY_FEATURE_NAMES columns (name -> float64 array) from a load_aggregates matrix"""
+    a = dict(zip(AGGREGATE_FIELDS, aggregates.T))
+    return {
+        'goal_completion_rate': _ratio(a['goals_completed'], a['goals_total']),
+        'avg_goal_progress': _ratio(a['goal_progress_sum'], a['goals_total']),
+        'feedback_received': a['feedback_count'],
+        'avg_feedback_rating': _ratio(a['feedback_rating_sum'], a['feedback_rating_count']),
+        'learning_hours': a['learning_minutes'] / 60,
+        'learning_completion_rate': _ratio(a['learning_modules_completed'], a['learning_modules_started']),
+        'meetings_completed': a['meetings_completed'],
+        'avg_meeting_satisfaction': _ratio(a['meeting_rating_sum'], a['meeting_rating_count']),
+        'avg_review_rating': _ratio(a['review_rating_sum'], a['review_rating_count']),
+    }
+
+
+def activity_columns(employee_ids):
+    """Activity features of ``employee_ids`` as columns aligned with the ids"""
+    return derive_features(load_aggregates(employee_ids))
+
+
+def activity_matrix(employee_ids):
+    """Dense (len(employee_ids), len(ACTIVITY_FEATURE_NAMES)) float64 matrix of activity features"""
+    columns = activity_columns(employee_ids)
+    return np.column_stack([columns[name] for name in ACTIVITY_FEATURE_NAMES])
+
+
+def activity_record(employee_id):
+    """Activity features of one employee as a dict (NaN where the employee has no such activity)"""
+    columns = activity_columns([employee_id])
+    return {name: float(columns[name][0]) for name in ACTIVITY_FEATURE_NAMES}
+
+
+def uses_activity_features(feature_pipeline):
+    """Whether a model's feature pipeline reads any activity feature"""
+    return any(column['source'] in ACTIVITY_FEATURE_NAMES for column in feature_pipeline.columns)
@@ -0,0 +1,102 @@
+from django.core.management.base import BaseCommand, CommandError
+from predictions.benchmarking import STAGES, compare_reports, run_benchmark
+from predictions.training_data import TrainingData
+from predictions.training_jobs import get_training_csv_path
+import json
+
+class Command(BaseCommand):
+    help = ('Benchmark training and scoring on synthetic data of the training CSV schema at several sizes '
+            'and write a JSON report')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[15000, 100000, 1000000],
+            help='Dataset sizes to benchmark'
+        )
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            default=None,
+            help='Only train these candidates (e.g. RandomForest LogisticRegression)'
+        )
+        parser.add_argument(
+            '--parallel',
+            action='store_true',
+            help='Fit the candidate models concurrently, as train_model_from_csv --parallel'
+        )
+        parser.add_argument(
+            '--n-jobs',
+            type=int,
+            default=None,
+            help='Cores to use with --parallel (default: all)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for the synthetic rows'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default='ml_benchmark.json',
+            help='Path of the JSON report'
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            default=None,
+            help='Earlier report to compare against'
+        )
+
+    def handle(self, *args, **options):
+        csv_path = get_training_csv_path()
+        if csv_path is None:
+            raise CommandError("CSV file not found: ml_data/training_data.csv")
+        source = TrainingData.from_csv(csv_path)
+
+        def on_scale(scale):
+            self.stdout.write(self.style.SUCCESS(
+                f"{scale['rows']} rows: {scale['total_seconds']:.1f}s, peak RSS {scale['peak_rss_mb']:.0f} MB, "
+                f"best {scale['best_model']} ({scale['training_workers']} training workers), "
+                f"{scale['batch_rows_per_sec']} rows/sec batch, "
+                f"{scale['single_row_ms']['p50']:.3f} ms single row"
+            ))
+            for name in STAGES:
+                stage = scale['stages'][name]
+                self.stdout.write(self.style.NOTICE(
+                    f"  {name}: {stage['seconds']:.3f}s (peak RSS {stage['peak_rss_mb']:.0f} MB)"
+                ))
+
+        self.stdout.write(self.style.NOTICE(f"Benchmarking {', '.join(str(rows) for rows in options['rows'])} rows"))
+        report = run_benchmark(
+            source, options['rows'],
+            seed=options['seed'],
+            model_names=options['models'],
+            parallel=options['parallel'],
+            n_jobs=options['n_jobs'],
+            on_scale=on_scale
+        )
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            self.stdout.write(self.style.NOTICE(f"Compared with {options['baseline']} ({baseline.get('git_commit')}):"))
+            if baseline.get('options') != report['options']:
+                self.stdout.write(self.style.WARNING(
+                    f"  Baseline was run with different options: {baseline.get('options')}"
+                ))
+            for row in compare_reports(baseline, report):
+                before, after = row['seconds']
+                style = self.style.ERROR if row['ratio'] and row['ratio'] > 1.1 else self.style.NOTICE
+                self.stdout.write(style(
+                    f"  {row['rows']} rows {row['stage']}: {before:.3f}s -> {after:.3f}s (x{row['ratio']}), "
+                    f"peak RSS {row['peak_rss_mb'][0]:.0f} -> {row['peak_rss_mb'][1]:.0f} MB"
+                ))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from predictions.ml_utils import get_model_save_path
+from predictions.model_artifacts import (
+    MemoryMappedForest, export_mmap_artifact, get_mmap_artifact_path, verification_sample, verify_flat_forest
+)
+import joblib
+import os
+import timeit
+
+class Command(BaseCommand):
+    help = 'Export a joblib model artifact as memory-mapped arrays shared by all gunicorn workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model-path',
+            type=str,
+            default=None,
+            help='Path to the joblib artifact (default: ml_models/turnover_model_v1.joblib)'
+        )
+
+    def handle(self, *args, **options):
+        model_path = options['model_path'] or get_model_save_path('turnover_model_v1')
+        if not os.path.exists(model_path):
+            self.stderr.write(self.style.ERROR(f"Model file not found: {model_path}"))
+            return
+        
+        self.stdout.write(self.style.NOTICE(f"Loading model from: {model_path}"))
+        model_data = joblib.load(model_path)
+        
+        try:
+            mmap_path = get_mmap_artifact_path(model_path)
+            manifest = export_mmap_artifact(model_data, mmap_path, source_path=model_path)
+        except ValueError as e:
+            self.stderr.write(self.style.ERROR(f"Export failed: {str(e)}"))
+            return
+        
+        self.stdout.write(self.style.SUCCESS(f"Memory-mapped artifact saved to {mmap_path}"))
+        self.stdout.write(self.style.NOTICE(
+            f"{manifest['model_type']}: {manifest['n_trees']} trees, max depth {manifest['max_depth']}, "
+            f"{manifest['n_features']} features"
+        ))
+        
+        # The export must reproduce the fitted estimator exactly
+        forest = MemoryMappedForest(mmap_path)
+        if not verify_flat_forest(forest, model_data['model']):
+            self.stderr.write(self.style.ERROR("Exported forest does not match scikit-learn predictions"))
+            return
+        self.stdout.write(self.style.SUCCESS("Verified bit-for-bit against scikit-learn predict_proba"))
+        
+        row = verification_sample(forest, n_rows=1)
+        flat_us = min(timeit.repeat(lambda: forest.predict_positive_one(row[0]), number=200, repeat=3)) / 200 * 1e6
+        sklearn_us = min(timeit.repeat(lambda: model_data['model'].predict_proba(row), number=20, repeat=3)) / 20 * 1e6
+        self.stdout.write(self.style.NOTICE(
+            f"Single-row latency: {flat_us:.0f} us flat arrays, {sklearn_us:.0f} us scikit-learn"
+        ))
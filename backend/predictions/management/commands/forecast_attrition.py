@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from predictions.attrition_forecast import get_forecast, summarize
+import time
+
+class Command(BaseCommand):
+    help = 'Monte Carlo forecast of leavers per department from the latest stored predictions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trials',
+            type=int,
+            default=settings.ML_FORECAST_TRIALS,
+            help='Simulated trials'
+        )
+        parser.add_argument(
+            '--confidence',
+            type=float,
+            default=0.9,
+            help='Confidence interval level'
+        )
+        parser.add_argument(
+            '--at-least',
+            type=int,
+            nargs='*',
+            default=[1, 5, 10],
+            help='K values to report the probability that at least K employees leave for'
+        )
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help='Simulate again even if a forecast for the latest scoring run is cached'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        forecast, cached = get_forecast(n_trials=max(1, options['trials']), refresh=options['refresh'])
+        elapsed = time.perf_counter() - started
+
+        source = 'cached' if cached else f"simulated in {elapsed:.1f}s"
+        self.stdout.write(self.style.NOTICE(
+            f"{forecast['employees']} employees x {forecast['trials']} trials "
+            f"(scoring run {forecast['scoring_run']}, {source})"
+        ))
+
+        at_least = options['at_least']
+        for entry in forecast['departments'] + [forecast['total']]:
+            summary = summarize(entry, forecast['trials'], options['confidence'], at_least)
+            interval = summary['confidence_interval']
+            chances = ', '.join(f"P(>={k})={p:.2f}" for k, p in summary['probability_at_least'].items())
+            self.stdout.write(
+                f"{summary['department']:<24} {summary['employees']:>7} employees  "
+                f"expected {summary['expected_leavers']:>8.1f}  "
+                f"{interval['level']:.0%} CI [{interval['low']}, {interval['high']}]  {chances}"
+            )
+        self.stdout.write(self.style.SUCCESS("Forecast complete"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from predictions import feature_store
+import time
+
+class Command(BaseCommand):
+    help = ('Recompute the activity feature store from the performance app tables '
+            '(after bulk imports or other writes that bypass signals)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--employee',
+            type=int,
+            action='append',
+            default=[],
+            help='Only rebuild the row of this employee id (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        employee_ids = options['employee'] or None
+        scope = f"{len(employee_ids)} employees" if employee_ids else "all employees"
+        self.stdout.write(self.style.NOTICE(f"Rebuilding activity features for {scope}"))
+
+        started = time.perf_counter()
+        rows = feature_store.rebuild(employee_ids=employee_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {rows} feature rows in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,105 @@
+from django.core.management.base import BaseCommand
+from predictions.model_registry import get_active_model
+from predictions.scoring import create_scoring_pool, plan_scoring, run_scoring
+import os
+import resource
+import time
+
+class Command(BaseCommand):
+    help = 'Re-score employees with the active model and store TurnoverPrediction and MLPredictionHistory rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only re-score employees whose performance data changed since their latest prediction '
+                 '(everyone if the active model changed)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many employees would be scored'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Employees read from the database and scored per chunk'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk INSERT'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Scoring processes (1 scores in this process)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the last unfinished scoring run after its last processed primary key'
+        )
+        parser.add_argument(
+            '--start-after',
+            type=int,
+            default=0,
+            help='Only score EmployeePerformanceData rows with a primary key above this value'
+        )
+        parser.add_argument(
+            '--no-history',
+            action='store_true',
+            help='Do not write hr_features MLPredictionHistory rows'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+
+        loaded_model = get_active_model()
+        plan = plan_scoring(loaded_model, incremental=options['incremental'], resume=options['resume'])
+        after_pk = max(options['start_after'], plan['run'].last_processed_pk if plan['run'] else 0)
+        total = plan['queryset'].filter(pk__gt=after_pk).count()
+
+        model_used = loaded_model.model_name if loaded_model is not None else 'RuleBasedModel'
+        self.stdout.write(self.style.NOTICE(f"{plan['mode'].capitalize()} scoring: {plan['reason']}"))
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"{total} employees would be scored with {model_used}"))
+            return
+
+        self.stdout.write(self.style.NOTICE(
+            f"Scoring {total} employees with {model_used} ({workers} worker(s), chunks of {chunk_size})"
+        ))
+
+        pool = create_scoring_pool(loaded_model, workers) if workers > 1 else None
+        started = time.perf_counter()
+        try:
+            run = run_scoring(
+                plan, loaded_model,
+                chunk_size=chunk_size,
+                batch_size=options['batch_size'],
+                history=not options['no_history'],
+                pool=pool,
+                workers=workers,
+                after_pk=after_pk
+            )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        elapsed = time.perf_counter() - started
+
+        # ru_maxrss is reported in kilobytes on Linux
+        peak_parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        peak_worker = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"Scoring run {run.pk}: {total} employees in {elapsed:.1f}s "
+            f"({total / elapsed if elapsed else 0:.0f} rows/sec)"
+        ))
+        memory = f"Peak memory: {peak_parent:.1f} MB main process"
+        if pool is not None:
+            memory += f", {peak_worker:.1f} MB largest worker"
+        self.stdout.write(self.style.NOTICE(memory))
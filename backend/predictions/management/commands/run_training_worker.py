@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from predictions.training_jobs import claim_next_job, execute_job
+import time
+
+class Command(BaseCommand):
+    help = 'Execute queued training jobs submitted through /api/training/jobs/'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the queued jobs and exit instead of polling for new ones'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds between checks for queued jobs'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("Training worker started"))
+        
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            
+            self.stdout.write(self.style.NOTICE(f"Running training job {job.pk} ({job.source})"))
+            execute_job(job)
+            style = self.style.SUCCESS if job.status == 'succeeded' else self.style.ERROR
+            self.stdout.write(style(
+                f"Training job {job.pk} {job.status} after {job.elapsed_seconds:.1f}s"
+                f"{f': {job.ml_model.name}' if job.ml_model else ''}"
+            ))
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from collections import defaultdict
+import os
+import subprocess
+import sys
+
+# Imported in a fresh interpreter so nothing is already cached by this process
+PROBE_SCRIPT = """
+import importlib, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+print(f"{time.perf_counter() - start:.6f}")
+"""
+
+class Command(BaseCommand):
+    help = 'Report per-module import cost of booting Django and loading all URL/view modules'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Number of modules/packages to list'
+        )
+        parser.add_argument(
+            '--with-ml',
+            action='store_true',
+            help='Also import the ML stack (pandas, scikit-learn, joblib) as the first prediction would'
+        )
+        parser.add_argument(
+            '--module',
+            action='append',
+            default=[],
+            help='Extra module to import after startup (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        modules = list(options['module'])
+        if options['with_ml']:
+            modules += ['pandas', 'joblib', 'sklearn.ensemble', 'sklearn.linear_model',
+                        'sklearn.model_selection', 'sklearn.metrics']
+
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(sys.path)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE_SCRIPT, *modules],
+            capture_output=True, text=True, env=env
+        )
+        if result.returncode != 0:
+            self.stderr.write(self.style.ERROR("Import probe failed:"))
+            self.stderr.write(result.stderr[-2000:])
+            return
+
+        modules_cumulative = []
+        packages_self = defaultdict(int)
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            name = name.strip()
+            modules_cumulative.append((int(cumulative_us), name))
+            packages_self[name.split('.')[0]] += int(self_us)
+
+        total_seconds = float(result.stdout.strip().splitlines()[-1])
+        top = options['top']
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Startup import time: {total_seconds * 1000:.1f} ms ({len(modules_cumulative)} modules)"
+        ))
+
+        self.stdout.write(self.style.NOTICE("\nBy top-level package (self time):"))
+        for package, self_us in sorted(packages_self.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {self_us / 1000:9.1f} ms  {package}")
+
+        self.stdout.write(self.style.NOTICE("\nSlowest modules (cumulative time):"))
+        for cumulative_us, name in sorted(modules_cumulative, reverse=True)[:top]:
+            self.stdout.write(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+
+        heavy = [name for name in ('pandas', 'sklearn', 'joblib', 'matplotlib') if name in packages_self]
+        if heavy and not options['with_ml'] and not modules:
+            self.stdout.write(self.style.WARNING(f"\nHeavy ML packages imported at startup: {', '.join(heavy)}"))
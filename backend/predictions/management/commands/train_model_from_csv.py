@@ -1,56 +1,168 @@
 from django.core.management.base import BaseCommand
-import pandas as pd
-from predictions.ml_utils import TurnoverPredictor, get_model_save_path
-import os
+from predictions.training_data import TrainingData
+from predictions.training_jobs import DEFAULT_MODEL_NAME, get_training_csv_path, train_and_register
 from django.conf import settings
 
 class Command(BaseCommand):
     help = 'Train turnover ML model from CSV in ml_data/training_data.csv and save to ml_models/'
 
-    def handle(self, *args, **options):
-        csv_path = os.path.join(settings.BASE_DIR, 'ml_data', 'training_data.csv')
-        if not os.path.exists(csv_path):
-            # Try alternative path
-            csv_path = os.path.join(settings.BASE_DIR, 'backend', 'ml_data', 'training_data.csv')
-            if not os.path.exists(csv_path):
-                self.stderr.write(self.style.ERROR(f"CSV file not found: {csv_path}"))
-                return
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--parallel',
+            action='store_true',
+            help='Fit the candidate models concurrently in a process pool'
+        )
+        parser.add_argument(
+            '--n-jobs',
+            type=int,
+            default=None,
+            help='Cores to use with --parallel (default: all)'
+        )
+        parser.add_argument(
+            '--tune',
+            action='store_true',
+            help='Search hyperparameters with successive halving before the final fit'
+        )
+        parser.add_argument(
+            '--time-budget',
+            type=int,
+            default=None,
+            help='Seconds allowed for --tune (default: ML_TUNING_TIME_BUDGET)'
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Refit every candidate instead of reusing fits of identical data from ml_models/cache/'
+        )
+        parser.add_argument(
+            '--compress',
+            action='store_true',
+            help='Replace the best model by its smallest pruned, depth-limited or distilled variant within the AUC budget'
+        )
+        parser.add_argument(
+            '--max-auc-loss',
+            type=float,
+            default=None,
+            help='Validation AUC --compress may give up (default: ML_COMPRESSION_MAX_AUC_LOSS)'
+        )
+        parser.add_argument(
+            '--model-name',
+            type=str,
+            default=DEFAULT_MODEL_NAME,
+            help='MLModel row to record the result on (the artifact goes to ml_models/store/)'
+        )
+        parser.add_argument(
+            '--activate',
+            action='store_true',
+            help='Make the recorded MLModel the active model'
+        )
+
+    def load_training_data(self, options):
+        """Return the TrainingData to train on, or None (after reporting why)"""
+        csv_path = get_training_csv_path()
+        if csv_path is None:
+            self.stderr.write(self.style.ERROR("CSV file not found: ml_data/training_data.csv"))
+            return None
         
         self.stdout.write(self.style.NOTICE(f"Loading CSV from: {csv_path}"))
-        df = pd.read_csv(csv_path)
-        
-        self.stdout.write(self.style.NOTICE(f"CSV shape: {df.shape}"))
-        self.stdout.write(self.style.NOTICE(f"CSV columns: {list(df.columns)}"))
+        return TrainingData.from_csv(csv_path)
+
+    def handle(self, *args, **options):
+        training_data = self.load_training_data(options)
+        if training_data is None:
+            return
         
-        predictor = TurnoverPredictor()
+        self.stdout.write(self.style.NOTICE(
+            f"Training rows: {training_data.n_rows} ({training_data.nbytes / 1024 / 1024:.1f} MB in memory)"
+        ))
+        self.stdout.write(self.style.NOTICE(f"Columns: {training_data.columns}"))
         
         try:
-            X, y = predictor.prepare_data(df.to_dict(orient='records'))
-            if X is None or y is None:
-                self.stderr.write(self.style.ERROR("Failed to prepare data"))
-                return
-                
-            self.stdout.write(self.style.NOTICE(f"Training data shape: X={X.shape}, y={y.shape}"))
+            time_budget = options['time_budget'] or settings.ML_TUNING_TIME_BUDGET
+            if options['tune']:
+                self.stdout.write(self.style.NOTICE(f"Tuning hyperparameters (budget {time_budget}s)..."))
             self.stdout.write(self.style.NOTICE("Training model..."))
             
-            results, best_model_name = predictor.train_models(X, y)
+            ml_model, created, results, predictor = train_and_register(
+                training_data,
+                model_name=options['model_name'],
+                activate=options['activate'],
+                parallel=options['parallel'],
+                n_jobs=options['n_jobs'],
+                tune=options['tune'],
+                time_budget=time_budget,
+                use_cache=not options['no_cache'],
+                compress=options['compress'],
+                max_auc_loss=options['max_auc_loss']
+            )
             
-            model_path = get_model_save_path('turnover_model_v1')
-            predictor.save_model(model_path)
+            if predictor.tuning_summary:
+                summary = predictor.tuning_summary
+                self.stdout.write(self.style.NOTICE(
+                    f"Search: {summary['n_fits']} fits ({summary['n_cached']} cached scores) in {summary['elapsed']:.1f}s"
+                    f"{' (stopped at budget)' if summary['stopped_early'] else ''}"
+                ))
+                for rung in summary['rungs']:
+                    if not rung['candidates']:
+                        continue
+                    self.stdout.write(self.style.NOTICE(
+                        f"  {rung['candidates']} candidates on {rung['resource']} rows, best F1={rung['best_score']:.3f}"
+                    ))
+                for family, params in summary['best_params'].items():
+                    self.stdout.write(self.style.NOTICE(
+                        f"  {family}: {params if params else 'defaults kept'}"
+                    ))
             
-            self.stdout.write(self.style.SUCCESS(f"Model trained and saved to {model_path}"))
-            self.stdout.write(self.style.SUCCESS(f"Best model: {best_model_name}"))
+            if predictor.compression_summary:
+                self.write_compression_summary(predictor.compression_summary)
+            
+            self.stdout.write(self.style.SUCCESS(f"Model trained and saved to {ml_model.model_file_path}"))
+            self.stdout.write(self.style.SUCCESS(f"Best model: {predictor.best_model_name}"))
+            self.stdout.write(self.style.SUCCESS(
+                f"{'Created' if created else 'Updated'} MLModel '{ml_model.name}'"
+                f"{' (active)' if ml_model.is_active else ''}"
+            ))
             
             # Show training results
             for model_name, metrics in results.items():
                 accuracy = metrics.get('accuracy', 0)
                 f1_score = metrics.get('f1_score', 0)
                 auc_score = metrics.get('auc_score', 0)
+                training_time = metrics.get('training_time', 0)
                 self.stdout.write(self.style.NOTICE(
-                    f"{model_name}: Accuracy={accuracy:.3f}, F1={f1_score:.3f}, AUC={auc_score:.3f}"
+                    f"{model_name}: Accuracy={accuracy:.3f}, F1={f1_score:.3f}, AUC={auc_score:.3f}, "
+                    f"fit {training_time:.1f}s{' (cached)' if metrics.get('cached') else ''}"
+                    f"{' (compressed)' if metrics.get('compressed') else ''}"
                 ))
                 
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Training failed: {str(e)}"))
             import traceback
             self.stderr.write(traceback.format_exc())
+
+    def write_compression_summary(self, summary):
+        original = summary['original']
+        self.stdout.write(self.style.NOTICE(
+            f"Compression (AUC budget {summary['max_auc_loss']}): original {original['bytes'] / 1024:.0f} KB, "
+            f"hold-out AUC={original['metrics']['auc_score']:.4f}, {original['single_row_ms']:.3f} ms/row"
+        ))
+        reference = summary['reference']
+        if reference is not None:
+            self.stdout.write(self.style.NOTICE(
+                f"  Chosen on a validation slice; reference {reference['bytes'] / 1024:.0f} KB, "
+                f"validation AUC={reference['metrics']['auc_score']:.4f}"
+            ))
+        for candidate in summary['candidates']:
+            self.stdout.write(self.style.NOTICE(
+                f"  {candidate['description']}: {candidate['bytes'] / 1024:.0f} KB, "
+                f"validation AUC={candidate['metrics']['auc_score']:.4f}, {candidate['single_row_ms']:.3f} ms/row"
+                f"{'' if candidate['accepted'] else ' (rejected)'}"
+            ))
+        if summary['selected'] is None:
+            self.stdout.write(self.style.WARNING("  No candidate within the AUC budget; keeping the original model"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"  Selected {summary['selected']}: {summary['size_reduction']}x smaller, "
+                f"hold-out AUC -{summary['auc_loss']:.4f}, single row x{summary.get('single_row_speedup')}, "
+                f"batch x{summary.get('batch_speedup')}"
+            ))
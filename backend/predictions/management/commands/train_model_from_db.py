@@ -0,0 +1,45 @@
+from predictions.management.commands.train_model_from_csv import Command as TrainModelCommand
+from predictions.models import EmployeePerformanceData
+from predictions.training_data import TrainingData
+import numpy as np
+
+class Command(TrainModelCommand):
+    help = 'Train turnover ML model from the EmployeePerformanceData table and save to ml_models/'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows fetched from the database per round trip'
+        )
+        parser.add_argument(
+            '--department',
+            type=str,
+            action='append',
+            default=[],
+            help='Only train on employees of this department (repeatable)'
+        )
+        parser.add_argument(
+            '--activity-features',
+            action='store_true',
+            help='Also train on goal, feedback, learning, meeting and review features from the feature store'
+        )
+
+    def load_training_data(self, options):
+        queryset = EmployeePerformanceData.objects.all()
+        if options['department']:
+            queryset = queryset.filter(employee__department__name__in=options['department'])
+        
+        self.stdout.write(self.style.NOTICE("Loading training data from EmployeePerformanceData"))
+        training_data = TrainingData.from_queryset(
+            queryset, chunk_size=options['chunk_size'], activity_features=options['activity_features']
+        )
+        if training_data.n_rows == 0:
+            self.stderr.write(self.style.ERROR("No performance data found"))
+            return None
+        if training_data.target is not None and len(np.unique(training_data.target)) < 2:
+            self.stderr.write(self.style.ERROR("Training data needs both employees who left and who stayed"))
+            return None
+        return training_data
@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand
+from predictions.online_learning import OnlineTurnoverModel, get_online_model_path
+import os
+import time
+
+class Command(BaseCommand):
+    help = ('Update the online (partial_fit) turnover model from performance data changed since its last '
+            'checkpoint and save it to ml_models/. The online model runs in shadow (it is not served); '
+            'its log loss is reported next to the active model\'s on the same rows')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=256,
+            help='Changed rows per partial_fit micro-batch'
+        )
+        parser.add_argument(
+            '--checkpoint-every',
+            type=int,
+            default=20,
+            help='Save a checkpoint after this many micro-batches (always saved at the end)'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many micro-batches per pass'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Discard the checkpoint and learn the whole table again with a new model'
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Keep running and pick up new changes every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30.0,
+            help='Seconds between passes with --watch'
+        )
+
+    def handle(self, *args, **options):
+        file_path = get_online_model_path()
+        if os.path.exists(file_path) and not options['reset']:
+            model = OnlineTurnoverModel.load(file_path)
+            self.stdout.write(self.style.NOTICE(
+                f"Resuming online model: {model.n_samples_seen} rows learned in {model.n_updates} updates"
+            ))
+        else:
+            model = OnlineTurnoverModel.create()
+            self.stdout.write(self.style.NOTICE(
+                f"Starting a new online model with {model.feature_pipeline.n_features} features"
+            ))
+
+        while True:
+            self.run_pass(model, options, file_path)
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
+
+    def run_pass(self, model, options, file_path):
+        losses = []
+        active_losses = []
+        update_seconds = []
+
+        def on_batch(n_rows, loss, active_loss, elapsed):
+            # Compared on the batches both models were scored on
+            if loss is not None and active_loss is not None:
+                losses.append(loss)
+                active_losses.append(active_loss)
+            update_seconds.append(elapsed / n_rows)
+
+        learned = model.consume(
+            batch_size=max(1, options['batch_size']),
+            max_batches=options['max_batches'],
+            checkpoint_every=options['checkpoint_every'],
+            file_path=file_path,
+            on_batch=on_batch
+        )
+        if not learned:
+            self.stdout.write(self.style.NOTICE("No changed performance data to learn from"))
+            return
+
+        message = (
+            f"Learned {learned} rows in {len(update_seconds)} micro-batches "
+            f"({sum(update_seconds) / len(update_seconds) * 1e6:.1f} µs/row per update)"
+        )
+        if losses:
+            message += (
+                f", log loss before update {sum(losses) / len(losses):.4f} "
+                f"(active model {sum(active_losses) / len(active_losses):.4f})"
+            )
+        self.stdout.write(self.style.SUCCESS(message))
+        self.stdout.write(self.style.SUCCESS(f"Checkpoint saved to {file_path}"))
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0005_alter_employee_managers_alter_employee_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('full', 'Full'), ('incremental', 'Incremental')], max_length=20)),
+                ('model_version', models.CharField(help_text="Version of the model used (registry version, or 'rules' for the rule-based fallback)", max_length=100)),
+                ('high_water_mark', models.DateTimeField(blank=True, help_text='Latest EmployeePerformanceData.updated_at covered by this run', null=True)),
+                ('employees_scored', models.IntegerField(default=0)),
+                ('last_processed_pk', models.BigIntegerField(default=0, help_text='Primary key of the last EmployeePerformanceData row written (resume point)')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Scoring Run',
+                'verbose_name_plural': 'Scoring Runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('predictions', '0006_scoringrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', max_length=20)),
+                ('source', models.CharField(choices=[('csv', 'Training CSV'), ('database', 'Performance data table')], default='database', max_length=20)),
+                ('parameters', models.JSONField(blank=True, default=dict, help_text='model_name, activate, parallel, n_jobs, tune, time_budget, departments')),
+                ('stage', models.CharField(blank=True, max_length=100)),
+                ('rows_processed', models.IntegerField(default=0)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('results', models.JSONField(blank=True, help_text='Hold-out metrics of every candidate model', null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('ml_model', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='training_jobs', to='predictions.mlmodel')),
+                ('submitted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='training_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Training Job',
+                'verbose_name_plural': 'Training Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
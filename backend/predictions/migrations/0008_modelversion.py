@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0007_trainingjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(db_index=True, help_text='Content hash of the joblib artifact', max_length=64)),
+                ('file_path', models.CharField(max_length=500)),
+                ('model_type', models.CharField(choices=[('RandomForest', 'Random Forest'), ('GradientBoosting', 'Gradient Boosting'), ('LogisticRegression', 'Logistic Regression'), ('SVM', 'Support Vector Machine'), ('XGBoost', 'XGBoost'), ('Neural Network', 'Neural Network')], max_length=20)),
+                ('metrics', models.JSONField(blank=True, default=dict, help_text='MLModel metrics at training time, restored on rollback')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ml_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='predictions.mlmodel')),
+            ],
+            options={
+                'verbose_name': 'Model Version',
+                'verbose_name_plural': 'Model Versions',
+                'ordering': ['-created_at'],
+                'unique_together': {('ml_model', 'sha256')},
+            },
+        ),
+    ]
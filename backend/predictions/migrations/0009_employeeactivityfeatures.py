@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0008_modelversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeActivityFeatures',
+            fields=[
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity_features', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('goals_total', models.IntegerField(default=0)),
+                ('goals_completed', models.IntegerField(default=0)),
+                ('goal_progress_sum', models.IntegerField(default=0)),
+                ('feedback_count', models.IntegerField(default=0)),
+                ('feedback_rating_sum', models.IntegerField(default=0)),
+                ('feedback_rating_count', models.IntegerField(default=0)),
+                ('learning_minutes', models.IntegerField(default=0)),
+                ('learning_modules_started', models.IntegerField(default=0)),
+                ('learning_modules_completed', models.IntegerField(default=0)),
+                ('meetings_completed', models.IntegerField(default=0)),
+                ('meeting_rating_sum', models.IntegerField(default=0)),
+                ('meeting_rating_count', models.IntegerField(default=0)),
+                ('review_rating_sum', models.FloatField(default=0)),
+                ('review_rating_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Employee Activity Features',
+                'verbose_name_plural': 'Employee Activity Features',
+            },
+        ),
+    ]
@@ -1,21 +1,36 @@
-import pandas as pd
+# pandas, scikit-learn and joblib are imported inside the methods that use
+# them, so importing this module (views, URL loading, every manage.py call)
+# stays cheap and the ML stack loads on the first training/prediction call.
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, f1_score, roc_auc_score, classification_report
-from sklearn.pipeline import make_pipeline
-import joblib
 import os
 from django.conf import settings
 import warnings
 warnings.filterwarnings('ignore')
 
+# Feature columns shared by training and inference (order matters)
+BASE_FEATURE_NAMES = [
+    'satisfaction_level', 'last_evaluation', 'number_project',
+    'average_monthly_hours', 'time_spend_company', 'work_accident',
+    'promotion_last_5years'
+]
+
+# Values used when a performance field is missing (or zero) at prediction time
+FEATURE_DEFAULTS = {
+    'satisfaction_level': 0.5,
+    'last_evaluation': 0.5,
+    'number_project': 2,
+    'average_monthly_hours': 160,
+    'time_spend_company': 2,
+    'work_accident': 0,
+    'promotion_last_5years': 0
+}
+
 class TurnoverPredictor:
     def __init__(self):
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+        
         self.models = {
             'RandomForest': RandomForestClassifier(n_estimators=100, random_state=42),
             'GradientBoosting': GradientBoostingClassifier(n_estimators=100, random_state=42),
@@ -25,12 +40,20 @@ class TurnoverPredictor:
         self.label_encoders = {}
         self.best_model = None
         self.best_model_name = None
+        self.feature_names = list(BASE_FEATURE_NAMES)
+        self.feature_pipeline = None
+        self.tuning_summary = None
+        self.training_workers = None
+        self.compression_summary = None
         
     def prepare_data(self, data):
         """Prepare data for training"""
         if not data:
             return None, None
-            
+        
+        import pandas as pd
+        from sklearn.preprocessing import LabelEncoder
+        
         df = pd.DataFrame(data)
         
         # Handle missing values
@@ -57,12 +80,8 @@ class TurnoverPredictor:
                 df[col] = self.label_encoders[col].fit_transform(df[col].astype(str))
         
         # Prepare features (only use columns that exist)
-        base_features = ['satisfaction_level', 'last_evaluation', 'number_project',
-                        'average_monthly_hours', 'time_spend_company', 'work_accident',
-                        'promotion_last_5years']
-        
         feature_columns = []
-        for col in base_features:
+        for col in BASE_FEATURE_NAMES:
             if col in df.columns:
                 feature_columns.append(col)
         
@@ -76,6 +95,15 @@ class TurnoverPredictor:
         # Scale features
         X = self.scaler.fit_transform(X)
         
+        # Compile the inference-side mapping from exactly what was fitted here
+        from .feature_pipeline import FeaturePipeline
+        
+        fill_values = {col: df[col].median() for col in feature_columns if col not in self.label_encoders}
+        self.feature_names = feature_columns
+        self.feature_pipeline = FeaturePipeline.compile(
+            feature_columns, self.label_encoders, self.scaler, fill_values
+        )
+        
         # Prepare target variable
         if 'left' in df.columns:
             y = df['left'].values
@@ -85,75 +113,186 @@ class TurnoverPredictor:
         
         return X, y
     
-    def train_models(self, X, y):
-        """Train multiple models and select the best one"""
+    def prepare_columns(self, training_data):
+        """
+        Prepare a columnar TrainingData set for training (the prepare_data
+        equivalent without per-row dicts or DataFrames)
+        """
+        if training_data is None or training_data.n_rows == 0:
+            return None, None
+        
+        from sklearn.preprocessing import LabelEncoder
+        from .feature_pipeline import FeaturePipeline
+        
+        feature_columns = training_data.columns
+        X = np.empty((training_data.n_rows, len(feature_columns)), dtype=np.float64)
+        fill_values = {}
+        for j, name in enumerate(feature_columns):
+            if name in training_data.numeric:
+                X[:, j] = training_data.numeric[name]
+                # str() gives the shortest decimal form of float32 medians (0.64, not 0.6399999857)
+                fill_values[name] = float(str(np.median(training_data.numeric[name])))
+            else:
+                codes, labels = training_data.categorical[name]
+                encoder = LabelEncoder()
+                encoder.classes_ = np.asarray(labels)
+                self.label_encoders[name] = encoder
+                X[:, j] = codes
+        
+        # Scale features in place
+        self.scaler.fit(X)
+        X = self.scaler.transform(X, copy=False)
+        
+        self.feature_names = feature_columns
+        self.feature_pipeline = FeaturePipeline.compile(
+            feature_columns, self.label_encoders, self.scaler, fill_values
+        )
+        
+        if training_data.target is not None:
+            y = training_data.target
+        else:
+            # If no target variable, create synthetic one based on satisfaction and evaluation
+            y = ((training_data.numeric['satisfaction_level'] < 0.4)
+                 | (training_data.numeric['last_evaluation'] < 0.4)).astype(int)
+        
+        return X, y
+    
+    def train_models(self, X, y, parallel=False, n_jobs=None, tune=False, time_budget=600, progress=None,
+                     cache=None):
+        """
+        Train multiple models and select the best one.
+        
+        With ``parallel`` the candidates are fitted concurrently in a process
+        pool of up to ``n_jobs`` workers (all cores by default), and cores not
+        needed for one process per candidate go to estimators that build
+        trees in parallel. With ``tune`` each candidate's hyperparameters are
+        first chosen by a successive-halving search on the training split;
+        tuned parameters replace the defaults only where they scored better,
+        and search plus final fit are kept within ``time_budget`` seconds.
+        ``progress``, if given, is called
+        with a stage description before every search candidate and model fit
+        (and may raise to abort training). With a TrainingCache as ``cache``,
+        fitted candidates and search scores for the same prepared data and
+        hyperparameters are reused instead of refitted (their metrics carry
+        ``cached: True``). Returns per-model metrics; only the winning model
+        is kept (as ``self.best_model``). ``self.training_workers`` records
+        how many processes the fits actually ran in.
+        """
         if X is None or y is None:
             raise ValueError("Invalid training data")
-            
-        results = {}
         
         # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
+        X_train, X_test, y_train, y_test = split_holdout(X, y)
         
-        # Train each model
-        for name, model in self.models.items():
-            try:
-                # Train model
-                model.fit(X_train, y_train)
-                
-                # Make predictions
-                y_pred = model.predict(X_test)
-                y_pred_proba = model.predict_proba(X_test)[:, 1]
-                
-                # Calculate metrics
-                accuracy = accuracy_score(y_test, y_pred)
-                f1 = f1_score(y_test, y_pred, average='weighted')
-                auc = roc_auc_score(y_test, y_pred_proba)
-                
-                results[name] = {
-                    'model': model,
-                    'accuracy': accuracy,
-                    'f1_score': f1,
-                    'auc_score': auc,
-                    'predictions': y_pred,
-                    'probabilities': y_pred_proba
-                }
-                
-            except Exception as e:
-                print(f"Error training {name}: {str(e)}")
-                continue
+        if tune:
+            from .model_tuning import SuccessiveHalvingSearch
+            
+            if progress is not None:
+                progress("Tuning hyperparameters")
+            search = SuccessiveHalvingSearch(
+                self.models, time_budget=time_budget, n_jobs=n_jobs, callback=progress, cache=cache
+            )
+            search.fit(X_train, y_train)
+            for name, params in search.best_params_.items():
+                self.models[name].set_params(**params)
+            self.tuning_summary = search.summary()
+        
+        fitted = {}
+        cache_keys = {}
+        if cache is not None:
+            from .training_cache import candidate_key, dataset_fingerprint
+            
+            fingerprint = dataset_fingerprint(X, y)
+            for name, model in self.models.items():
+                cache_keys[name] = candidate_key(
+                    fingerprint, model, split={'test_size': 0.2, 'random_state': 42, 'stratify': True}
+                )
+                entry = cache.get(cache_keys[name])
+                if entry is not None:
+                    fitted[name] = (name, entry['model'], dict(entry['metrics'], cached=True))
+        to_fit = {name: model for name, model in self.models.items() if name not in fitted}
+        
+        if parallel and to_fit:
+            from joblib import Parallel, delayed, effective_n_jobs
+            
+            if progress is not None:
+                progress(f"Fitting {len(to_fit)} models in parallel")
+            # 1 inside daemonic processes, where joblib cannot start workers
+            n_cores = effective_n_jobs(n_jobs or -1)
+            workers = min(len(to_fit), n_cores)
+            self.training_workers = workers
+            for model in to_fit.values():
+                if 'n_jobs' in model.get_params():
+                    model.set_params(n_jobs=max(1, n_cores - workers + 1))
+            
+            newly_fitted = Parallel(n_jobs=workers)(
+                delayed(_fit_candidate)(name, model, X_train, y_train, X_test, y_test)
+                for name, model in to_fit.items()
+            )
+        else:
+            self.training_workers = 1
+            newly_fitted = []
+            for name, model in to_fit.items():
+                if progress is not None:
+                    progress(f"Fitting {name}")
+                newly_fitted.append(_fit_candidate(name, model, X_train, y_train, X_test, y_test))
+        
+        for name, model, metrics in newly_fitted:
+            fitted[name] = (name, model, metrics)
+            if cache is not None and model is not None:
+                cache.set(cache_keys[name], {'model': model, 'metrics': metrics})
         
-        # Select best model based on F1 score
-        if results:
-            self.best_model_name = max(results.keys(), key=lambda k: results[k]['f1_score'])
-            self.best_model = results[self.best_model_name]['model']
+        results = {}
+        best_f1 = None
+        # Candidate order decides ties, whichever were cached
+        for name, model, metrics in (fitted[name] for name in self.models):
+            if model is None:
+                continue
+            results[name] = metrics
+            # Select best model based on F1 score
+            if best_f1 is None or metrics['f1_score'] > best_f1:
+                best_f1 = metrics['f1_score']
+                self.best_model_name = name
+                self.best_model = model
         
         return results, self.best_model_name
     
+    def compress(self, X, y, max_auc_loss, progress=None):
+        """
+        Replace the best model with the smallest compressed variant whose
+        AUC is at most ``max_auc_loss`` below its own, chosen on a validation
+        slice of the training split (see model_compression). Returns the
+        hold-out metrics of the model kept.
+        """
+        if self.best_model is None:
+            raise ValueError("No trained model to compress")
+        
+        from .model_compression import compress_model
+        
+        X_train, X_test, y_train, y_test = split_holdout(X, y)
+        model, report = compress_model(
+            self.best_model, X_train, y_train, X_test, y_test, max_auc_loss, progress=progress
+        )
+        self.best_model = model
+        self.compression_summary = report
+        if report['selected'] is None:
+            return report['original']['metrics']
+        return report['selected_holdout']['metrics']
+    
     def predict(self, features):
-        """Make prediction using the best model"""
+        """
+        Make prediction using the best model.
+        
+        ``features`` is an employee dict (base features plus optional
+        ``salary`` and ``department``) or an already encoded feature sequence.
+        """
         if self.best_model is None:
             raise ValueError("No trained model available")
         
-        # Ensure features are in the right format
         if isinstance(features, dict):
-            # Convert dict to array
-            feature_array = np.array([[
-                features.get('satisfaction_level', 0.5),
-                features.get('last_evaluation', 0.5),
-                features.get('number_project', 2),
-                features.get('average_monthly_hours', 160),
-                features.get('time_spend_company', 2),
-                features.get('work_accident', 0),
-                features.get('promotion_last_5years', 0)
-            ]])
+            feature_array = self.feature_pipeline.transform_record(features).reshape(1, -1)
         else:
-            feature_array = np.array(features).reshape(1, -1)
-        
-        # Scale features
-        feature_array = self.scaler.transform(feature_array)
+            feature_array = self.scaler.transform(np.array(features, dtype=float).reshape(1, -1))
         
         # Make prediction
         prediction = self.best_model.predict(feature_array)[0]
@@ -161,40 +300,99 @@ class TurnoverPredictor:
         
         return prediction, probability
     
-    def save_model(self, file_path):
-        """Save the trained model and preprocessing objects"""
+    def get_hyperparameters(self):
+        """JSON-serializable parameters of the best model"""
+        if self.best_model is None:
+            return {}
+        return {
+            name: value for name, value in self.best_model.get_params().items()
+            if value is None or isinstance(value, (bool, int, float, str))
+        }
+    
+    def get_feature_importance(self):
+        """Feature name -> importance of the best model (absolute coefficients for linear models)"""
+        if self.best_model is None:
+            return None
+        if hasattr(self.best_model, 'feature_importances_'):
+            importances = self.best_model.feature_importances_
+        elif hasattr(self.best_model, 'coef_'):
+            importances = np.abs(self.best_model.coef_[0])
+        else:
+            return None
+        return {name: round(float(value), 6) for name, value in zip(self.feature_names, importances)}
+    
+    def save_model(self, file_path, export_mmap=True):
+        """
+        Save the trained model and preprocessing objects.
+        
+        Forest models are also exported as a memory-mappable directory next to
+        the joblib file so gunicorn workers can share one copy of the trees.
+        """
         if self.best_model is None:
             raise ValueError("No trained model to save")
         
+        import joblib
+        from sklearn.ensemble import RandomForestClassifier
+        
         model_data = {
             'model': self.best_model,
             'scaler': self.scaler,
             'label_encoders': self.label_encoders,
             'best_model_name': self.best_model_name,
-            'feature_names': ['satisfaction_level', 'last_evaluation', 'number_project',
-                            'average_monthly_hours', 'time_spend_company', 'work_accident',
-                            'promotion_last_5years']
+            'feature_names': list(self.feature_names),
+            'feature_pipeline': self.feature_pipeline.to_dict() if self.feature_pipeline else None
         }
         
         joblib.dump(model_data, file_path)
         print(f"Model saved to {file_path}")
+        
+        if export_mmap and isinstance(self.best_model, RandomForestClassifier):
+            from .model_artifacts import export_mmap_artifact, get_mmap_artifact_path
+            
+            mmap_path = get_mmap_artifact_path(file_path)
+            export_mmap_artifact(model_data, mmap_path, source_path=file_path)
+            print(f"Memory-mapped artifact saved to {mmap_path}")
     
     def load_model(self, file_path):
         """Load a trained model"""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Model file not found: {file_path}")
         
+        import joblib
+        
         model_data = joblib.load(file_path)
         self.best_model = model_data['model']
         self.scaler = model_data['scaler']
-        self.label_encoders = model_data['label_encoders']
-        self.best_model_name = model_data['best_model_name']
+        self.label_encoders = model_data.get('label_encoders') or {}
+        self.best_model_name = model_data.get('best_model_name')
+        self.feature_names = list(model_data.get('feature_names') or BASE_FEATURE_NAMES)
+        
+        from .feature_pipeline import FeaturePipeline
+        
+        if model_data.get('feature_pipeline'):
+            self.feature_pipeline = FeaturePipeline.from_dict(model_data['feature_pipeline'])
+        else:
+            # Pipelines scale internally; bare estimators rely on the stored scaler
+            scaler = None if hasattr(self.best_model, 'steps') else self.scaler
+            self.feature_pipeline = FeaturePipeline.from_feature_names(
+                self.feature_names, self.label_encoders, scaler
+            )
         
         return model_data
 
 class PerformanceAnalyzer:
     """Analyze employee performance patterns"""
     
+    # Per-group output key -> source column
+    GROUP_METRICS = {
+        'avg_satisfaction': 'satisfaction_level',
+        'avg_evaluation': 'last_evaluation',
+        'avg_projects': 'number_project',
+        'avg_hours': 'average_monthly_hours',
+        'accident_rate': 'work_accident',
+        'promotion_rate': 'promotion_last_5years'
+    }
+    
     def __init__(self):
         self.risk_thresholds = {
             'low': 0.3,
@@ -203,11 +401,24 @@ class PerformanceAnalyzer:
         }
     
     def analyze_performance_trends(self, performance_data_list):
-        """Analyze performance trends across employees"""
-        if not performance_data_list:
+        """
+        Analyze performance trends across employees.
+        
+        Accepts a list of dicts or a DataFrame; a DataFrame passed in is only
+        read, never modified.
+        """
+        if performance_data_list is None or len(performance_data_list) == 0:
             return {}
         
-        df = pd.DataFrame(performance_data_list)
+        import pandas as pd
+        
+        if isinstance(performance_data_list, pd.DataFrame):
+            df = performance_data_list
+        else:
+            df = pd.DataFrame(performance_data_list)
+        
+        risk_scores = self._calculate_risk_scores(df)
+        department_analysis, salary_analysis = self._analyze_groups(df)
         
         analysis = {
             'total_employees': len(df),
@@ -219,269 +430,316 @@ class PerformanceAnalyzer:
             'accident_rate': df['work_accident'].mean(),
             'promotion_rate': df['promotion_last_5years'].mean(),
             'turnover_rate': df['left'].mean() if 'left' in df.columns else 0,
-            'risk_distribution': self._calculate_risk_distribution(df),
-            'department_analysis': self._analyze_by_department(df),
-            'salary_analysis': self._analyze_by_salary(df)
+            'risk_distribution': self._calculate_risk_distribution(risk_scores),
+            'department_analysis': department_analysis,
+            'salary_analysis': salary_analysis
         }
         
         return analysis
     
-    def _calculate_risk_distribution(self, df):
-        """Calculate risk distribution based on performance metrics"""
-        # Calculate risk score based on multiple factors
-        risk_scores = []
-        
-        for _, row in df.iterrows():
-            risk_score = 0
-            
-            # Low satisfaction increases risk
-            if row['satisfaction_level'] < 0.4:
-                risk_score += 0.3
-            elif row['satisfaction_level'] < 0.6:
-                risk_score += 0.1
-            
-            # Low evaluation increases risk
-            if row['last_evaluation'] < 0.4:
-                risk_score += 0.3
-            elif row['last_evaluation'] < 0.6:
-                risk_score += 0.1
-            
-            # High hours can increase risk
-            if row['average_monthly_hours'] > 200:
-                risk_score += 0.2
-            elif row['average_monthly_hours'] > 180:
-                risk_score += 0.1
-            
-            # Long tenure without promotion increases risk
-            if row['time_spend_company'] > 4 and row['promotion_last_5years'] == 0:
-                risk_score += 0.2
-            
-            # Work accidents increase risk
-            if row['work_accident'] == 1:
-                risk_score += 0.1
-            
-            risk_scores.append(min(risk_score, 1.0))
-        
-        df['risk_score'] = risk_scores
+    def _calculate_risk_scores(self, df):
+        """Vectorized risk score per row based on performance metrics"""
+        satisfaction = df['satisfaction_level'].to_numpy(dtype=float)
+        evaluation = df['last_evaluation'].to_numpy(dtype=float)
+        hours = df['average_monthly_hours'].to_numpy(dtype=float)
+        tenure = df['time_spend_company'].to_numpy(dtype=float)
+        accident = df['work_accident'].to_numpy(dtype=float)
+        promotion = df['promotion_last_5years'].to_numpy(dtype=float)
+        
+        # Same factors (and summation order) as the original per-row rules
+        risk_scores = np.zeros(len(df))
+        # Low satisfaction increases risk
+        risk_scores += np.where(satisfaction < 0.4, 0.3, np.where(satisfaction < 0.6, 0.1, 0.0))
+        # Low evaluation increases risk
+        risk_scores += np.where(evaluation < 0.4, 0.3, np.where(evaluation < 0.6, 0.1, 0.0))
+        # High hours can increase risk
+        risk_scores += np.where(hours > 200, 0.2, np.where(hours > 180, 0.1, 0.0))
+        # Long tenure without promotion increases risk
+        risk_scores += np.where((tenure > 4) & (promotion == 0), 0.2, 0.0)
+        # Work accidents increase risk
+        risk_scores += np.where(accident == 1, 0.1, 0.0)
+        
+        return np.minimum(risk_scores, 1.0)
+    
+    def _calculate_risk_distribution(self, risk_scores):
+        """Count employees per risk level"""
+        low = int(np.count_nonzero(risk_scores < self.risk_thresholds['low']))
+        high = int(np.count_nonzero(risk_scores >= self.risk_thresholds['medium']))
         
-        # Categorize risk levels
-        risk_distribution = {
-            'low': len(df[df['risk_score'] < 0.3]),
-            'medium': len(df[(df['risk_score'] >= 0.3) & (df['risk_score'] < 0.7)]),
-            'high': len(df[df['risk_score'] >= 0.7])
+        return {
+            'low': low,
+            'medium': len(risk_scores) - low - high,
+            'high': high
         }
-        
-        return risk_distribution
     
-    def _analyze_by_department(self, df):
-        """Analyze performance by department"""
-        if 'department' not in df.columns:
-            return {}
+    def _analyze_groups(self, df):
+        """
+        Department and salary breakdowns from a single groupby.
+        
+        Sums and non-null counts are aggregated once per (department, salary)
+        pair and then rolled up to each dimension, so means match per-group
+        ``mean()`` without re-filtering the frame for every group. Rows without
+        a department or salary are reported under a NaN/None key.
+        """
+        keys = [key for key in ('department', 'salary') if key in df.columns]
+        if not keys:
+            return {}, {}
+        
+        columns = list(self.GROUP_METRICS.values())
+        aggregations = {'employee_count': (columns[0], 'size')}
+        for column in columns:
+            aggregations[f'{column}__sum'] = (column, 'sum')
+            aggregations[f'{column}__count'] = (column, 'count')
+        table = df.groupby(keys, sort=False, dropna=False).agg(**aggregations)
         
-        dept_analysis = {}
-        for dept in df['department'].unique():
-            dept_data = df[df['department'] == dept]
-            dept_analysis[dept] = {
-                'employee_count': len(dept_data),
-                'avg_satisfaction': dept_data['satisfaction_level'].mean(),
-                'avg_evaluation': dept_data['last_evaluation'].mean(),
-                'avg_projects': dept_data['number_project'].mean(),
-                'avg_hours': dept_data['average_monthly_hours'].mean(),
-                'accident_rate': dept_data['work_accident'].mean(),
-                'promotion_rate': dept_data['promotion_last_5years'].mean()
-            }
-        
-        return dept_analysis
-    
-    def _analyze_by_salary(self, df):
-        """Analyze performance by salary level"""
-        if 'salary' not in df.columns:
-            return {}
-        
-        salary_analysis = {}
-        for salary in df['salary'].unique():
-            salary_data = df[df['salary'] == salary]
-            salary_analysis[salary] = {
-                'employee_count': len(salary_data),
-                'avg_satisfaction': salary_data['satisfaction_level'].mean(),
-                'avg_evaluation': salary_data['last_evaluation'].mean(),
-                'avg_projects': salary_data['number_project'].mean(),
-                'avg_hours': salary_data['average_monthly_hours'].mean(),
-                'accident_rate': salary_data['work_accident'].mean(),
-                'promotion_rate': salary_data['promotion_last_5years'].mean()
-            }
-        
-        return salary_analysis
+        results = {}
+        for key in keys:
+            rolled = table.groupby(level=key, sort=False, dropna=False).sum() if len(keys) > 1 else table
+            group_analysis = {}
+            for group, row in zip(rolled.index, rolled.to_dict('records')):
+                group_stats = {'employee_count': int(row['employee_count'])}
+                for name, column in self.GROUP_METRICS.items():
+                    count = row[f'{column}__count']
+                    group_stats[name] = row[f'{column}__sum'] / count if count else np.nan
+                group_analysis[group] = group_stats
+            results[key] = group_analysis
+        
+        return results.get('department', {}), results.get('salary', {})
 
 class TurnoverRiskCalculator:
     """Calculate turnover risk based on multiple factors"""
     
+    # Recommendation rules: (factor, minimum factor risk, recommendation)
+    RECOMMENDATION_RULES = [
+        ('satisfaction_level', 0.5, {
+            'category': 'Employee Satisfaction',
+            'issue': 'Low satisfaction level detected',
+            'recommendation': 'Conduct one-on-one meetings to understand concerns and improve work environment',
+            'priority': 'high'
+        }),
+        ('last_evaluation', 0.5, {
+            'category': 'Performance',
+            'issue': 'Low performance evaluation',
+            'recommendation': 'Provide additional training and support to improve performance',
+            'priority': 'high'
+        }),
+        ('average_monthly_hours', 0.5, {
+            'category': 'Workload',
+            'issue': 'Excessive working hours detected',
+            'recommendation': 'Review workload distribution and consider hiring additional staff',
+            'priority': 'medium'
+        }),
+        ('promotion_last_5years', 0.3, {
+            'category': 'Career Growth',
+            'issue': 'No promotion in the last 5 years',
+            'recommendation': 'Review career progression opportunities and create development plans',
+            'priority': 'medium'
+        }),
+        ('work_accident', 0.2, {
+            'category': 'Safety',
+            'issue': 'Work accident recorded',
+            'recommendation': 'Review safety protocols and provide additional training',
+            'priority': 'medium'
+        }),
+    ]
+    
     def __init__(self):
         self.risk_factors = {
             'satisfaction_level': {
                 'weight': 0.25,
-                'thresholds': {'low': 0.4, 'medium': 0.6}
+                'thresholds': {'low': 0.4, 'medium': 0.6},
+                'risks': {'low': 1.0, 'medium': 0.5}
             },
             'last_evaluation': {
                 'weight': 0.20,
-                'thresholds': {'low': 0.4, 'medium': 0.6}
+                'thresholds': {'low': 0.4, 'medium': 0.6},
+                'risks': {'low': 1.0, 'medium': 0.5}
             },
             'number_project': {
                 'weight': 0.15,
-                'thresholds': {'low': 2, 'high': 6}
+                'thresholds': {'low': 2, 'high': 6},
+                'risks': {'low': 0.3, 'high': 0.7}
             },
             'average_monthly_hours': {
                 'weight': 0.15,
-                'thresholds': {'low': 160, 'high': 200}
+                'thresholds': {'low': 160, 'high': 200},
+                'risks': {'low': 0.3, 'high': 0.8}
             },
             'time_spend_company': {
                 'weight': 0.10,
-                'thresholds': {'low': 2, 'high': 5}
+                'thresholds': {'low': 2, 'high': 5},
+                'risks': {'low': 0.2, 'high': 0.6}
             },
             'work_accident': {
                 'weight': 0.05,
-                'thresholds': {'risk': 1}
+                'thresholds': {'risk': 1},
+                'risks': {'risk': 0.3}
             },
             'promotion_last_5years': {
                 'weight': 0.10,
-                'thresholds': {'risk': 0}
+                'thresholds': {'risk': 0},
+                'risks': {'risk': 0.4}
             }
         }
+        self.factor_names = list(self.risk_factors)
+        self.weights = np.array([config['weight'] for config in self.risk_factors.values()])
+    
+    def _factor_risk(self, factor, values):
+        """
+        Bucket an array of factor values into risk scores.
+        
+        Thresholds with 'low'/'medium' flag values below them, 'low'/'high' flag
+        values outside the range, and 'risk' flags an exact match. Missing
+        values (NaN) carry no risk.
+        """
+        thresholds = self.risk_factors[factor]['thresholds']
+        risks = self.risk_factors[factor]['risks']
+        
+        if 'risk' in thresholds:
+            return np.where(values == thresholds['risk'], risks['risk'], 0.0)
+        if 'medium' in thresholds:
+            return np.select(
+                [values < thresholds['low'], values < thresholds['medium']],
+                [risks['low'], risks['medium']],
+                default=0.0
+            )
+        return np.select(
+            [values < thresholds['low'], values > thresholds['high']],
+            [risks['low'], risks['high']],
+            default=0.0
+        )
+    
+    def _as_feature_matrix(self, data):
+        """
+        Coerce batch input into an (n, 7) float array ordered like risk_factors.
+        
+        Accepts a 2-D array/list of rows (e.g. ``values_list`` output), a dict of
+        columns, or a QuerySet of EmployeePerformanceData.
+        """
+        if hasattr(data, 'values_list'):
+            data = data.values_list(*self.factor_names)
+        if isinstance(data, dict):
+            return np.column_stack([
+                np.asarray(data[factor], dtype=float) for factor in self.factor_names
+            ])
+        matrix = np.array(list(data) if not isinstance(data, np.ndarray) else data, dtype=float)
+        return matrix.reshape(-1, len(self.factor_names))
+    
+    def calculate_risk_scores(self, data):
+        """
+        Calculate risk for many employees at once.
+        
+        Returns a dict of arrays: ``values``, ``factor_risk`` and ``contributions``
+        are (n, 7) with columns in ``factor_names`` order; ``overall_risk_score``
+        and ``risk_level`` are (n,).
+        """
+        values = self._as_feature_matrix(data)
+        factor_risk = np.empty_like(values)
+        for j, factor in enumerate(self.factor_names):
+            factor_risk[:, j] = self._factor_risk(factor, values[:, j])
+        
+        contributions = factor_risk * self.weights
+        overall_risk_score = contributions.sum(axis=1)
+        
+        return {
+            'factor_names': self.factor_names,
+            'values': values,
+            'factor_risk': factor_risk,
+            'contributions': contributions,
+            'overall_risk_score': overall_risk_score,
+            'risk_level': get_risk_levels(overall_risk_score)
+        }
     
     def calculate_risk_score(self, performance_data):
         """Calculate comprehensive risk score"""
-        risk_score = 0
-        risk_details = {}
+        values = [getattr(performance_data, factor, 0) for factor in self.factor_names]
+        batch = self.calculate_risk_scores([[np.nan if value is None else value for value in values]])
         
-        for factor, config in self.risk_factors.items():
-            value = getattr(performance_data, factor, 0)
-            weight = config['weight']
-            thresholds = config['thresholds']
-            
-            factor_risk = 0
-            
-            if factor == 'satisfaction_level':
-                if value < thresholds['low']:
-                    factor_risk = 1.0
-                elif value < thresholds['medium']:
-                    factor_risk = 0.5
-                else:
-                    factor_risk = 0.0
-                    
-            elif factor == 'last_evaluation':
-                if value < thresholds['low']:
-                    factor_risk = 1.0
-                elif value < thresholds['medium']:
-                    factor_risk = 0.5
-                else:
-                    factor_risk = 0.0
-                    
-            elif factor == 'number_project':
-                if value < thresholds['low']:
-                    factor_risk = 0.3
-                elif value > thresholds['high']:
-                    factor_risk = 0.7
-                else:
-                    factor_risk = 0.0
-                    
-            elif factor == 'average_monthly_hours':
-                if value < thresholds['low']:
-                    factor_risk = 0.3
-                elif value > thresholds['high']:
-                    factor_risk = 0.8
-                else:
-                    factor_risk = 0.0
-                    
-            elif factor == 'time_spend_company':
-                if value < thresholds['low']:
-                    factor_risk = 0.2
-                elif value > thresholds['high']:
-                    factor_risk = 0.6
-                else:
-                    factor_risk = 0.0
-                    
-            elif factor == 'work_accident':
-                if value == thresholds['risk']:
-                    factor_risk = 0.3
-                else:
-                    factor_risk = 0.0
-                    
-            elif factor == 'promotion_last_5years':
-                if value == thresholds['risk']:
-                    factor_risk = 0.4
-                else:
-                    factor_risk = 0.0
-            
-            risk_score += factor_risk * weight
+        risk_details = {}
+        for j, factor in enumerate(self.factor_names):
+            factor_risk = float(batch['factor_risk'][0, j])
+            weight = self.risk_factors[factor]['weight']
             risk_details[factor] = {
-                'value': value,
+                'value': values[j],
                 'risk': factor_risk,
                 'weight': weight,
                 'contribution': factor_risk * weight
             }
         
-        # Determine risk level
-        if risk_score < 0.3:
-            risk_level = 'low'
-        elif risk_score < 0.7:
-            risk_level = 'medium'
-        else:
-            risk_level = 'high'
-        
         return {
-            'overall_risk_score': risk_score,
-            'risk_level': risk_level,
+            'overall_risk_score': float(batch['overall_risk_score'][0]),
+            'risk_level': str(batch['risk_level'][0]),
             'risk_details': risk_details
         }
     
+    def get_risk_recommendation_masks(self, batch_analysis):
+        """Boolean mask per recommendation rule over a calculate_risk_scores result"""
+        factor_risk = batch_analysis['factor_risk']
+        return [
+            (factor_risk[:, self.factor_names.index(factor)] > min_risk, recommendation)
+            for factor, min_risk, recommendation in self.RECOMMENDATION_RULES
+        ]
+    
+    def get_batch_risk_recommendations(self, batch_analysis):
+        """Recommendations for every row of a calculate_risk_scores result"""
+        recommendations = [[] for _ in range(len(batch_analysis['overall_risk_score']))]
+        for mask, recommendation in self.get_risk_recommendation_masks(batch_analysis):
+            for row in np.flatnonzero(mask):
+                recommendations[row].append(recommendation)
+        return recommendations
+    
     def get_risk_recommendations(self, risk_analysis):
         """Get recommendations based on risk analysis"""
-        recommendations = []
         risk_details = risk_analysis['risk_details']
-        
-        if risk_details['satisfaction_level']['risk'] > 0.5:
-            recommendations.append({
-                'category': 'Employee Satisfaction',
-                'issue': 'Low satisfaction level detected',
-                'recommendation': 'Conduct one-on-one meetings to understand concerns and improve work environment',
-                'priority': 'high'
-            })
-        
-        if risk_details['last_evaluation']['risk'] > 0.5:
-            recommendations.append({
-                'category': 'Performance',
-                'issue': 'Low performance evaluation',
-                'recommendation': 'Provide additional training and support to improve performance',
-                'priority': 'high'
-            })
-        
-        if risk_details['average_monthly_hours']['risk'] > 0.5:
-            recommendations.append({
-                'category': 'Workload',
-                'issue': 'Excessive working hours detected',
-                'recommendation': 'Review workload distribution and consider hiring additional staff',
-                'priority': 'medium'
-            })
-        
-        if risk_details['promotion_last_5years']['risk'] > 0.3:
-            recommendations.append({
-                'category': 'Career Growth',
-                'issue': 'No promotion in the last 5 years',
-                'recommendation': 'Review career progression opportunities and create development plans',
-                'priority': 'medium'
-            })
-        
-        if risk_details['work_accident']['risk'] > 0.2:
-            recommendations.append({
-                'category': 'Safety',
-                'issue': 'Work accident recorded',
-                'recommendation': 'Review safety protocols and provide additional training',
-                'priority': 'medium'
-            })
-        
-        return recommendations
+        return [
+            dict(recommendation)
+            for factor, min_risk, recommendation in self.RECOMMENDATION_RULES
+            if risk_details[factor]['risk'] > min_risk
+        ]
 
 # Utility functions for Django integration
+def _fit_candidate(name, model, X_train, y_train, X_test, y_test):
+    """
+    Fit one candidate and evaluate it on the hold-out split; returns
+    (name, fitted model or None on failure, metrics). Module level so it can
+    run in a process pool.
+    """
+    import time
+    
+    try:
+        started = time.perf_counter()
+        model.fit(X_train, y_train)
+        training_time = time.perf_counter() - started
+        
+        # Fitted models are served from single-threaded web workers
+        if 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=None)
+        
+        return name, model, dict(evaluate_classifier(model, X_test, y_test), training_time=training_time)
+    except Exception as e:
+        print(f"Error training {name}: {str(e)}")
+        return name, None, {}
+
+def split_holdout(X, y):
+    """The train/test split every candidate is fitted and evaluated on"""
+    from sklearn.model_selection import train_test_split
+    
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+def evaluate_classifier(model, X_test, y_test):
+    """Hold-out metrics recorded for a fitted model"""
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+    
+    y_pred = model.predict(X_test)
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    return {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'precision': precision_score(y_test, y_pred, average='weighted'),
+        'recall': recall_score(y_test, y_pred, average='weighted'),
+        'f1_score': f1_score(y_test, y_pred, average='weighted'),
+        'auc_score': roc_auc_score(y_test, y_pred_proba),
+    }
+
 def get_model_save_path(model_name):
     """
     Get the path to save ML models
@@ -507,3 +765,81 @@ def prepare_employee_data_for_ml(employee):
         'department': employee.department.name,
         'left': int(employee.left)
     }
+
+
+def calculate_rule_based_probability(features):
+    """
+    Heuristic turnover probability used when no trained model is available
+    """
+    risk_score = 0.0
+    
+    # Low satisfaction increases risk
+    if features['satisfaction_level'] < 0.4:
+        risk_score += 0.3
+    elif features['satisfaction_level'] < 0.6:
+        risk_score += 0.1
+    
+    # Low evaluation increases risk
+    if features['last_evaluation'] < 0.4:
+        risk_score += 0.3
+    elif features['last_evaluation'] < 0.6:
+        risk_score += 0.1
+    
+    # High hours can increase risk
+    if features['average_monthly_hours'] > 200:
+        risk_score += 0.2
+    elif features['average_monthly_hours'] > 180:
+        risk_score += 0.1
+    
+    # Long tenure without promotion increases risk
+    if features['time_spend_company'] > 4 and features['promotion_last_5years'] == 0:
+        risk_score += 0.2
+    
+    # Work accidents increase risk
+    if features['work_accident'] == 1:
+        risk_score += 0.1
+    
+    # Low project count might indicate disengagement
+    if features['number_project'] < 2:
+        risk_score += 0.1
+    elif features['number_project'] > 6:
+        risk_score += 0.1
+    
+    return min(risk_score, 1.0)
+
+
+def calculate_rule_based_probabilities(X):
+    """
+    Vectorized calculate_rule_based_probability for an (n, 7) array of
+    BASE_FEATURE_NAMES columns
+    """
+    X = np.asarray(X, dtype=float)
+    satisfaction, evaluation, projects, hours, tenure, accident, promotion = X.T
+    
+    risk_score = (
+        np.where(satisfaction < 0.4, 0.3, np.where(satisfaction < 0.6, 0.1, 0.0))
+        + np.where(evaluation < 0.4, 0.3, np.where(evaluation < 0.6, 0.1, 0.0))
+        + np.where(hours > 200, 0.2, np.where(hours > 180, 0.1, 0.0))
+        + np.where((tenure > 4) & (promotion == 0), 0.2, 0.0)
+        + np.where(accident == 1, 0.1, 0.0)
+        + np.where((projects < 2) | (projects > 6), 0.1, 0.0)
+    )
+    return np.minimum(risk_score, 1.0)
+
+def fill_feature_defaults(X):
+    """
+    Replace missing (NaN) or zero entries of an (n, 7) feature array with
+    FEATURE_DEFAULTS, matching the ``value or default`` handling in predict_turnover
+    """
+    X = np.array(X, dtype=float)
+    for j, name in enumerate(BASE_FEATURE_NAMES):
+        column = X[:, j]
+        column[np.isnan(column) | (column == 0)] = FEATURE_DEFAULTS[name]
+    return X
+
+def get_risk_levels(probabilities):
+    """
+    Risk level for each probability, using the same cut-offs as TurnoverPrediction.save
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    return np.where(probabilities < 0.3, 'low', np.where(probabilities < 0.7, 'medium', 'high'))
@@ -0,0 +1,332 @@
+"""
+Flat-array tree forests and memory-mappable model artifacts.
+
+A fitted tree forest is flattened into contiguous node arrays (all trees
+concatenated) and scored by FlatForest with vectorized traversal in plain
+NumPy. This avoids scikit-learn's per-call validation and dispatch overhead
+on single rows and reproduces its probabilities bit for bit.
+
+The same arrays are exported next to the joblib dump as a directory of .npy
+files plus a small JSON manifest. Workers open them with
+``np.load(mmap_mode='r')``, so every gunicorn worker on a node reads the same
+page-cache pages instead of holding its own unpickled copy of the forest.
+
+Layout of ``<model>.mmap/``:
+    manifest.json      feature names, feature pipeline, scaler parameters, encoders, tree count
+    feature.npy        intp    split feature per node (0 for leaves)
+    threshold.npy      float64 split threshold per node
+    children.npy       intp    [left, right] absolute child index per node, flattened
+                               (leaves point to themselves)
+    leaf_proba.npy     float64 probability of the positive class at each node
+    leaf_negative.npy  float64 probability of the negative class at each node
+    roots.npy          intp    index of each tree's root node
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+MMAP_FORMAT_VERSION = 3
+MMAP_SUFFIX = '.mmap'
+MANIFEST_NAME = 'manifest.json'
+ARRAY_NAMES = ['feature', 'threshold', 'children', 'leaf_proba', 'leaf_negative', 'roots']
+
+
+def get_mmap_artifact_path(model_file_path):
+    """Directory holding the memory-mappable export of a joblib artifact"""
+    base, _ = os.path.splitext(model_file_path)
+    return base + MMAP_SUFFIX
+
+
+def file_sha256(file_path):
+    """Hex digest of a file, used to tie an export to the joblib dump it came from"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _split_pipeline(model_data):
+    """Return (forest, scaler) for a saved model dict, unwrapping sklearn Pipelines"""
+    model = model_data['model']
+    # A saved feature pipeline already scales its output
+    scaler = None if model_data.get('feature_pipeline') else model_data.get('scaler')
+    if hasattr(model, 'steps'):
+        steps = [step for _, step in model.steps]
+        model = steps[-1]
+        scalers = [step for step in steps[:-1] if hasattr(step, 'scale_')]
+        if len(scalers) != len(steps) - 1 or len(scalers) > 1:
+            raise ValueError("Only StandardScaler + forest pipelines can be flattened")
+        scaler = scalers[0] if scalers else None
+    if not hasattr(model, 'estimators_') or not hasattr(model.estimators_[0], 'tree_'):
+        raise ValueError(f"{type(model).__name__} is not a tree forest and cannot be flattened")
+    return model, scaler
+
+
+def _flatten_forest(forest):
+    """Concatenate all fitted trees of a forest into flat node arrays"""
+    positive_class = len(forest.classes_) - 1
+    features, thresholds, lefts, rights, probas, negatives, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        # Normalized class distribution per node, as DecisionTreeClassifier.predict_proba does
+        value = tree.value[:, 0, :]
+        normalizer = value.sum(axis=1)
+        normalizer[normalizer == 0.0] = 1.0
+
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        probas.append(value[:, positive_class] / normalizer)
+        # Kept separately: 1 - p can differ from sklearn's normalized negative value in the last bit
+        negatives.append(value[:, 0] / normalizer)
+        roots.append(offset)
+
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    # Interleaved so the next node is children[2 * node + went_right]: one gather per level
+    children = np.column_stack([np.concatenate(lefts), np.concatenate(rights)]).ravel()
+
+    arrays = {
+        'feature': np.concatenate(features).astype(np.intp),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'children': children.astype(np.intp),
+        'leaf_proba': np.concatenate(probas).astype(np.float64),
+        'leaf_negative': np.concatenate(negatives).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.intp),
+    }
+    return arrays, max_depth
+
+
+def _build_manifest(model_data, forest, scaler, max_depth):
+    return {
+        'format_version': MMAP_FORMAT_VERSION,
+        'model_type': type(forest).__name__,
+        'best_model_name': model_data.get('best_model_name'),
+        'feature_names': list(model_data.get('feature_names') or []),
+        'n_features': int(forest.n_features_in_),
+        'n_trees': len(forest.estimators_),
+        'max_depth': int(max_depth),
+        'scaler_mean': None if scaler is None or scaler.mean_ is None else scaler.mean_.tolist(),
+        'scaler_scale': None if scaler is None or scaler.scale_ is None else scaler.scale_.tolist(),
+        'feature_pipeline': model_data.get('feature_pipeline'),
+        'label_encoders': {
+            name: [str(label) for label in encoder.classes_]
+            for name, encoder in (model_data.get('label_encoders') or {}).items()
+        },
+    }
+
+
+def export_mmap_artifact(model_data, directory, source_path=None):
+    """
+    Write a memory-mappable copy of a saved model dict (as produced by
+    TurnoverPredictor.save_model or a StandardScaler + forest Pipeline dump).
+
+    ``source_path`` is the joblib file the dict was saved to; its hash is
+    recorded so a stale export is ignored after the joblib file is replaced.
+
+    The directory is written next to its final location and swapped in with a
+    rename, so readers never see a partially written export.
+    """
+    forest, scaler = _split_pipeline(model_data)
+    arrays, max_depth = _flatten_forest(forest)
+    manifest = _build_manifest(model_data, forest, scaler, max_depth)
+    manifest['source_sha256'] = file_sha256(source_path) if source_path else None
+
+    tmp_directory = f"{directory}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_directory):
+        shutil.rmtree(tmp_directory)
+    os.makedirs(tmp_directory)
+    for name in ARRAY_NAMES:
+        np.save(os.path.join(tmp_directory, f"{name}.npy"), arrays[name])
+    with open(os.path.join(tmp_directory, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    old_directory = f"{directory}.old-{os.getpid()}"
+    if os.path.exists(directory):
+        os.rename(directory, old_directory)
+    os.rename(tmp_directory, directory)
+    if os.path.exists(old_directory):
+        shutil.rmtree(old_directory)
+
+    return manifest
+
+
+class FlatForest:
+    """
+    Forest evaluator over flat node arrays.
+
+    Implements ``predict_proba`` with the same arithmetic as scikit-learn
+    (inputs cast to float32 and compared against float64 thresholds, per-tree
+    normalized leaf distributions summed in tree order), so it can stand in
+    for the unpickled estimator. A single row is traversed across all trees at
+    once, one gather per tree level; for many rows only the (row, tree) pairs
+    that have not reached a leaf yet are advanced at each level.
+    """
+
+    def __init__(self, arrays, manifest):
+        self.manifest = manifest
+        # Plain ndarray views: indexing np.memmap subclasses is noticeably slower
+        for name in ARRAY_NAMES:
+            setattr(self, name, np.asarray(arrays[name]))
+
+        self.n_features_in_ = manifest['n_features']
+        self.n_trees = len(self.roots)
+        self.max_depth = manifest['max_depth']
+        # Leaves are their own children
+        self.is_leaf = self.children[0::2] == np.arange(len(self.feature))
+        self.classes_ = np.array([0, 1])
+        mean, scale = manifest['scaler_mean'], manifest['scaler_scale']
+        self.scaler_mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scaler_scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+
+    @classmethod
+    def from_model_data(cls, model_data):
+        """Flatten the forest of a saved model dict in memory"""
+        forest, scaler = _split_pipeline(model_data)
+        arrays, max_depth = _flatten_forest(forest)
+        return cls(arrays, _build_manifest(model_data, forest, scaler, max_depth))
+
+    def _prepare(self, X):
+        """Apply the folded scaler and round to float32 like sklearn's tree input validation"""
+        if self.scaler_mean is not None:
+            X = X - self.scaler_mean
+        if self.scaler_scale is not None:
+            X = X / self.scaler_scale
+        return X.astype(np.float32).astype(np.float64)
+
+    def _leaf_indices_one(self, x):
+        """Absolute leaf node index in every tree for a single 1-D feature vector"""
+        x = self._prepare(np.asarray(x, dtype=np.float64))
+        feature, threshold, children = self.feature, self.threshold, self.children
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            nodes = children[2 * nodes + (x[feature[nodes]] > threshold[nodes])]
+        return nodes
+
+    def predict_positive_one(self, x):
+        """Probability of the positive class for a single 1-D feature vector"""
+        # cumsum adds strictly in tree order, matching sklearn's accumulation
+        return np.cumsum(self.leaf_proba[self._leaf_indices_one(x)])[-1] / self.n_trees
+
+    def _leaf_indices(self, X):
+        """Absolute leaf node index for every (row, tree) pair"""
+        n_rows = X.shape[0]
+        flat_X = self._prepare(X).ravel()
+        row_offsets = np.repeat(np.arange(n_rows) * X.shape[1], self.n_trees)
+
+        feature, threshold, children, is_leaf = self.feature, self.threshold, self.children, self.is_leaf
+        nodes = np.tile(self.roots, n_rows)
+        # Most leaves sit well above max_depth, so the pairs still descending shrink quickly
+        active = np.flatnonzero(~is_leaf[nodes])
+        for _ in range(self.max_depth):
+            if not active.size:
+                break
+            current = nodes[active]
+            current = children[2 * current + (flat_X[row_offsets[active] + feature[current]] > threshold[current])]
+            nodes[active] = current
+            active = active[~is_leaf[current]]
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[0] == 1:
+            leaves = self._leaf_indices_one(X[0]).reshape(1, -1)
+        else:
+            leaves = self._leaf_indices(X)
+        negative = np.cumsum(self.leaf_negative[leaves], axis=1)[:, -1] / self.n_trees
+        positive = np.cumsum(self.leaf_proba[leaves], axis=1)[:, -1] / self.n_trees
+        return np.column_stack([negative, positive])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+class MemoryMappedForest(FlatForest):
+    """FlatForest over the memory-mapped arrays of an exported artifact directory"""
+
+    def __init__(self, directory, mmap_mode='r'):
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != MMAP_FORMAT_VERSION:
+            raise ValueError(f"Unsupported mmap artifact version in {directory}")
+
+        self.directory = directory
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        super().__init__(arrays, manifest)
+
+
+def verification_sample(flat_forest, n_rows=256, seed=0):
+    """
+    Random model inputs spread around the training distribution, plus rows
+    placed on split thresholds to exercise the ``<=`` boundary (exactly on
+    them when no scaler is folded into the forest)
+    """
+    rng = np.random.RandomState(seed)
+    Z = rng.normal(scale=1.5, size=(n_rows, flat_forest.n_features_in_))
+
+    split_nodes = np.flatnonzero(flat_forest.children[0::2] != np.arange(len(flat_forest.feature)))
+    if len(split_nodes):
+        picked = rng.choice(split_nodes, size=min(n_rows, len(split_nodes)), replace=False)
+        Z[np.arange(len(picked)), flat_forest.feature[picked]] = flat_forest.threshold[picked]
+
+    # Thresholds live in scaled space; map back through a folded scaler
+    if flat_forest.scaler_scale is not None:
+        Z = Z * flat_forest.scaler_scale
+    if flat_forest.scaler_mean is not None:
+        Z = Z + flat_forest.scaler_mean
+    return Z
+
+
+def verify_flat_forest(flat_forest, estimator, X=None):
+    """True when the flat evaluator reproduces ``estimator.predict_proba`` exactly, row by row and in batch"""
+    X = verification_sample(flat_forest) if X is None else np.asarray(X, dtype=np.float64)
+    expected = estimator.predict_proba(X)[:, 1]
+    batch = flat_forest.predict_proba(X)[:, 1]
+    single = np.array([flat_forest.predict_positive_one(row) for row in X])
+    return bool(np.array_equal(expected, batch) and np.array_equal(expected, single))
+
+
+def load_mmap_artifact(directory):
+    """
+    Load a memory-mapped export as a model dict compatible with joblib artifacts
+    (scaling is folded into the forest evaluator)
+    """
+    forest = MemoryMappedForest(directory)
+    manifest = forest.manifest
+
+    label_encoders = {}
+    if manifest['label_encoders']:
+        from sklearn.preprocessing import LabelEncoder
+
+        for name, classes in manifest['label_encoders'].items():
+            encoder = LabelEncoder()
+            encoder.classes_ = np.asarray(classes, dtype=object)
+            label_encoders[name] = encoder
+
+    return {
+        'model': forest,
+        'scaler': None,
+        'label_encoders': label_encoders,
+        'best_model_name': manifest['best_model_name'] or manifest['model_type'].replace('Classifier', ''),
+        'feature_names': manifest['feature_names'],
+        'feature_pipeline': manifest.get('feature_pipeline'),
+        'source_sha256': manifest.get('source_sha256'),
+    }
@@ -0,0 +1,250 @@
+"""
+Compression of a trained model within an AUC budget.
+
+After training, the winning model can be replaced by a smaller one. The
+following candidates are derived from it:
+
+* tree pruning: the forest (or boosting sequence) cut to its first k trees
+  (forest trees are i.i.d. draws, so any prefix is an unbiased subsample)
+* depth limits: the forest refitted with a ``max_depth`` and then cut to
+  fewer trees as above
+* distillation: a small, shallow forest fitted to the original model's
+  predictions on the training rows plus jittered copies of them
+
+Candidates are chosen on a validation slice of the training split: the
+model is refitted on the rest of it (the reference) and candidates are
+derived from the reference. Only candidates whose validation AUC is at most
+``max_auc_loss`` below the reference's are eligible, and the smallest of
+those (by pickled size) is chosen. Its recipe is then applied to the model
+itself, and both are measured on the untouched hold-out split, which plays
+no part in the choice. The report records size, node count and latency of
+every candidate against the reference, and the hold-out comparison.
+
+Thresholds and leaf values keep scikit-learn's float64 layout. FlatForest
+and the memory-mapped export reproduce scikit-learn bit for bit, so
+narrowing them would break that verification. The savings come from
+fewer and smaller trees instead.
+"""
+
+import copy
+import pickle
+import time
+
+import numpy as np
+
+DEFAULT_TREE_COUNTS = (50, 25, 10)
+DEFAULT_MAX_DEPTHS = (12, 8)
+
+# Student forest for distillation and how the transfer set is built
+DISTILLED_TREES = 20
+DISTILLED_MAX_DEPTH = 10
+DISTILLATION_COPIES = 4
+DISTILLATION_NOISE = 0.1  # standard deviations of the scaled features
+
+# Rows scored one at a time when measuring single-row latency
+LATENCY_ROWS = 50
+
+
+def model_nbytes(model):
+    """Pickled size of an estimator, a proxy for artifact size and resident memory"""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _trees(model):
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None:
+        return []
+    return [tree for tree in np.ravel(estimators) if hasattr(tree, 'tree_')]
+
+
+def node_count(model):
+    """Total decision nodes of a tree ensemble (None for other models)"""
+    trees = _trees(model)
+    return sum(tree.tree_.node_count for tree in trees) if trees else None
+
+
+def measure_latency(model, X):
+    """Batch throughput (rows/sec) over ``X`` and median single-row latency (ms)"""
+    started = time.perf_counter()
+    model.predict_proba(X)
+    batch_seconds = time.perf_counter() - started
+
+    latencies = []
+    for row in X[:LATENCY_ROWS]:
+        started = time.perf_counter()
+        model.predict_proba(row.reshape(1, -1))
+        latencies.append(time.perf_counter() - started)
+    return {
+        'batch_rows_per_sec': round(len(X) / batch_seconds) if batch_seconds else None,
+        'single_row_ms': round(float(np.median(latencies)) * 1000, 4),
+    }
+
+
+def truncate_ensemble(model, n_trees):
+    """Copy of a fitted forest or gradient boosting model keeping only its first ``n_trees`` trees"""
+    truncated = copy.copy(model)
+    truncated.estimators_ = model.estimators_[:n_trees]
+    truncated.n_estimators = n_trees
+    if hasattr(model, 'n_estimators_'):
+        truncated.n_estimators_ = n_trees
+    if hasattr(model, 'train_score_'):
+        truncated.train_score_ = model.train_score_[:n_trees]
+    return truncated
+
+
+def distill_forest(teacher, X_train, n_trees=DISTILLED_TREES, max_depth=DISTILLED_MAX_DEPTH,
+                   copies=DISTILLATION_COPIES, noise=DISTILLATION_NOISE, random_state=42):
+    """
+    A small forest fitted to ``teacher``'s labels on the training rows and
+    ``copies`` jittered copies of them, so the student learns the teacher's
+    decision surface rather than the noise in the original labels
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.RandomState(random_state)
+    X_transfer = np.vstack([X_train] + [
+        X_train + rng.normal(0, noise, X_train.shape) for _ in range(copies)
+    ])
+    y_transfer = teacher.predict(X_transfer)
+    if len(np.unique(y_transfer)) < 2:
+        return None
+    return RandomForestClassifier(
+        n_estimators=n_trees, max_depth=max_depth, random_state=random_state
+    ).fit(X_transfer, y_transfer)
+
+
+def is_compressible(model):
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+    return isinstance(model, (RandomForestClassifier, GradientBoostingClassifier))
+
+
+def _refit_with_depth(model, X_train, y_train, depth):
+    from sklearn.base import clone
+
+    return clone(model).set_params(max_depth=depth, n_jobs=None).fit(X_train, y_train)
+
+
+def generate_candidates(model, X_train, y_train, tree_counts=DEFAULT_TREE_COUNTS, max_depths=DEFAULT_MAX_DEPTHS,
+                        progress=None):
+    """
+    Yield (description, recipe, compressed model) triples derived from a
+    fitted ``model``; ``build_candidate`` applies a recipe to another model
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    if not is_compressible(model):
+        return
+
+    n_trees = model.n_estimators
+    counts = [count for count in tree_counts if count < n_trees]
+    for count in counts:
+        yield f"{count} trees", {'n_trees': count}, truncate_ensemble(model, count)
+
+    if not isinstance(model, RandomForestClassifier):
+        return
+
+    for depth in max_depths:
+        if model.max_depth is not None and model.max_depth <= depth:
+            continue
+        if progress is not None:
+            progress(f"Refitting with max_depth={depth}")
+        refitted = _refit_with_depth(model, X_train, y_train, depth)
+        yield f"max_depth={depth}, {n_trees} trees", {'max_depth': depth}, refitted
+        for count in counts:
+            yield (f"max_depth={depth}, {count} trees", {'max_depth': depth, 'n_trees': count},
+                   truncate_ensemble(refitted, count))
+
+    if progress is not None:
+        progress("Distilling")
+    student = distill_forest(model, X_train)
+    if student is not None:
+        yield f"distilled ({DISTILLED_TREES} trees, max_depth={DISTILLED_MAX_DEPTH})", {'distilled': True}, student
+
+
+def build_candidate(model, X_train, y_train, recipe):
+    """Apply a ``generate_candidates`` recipe to a fitted ``model`` trained on ``X_train``"""
+    if recipe.get('distilled'):
+        return distill_forest(model, X_train)
+    if recipe.get('max_depth') is not None:
+        model = _refit_with_depth(model, X_train, y_train, recipe['max_depth'])
+    if recipe.get('n_trees') is not None:
+        model = truncate_ensemble(model, recipe['n_trees'])
+    return model
+
+
+def _profile(model, X_test, y_test):
+    from .ml_utils import evaluate_classifier
+
+    return {
+        'metrics': {name: float(value) for name, value in evaluate_classifier(model, X_test, y_test).items()},
+        'bytes': model_nbytes(model),
+        'nodes': node_count(model),
+        **measure_latency(model, X_test),
+    }
+
+
+def compress_model(model, X_train, y_train, X_test, y_test, max_auc_loss, progress=None, validation_size=0.2,
+                   **options):
+    """
+    Pick the smallest candidate within ``max_auc_loss`` of the reference's
+    validation AUC (see the module docstring) and apply it to ``model``.
+    Returns (chosen model, report); the chosen model is ``model`` itself
+    when no candidate qualifies. ``report['original']`` and
+    ``report['selected_holdout']`` are measured on ``X_test``/``y_test``.
+    """
+    from sklearn.base import clone
+    from sklearn.model_selection import train_test_split
+
+    report = {
+        'max_auc_loss': max_auc_loss,
+        'original': _profile(model, X_test, y_test),
+        'reference': None,
+        'candidates': [],
+        'selected': None,
+    }
+    if not is_compressible(model):
+        return model, report
+
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=validation_size, random_state=42, stratify=y_train
+    )
+    if progress is not None:
+        progress("Fitting the reference model for compression")
+    reference = clone(model)
+    if 'n_jobs' in reference.get_params():
+        reference.set_params(n_jobs=None)
+    reference.fit(X_fit, y_fit)
+    report['reference'] = _profile(reference, X_val, y_val)
+    min_auc = report['reference']['metrics']['auc_score'] - max_auc_loss
+
+    best = None
+    for description, recipe, candidate in generate_candidates(reference, X_fit, y_fit, progress=progress, **options):
+        profile = dict(_profile(candidate, X_val, y_val), description=description)
+        profile['accepted'] = (
+            profile['metrics']['auc_score'] >= min_auc and profile['bytes'] < report['reference']['bytes']
+        )
+        report['candidates'].append(profile)
+        if profile['accepted'] and (best is None or profile['bytes'] < best[0]['bytes']):
+            best = (profile, recipe)
+    if best is None:
+        return model, report
+
+    selected, recipe = best
+    if progress is not None:
+        progress(f"Compressing to {selected['description']}")
+    chosen = build_candidate(model, X_train, y_train, recipe)
+    if chosen is None:
+        return model, report
+
+    original = report['original']
+    holdout = _profile(chosen, X_test, y_test)
+    report['selected'] = selected['description']
+    report['selected_holdout'] = holdout
+    report['size_reduction'] = round(original['bytes'] / holdout['bytes'], 2)
+    report['auc_loss'] = round(original['metrics']['auc_score'] - holdout['metrics']['auc_score'], 6)
+    if original['single_row_ms'] and holdout['single_row_ms']:
+        report['single_row_speedup'] = round(original['single_row_ms'] / holdout['single_row_ms'], 2)
+    if original['batch_rows_per_sec'] and holdout['batch_rows_per_sec']:
+        report['batch_speedup'] = round(holdout['batch_rows_per_sec'] / original['batch_rows_per_sec'], 2)
+    return chosen, report
@@ -0,0 +1,320 @@
+"""
+Process-wide registry for the trained turnover model.
+
+Every gunicorn worker keeps one deserialized copy of the artifact referenced
+by the active MLModel row (or the default ml_models/turnover_model_v1.joblib
+when no row is active). The artifact is loaded once, kept resident, and
+swapped atomically when the active model changes.
+
+Tree forests are scored through a FlatForest (see model_artifacts), which is
+verified bit for bit against scikit-learn when it is built from a joblib
+dump. When a memory-mappable export exists next to the joblib file it is
+preferred, so workers share the forest arrays through the page cache. With
+ML_MODEL_PRELOAD the model is loaded in the gunicorn master (``--preload``,
+set on the Procfile web line) before workers fork.
+
+Up to ML_MODEL_WARM_VERSIONS other versions stay loaded next to the active
+one: the model that was replaced last and, after ``warmup()`` at startup,
+the previous version in the model store. Rolling back to one of them swaps
+a reference instead of deserializing the artifact.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError
+
+from . import model_store
+from .feature_pipeline import FeaturePipeline
+from .feature_store import uses_activity_features
+from .ml_utils import BASE_FEATURE_NAMES, get_model_save_path
+from .model_artifacts import (
+    MANIFEST_NAME, FlatForest, file_sha256, get_mmap_artifact_path, load_mmap_artifact, verify_flat_forest
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = 'turnover_model_v1'
+
+# Above this many rows scikit-learn's compiled traversal beats the NumPy evaluator
+FLAT_FOREST_MAX_ROWS = 1000
+
+class LoadedModel:
+    """A trained model artifact held in memory and ready for scoring"""
+
+    def __init__(self, artifact, file_path, version, ml_model_id=None):
+        self.estimator = artifact['model']
+        self.file_path = file_path
+        self.version = version
+        self.ml_model_id = ml_model_id
+        self.feature_names = list(artifact.get('feature_names') or BASE_FEATURE_NAMES)
+
+        if hasattr(self.estimator, 'steps'):
+            final_estimator = self.estimator.steps[-1][1]
+        else:
+            final_estimator = self.estimator
+        self.model_name = artifact.get('best_model_name') or type(final_estimator).__name__.replace('Classifier', '')
+
+        if artifact.get('feature_pipeline'):
+            self.feature_pipeline = FeaturePipeline.from_dict(artifact['feature_pipeline'])
+        else:
+            # Pipelines carry their own scaler; only bare estimators need the stored one
+            scaler = None if hasattr(self.estimator, 'steps') else artifact.get('scaler')
+            self.feature_pipeline = FeaturePipeline.from_feature_names(
+                self.feature_names, artifact.get('label_encoders'), scaler
+            )
+        # Activity features come from the feature store, not the performance row
+        self.uses_activity_features = uses_activity_features(self.feature_pipeline)
+
+        self.flat_forest = self._build_flat_forest(artifact)
+
+    def _build_flat_forest(self, artifact):
+        """Flat evaluator for tree forests; None for other estimators or if it disagrees with sklearn"""
+        if isinstance(self.estimator, FlatForest):
+            return self.estimator
+        if not getattr(settings, 'ML_FLAT_EVALUATOR', True):
+            return None
+        try:
+            flat_forest = FlatForest.from_model_data(artifact)
+        except ValueError:
+            return None
+        if not verify_flat_forest(flat_forest, self.estimator):
+            logger.warning("Flat forest evaluator does not match %s, using scikit-learn", self.model_name)
+            return None
+        return flat_forest
+
+    def build_feature_matrix(self, columns):
+        """Model input matrix from columnar data (source name -> sequence)"""
+        return self.feature_pipeline.transform_columns(columns)
+
+    def build_feature_row(self, record):
+        """Model input vector for one employee dict (base features, salary, department)"""
+        return self.feature_pipeline.transform_record(record)
+
+    def predict_proba(self, X):
+        """Return the probability of leaving for each row of a model input matrix"""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.flat_forest is not None and (
+            self.flat_forest is self.estimator or X.shape[0] <= FLAT_FOREST_MAX_ROWS
+        ):
+            return self.flat_forest.predict_proba(X)[:, 1]
+        return self.estimator.predict_proba(X)[:, 1]
+
+    def predict_one(self, features, salary=None, department=None):
+        """Score a single employee"""
+        row = self.build_feature_row(dict(features, salary=salary, department=department))
+        if self.flat_forest is not None:
+            return float(self.flat_forest.predict_positive_one(row))
+        return float(self.predict_proba(row)[0])
+
+
+class ModelRegistry:
+    """
+    Holds the currently active model for this process.
+
+    Readers always get a fully loaded LoadedModel (or None); a refresh builds
+    the replacement first and then swaps a single reference, so requests never
+    observe a half-loaded model. Replaced models are kept warm (see the module
+    docstring) and reused when they become active again. The active MLModel
+    row is re-checked at most once per ``ML_MODEL_REGISTRY_CHECK_INTERVAL``
+    seconds, or immediately after ``invalidate()`` (called from the MLModel signals).
+    """
+
+    def __init__(self, check_interval=None):
+        self._check_interval = check_interval
+        self._current = None
+        self._current_signature = None
+        self._signature = None
+        self._warm = {}
+        self._last_check = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+
+    @property
+    def check_interval(self):
+        if self._check_interval is not None:
+            return self._check_interval
+        return getattr(settings, 'ML_MODEL_REGISTRY_CHECK_INTERVAL', 30)
+
+    def get(self):
+        """Return the active LoadedModel, refreshing it if needed"""
+        if self._stale or time.monotonic() - self._last_check >= self.check_interval:
+            self._refresh()
+        return self._current
+
+    def invalidate(self):
+        """Force a re-check of the active model on the next get()"""
+        self._stale = True
+
+    def clear(self):
+        """Drop the resident model (mainly for tests and shell use)"""
+        with self._lock:
+            self._current = None
+            self._current_signature = None
+            self._signature = None
+            self._warm = {}
+            self._stale = True
+
+    def _resolve_active(self):
+        """Return (signature, file_path, version, ml_model_id) for the model that should be served"""
+        from .models import MLModel
+
+        active = MLModel.objects.filter(is_active=True).values('id', 'model_file_path').first()
+        if active and active['model_file_path']:
+            file_path = active['model_file_path']
+            if not os.path.isabs(file_path):
+                file_path = os.path.join(settings.BASE_DIR, file_path)
+            ml_model_id = active['id']
+        else:
+            file_path = get_model_save_path(DEFAULT_MODEL_NAME)
+            ml_model_id = None
+
+        signature, version = self._signature_for(ml_model_id, file_path)
+        return signature, file_path, version, ml_model_id
+
+    def _signature_for(self, ml_model_id, file_path):
+        """(signature, version) identifying the artifact at ``file_path`` as it is on disk now"""
+        mtime = os.path.getmtime(file_path) if os.path.exists(file_path) else None
+        manifest_path = os.path.join(get_mmap_artifact_path(file_path), MANIFEST_NAME)
+        mmap_mtime = os.path.getmtime(manifest_path) if os.path.exists(manifest_path) else None
+        version = f"{ml_model_id or 'default'}:{int(mtime or 0)}"
+        return (ml_model_id, file_path, mtime, mmap_mtime), version
+
+    def _load_artifact(self, file_path, signature):
+        """Load the mmap export when it is enabled and was exported from this joblib dump"""
+        if getattr(settings, 'ML_MODEL_MMAP', True) and signature[3] is not None:
+            mmap_path = get_mmap_artifact_path(file_path)
+            try:
+                artifact = load_mmap_artifact(mmap_path)
+                if artifact['source_sha256'] in (None, file_sha256(file_path)):
+                    return artifact, mmap_path
+                logger.warning("Ignoring stale memory-mapped artifact %s", mmap_path)
+            except Exception:
+                logger.exception("Failed to open memory-mapped artifact %s, using joblib", mmap_path)
+
+        import joblib
+
+        return joblib.load(file_path), file_path
+
+    def _load(self, signature, file_path, version, ml_model_id):
+        """LoadedModel for an artifact, or None (logged) if it is missing or broken"""
+        if signature[2] is None:
+            logger.warning("ML model artifact not found: %s", file_path)
+            return None
+        try:
+            artifact, source_path = self._load_artifact(file_path, signature)
+            return LoadedModel(artifact, source_path, version, ml_model_id=ml_model_id)
+        except Exception:
+            logger.exception("Failed to load ML model artifact %s", file_path)
+            return None
+
+    def _keep_warm(self, signature, loaded):
+        limit = getattr(settings, 'ML_MODEL_WARM_VERSIONS', 1)
+        if limit <= 0:
+            return
+        self._warm.pop(signature, None)
+        self._warm[signature] = loaded
+        while len(self._warm) > limit:
+            # Dicts keep insertion order: drop the model that went cold first
+            self._warm.pop(next(iter(self._warm)))
+
+    def _warm_previous_version(self, ml_model_id):
+        """Pre-load the rollback target of the active MLModel while there is room for it"""
+        if ml_model_id is None or len(self._warm) >= getattr(settings, 'ML_MODEL_WARM_VERSIONS', 1):
+            return
+        from .models import MLModel
+
+        try:
+            ml_model = MLModel.objects.filter(pk=ml_model_id).first()
+            previous = model_store.previous_version(ml_model) if ml_model else None
+        except DatabaseError as e:
+            logger.warning("Could not resolve previous ML model version: %s", e)
+            return
+        if previous is None:
+            return
+
+        file_path = previous.file_path
+        if not os.path.isabs(file_path):
+            file_path = os.path.join(settings.BASE_DIR, file_path)
+        signature, version = self._signature_for(ml_model_id, file_path)
+        if signature in self._warm:
+            return
+        loaded = self._load(signature, file_path, version, ml_model_id)
+        if loaded is not None:
+            self._keep_warm(signature, loaded)
+            logger.info("Pre-warmed previous ML model version %s (%s)", previous.sha256[:12], version)
+
+    def _refresh(self):
+        # Only one thread reloads; others keep serving the current model meanwhile
+        if not self._lock.acquire(blocking=self._current is None):
+            return
+        try:
+            if not self._stale and time.monotonic() - self._last_check < self.check_interval:
+                return
+            self._stale = False
+            self._last_check = time.monotonic()
+
+            try:
+                signature, file_path, version, ml_model_id = self._resolve_active()
+            except DatabaseError as e:
+                logger.warning("Could not resolve active ML model: %s", e)
+                return
+
+            if signature == self._signature:
+                return
+
+            # Remember the signature even on failure so a broken file is not reloaded every
+            # request; the previous model (if any) keeps serving until a good artifact appears
+            self._signature = signature
+            loaded = self._warm.pop(signature, None)
+            if loaded is not None:
+                logger.info("Switched to pre-warmed ML model %s (%s)", loaded.model_name, version)
+            else:
+                loaded = self._load(signature, file_path, version, ml_model_id)
+                if loaded is None:
+                    return
+                logger.info("Loaded ML model %s (%s) from %s", loaded.model_name, version, loaded.file_path)
+
+            if self._current is not None:
+                self._keep_warm(self._current_signature, self._current)
+            self._current = loaded
+            self._current_signature = signature
+        finally:
+            self._lock.release()
+
+    def warmup(self):
+        """
+        Load the active model, and its rollback target, now rather than on
+        the first request (which would otherwise pay for both).
+
+        Meant to run in the gunicorn master with ``--preload``: the database
+        connection used to resolve the model is closed so forked workers do
+        not share it, and surviving objects are moved out of the garbage
+        collector's reach so the workers' copy-on-write pages stay shared.
+        """
+        import gc
+        from django.db import connections
+
+        self.invalidate()
+        loaded = self.get()
+        if loaded is not None:
+            with self._lock:
+                self._warm_previous_version(loaded.ml_model_id)
+        connections.close_all()
+        gc.collect()
+        gc.freeze()
+        return loaded
+
+
+model_registry = ModelRegistry()
+
+
+def get_active_model():
+    """Shortcut used by views: the resident model for this worker, or None"""
+    return model_registry.get()
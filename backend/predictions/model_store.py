@@ -0,0 +1,209 @@
+"""
+Content-addressed store for trained model artifacts.
+
+Artifacts are saved as ``ml_models/store/<sha256>.joblib`` (with their
+memory-mappable export as ``<sha256>.mmap``), so a retrain never overwrites
+the file an MLModel row or a running worker points at, and saving an
+identical model twice keeps one file (the hash is taken over the artifact's
+content, see ``content_sha256``). Every artifact an MLModel has been trained
+to is recorded as a ModelVersion; the newest ``ML_MODEL_STORE_KEEP``
+versions per model are kept (plus whichever one is currently in use) and
+files no longer referenced by any version or MLModel row are deleted.
+
+Rolling back points the MLModel at an earlier version. ModelRegistry keeps
+the previous version loaded, so the switch does not wait for deserialization.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .ml_utils import get_model_save_path
+from .model_artifacts import file_sha256, get_mmap_artifact_path
+
+logger = logging.getLogger(__name__)
+
+STORE_DIRNAME = 'store'
+
+# MLModel fields snapshotted on each version and restored on rollback
+VERSION_METRICS = ['accuracy', 'precision', 'recall', 'f1_score', 'auc_score', 'training_data_size']
+
+
+def get_store_dir():
+    store_dir = os.path.join(os.path.dirname(get_model_save_path(STORE_DIRNAME)), STORE_DIRNAME)
+    os.makedirs(store_dir, exist_ok=True)
+    return store_dir
+
+
+def _absolute(file_path):
+    return file_path if os.path.isabs(file_path) else os.path.join(settings.BASE_DIR, file_path)
+
+
+def _relative(file_path):
+    return os.path.relpath(file_path, settings.BASE_DIR)
+
+
+class _DigestWriter:
+    def __init__(self, digest):
+        self.digest = digest
+
+    def write(self, data):
+        self.digest.update(data)
+
+
+class _ContentPickler(pickle.Pickler):
+    """Pickles structured arrays field by field, leaving out their (uninitialized) padding bytes"""
+
+    def reducer_override(self, obj):
+        if isinstance(obj, np.ndarray) and obj.dtype.names:
+            return list, ([obj.dtype.names] + [np.ascontiguousarray(obj[name]) for name in obj.dtype.names],)
+        return NotImplemented
+
+
+def content_sha256(file_path):
+    """
+    Hash of the unpickled artifact. The file bytes are not stable for equal
+    models: pickle's memo records which objects happen to be shared (numpy
+    dtypes differ after a training-cache round trip) and scikit-learn tree
+    node arrays carry padding bytes with arbitrary contents. A re-pickle
+    without the memo and without padding depends on the content only.
+    """
+    import joblib
+
+    digest = hashlib.sha256()
+    pickler = _ContentPickler(_DigestWriter(digest), protocol=4)
+    pickler.fast = True
+    try:
+        pickler.dump(joblib.load(file_path))
+    except (RecursionError, ValueError):
+        # Self-referencing objects cannot be pickled without the memo
+        return file_sha256(file_path)
+    return digest.hexdigest()
+
+
+def save_predictor(predictor):
+    """
+    Save a trained TurnoverPredictor into the store and return
+    (sha256, absolute path). An identical artifact already in the store is reused.
+    """
+    tmp_path = os.path.join(get_store_dir(), f"tmp-{os.getpid()}.joblib")
+    predictor.save_model(tmp_path)
+    return add_file(tmp_path)
+
+
+def add_file(tmp_path):
+    """Move a joblib file (and its mmap export, if any) to its content address"""
+    sha256 = content_sha256(tmp_path)
+    file_path = os.path.join(get_store_dir(), f"{sha256}.joblib")
+    tmp_mmap_path = get_mmap_artifact_path(tmp_path)
+
+    if os.path.exists(file_path):
+        os.remove(tmp_path)
+        if os.path.isdir(tmp_mmap_path):
+            shutil.rmtree(tmp_mmap_path)
+        return sha256, file_path
+
+    if os.path.isdir(tmp_mmap_path):
+        mmap_path = get_mmap_artifact_path(file_path)
+        if os.path.exists(mmap_path):
+            shutil.rmtree(mmap_path)
+        # The export records the joblib file's byte hash, which the move does not change
+        os.rename(tmp_mmap_path, mmap_path)
+    os.replace(tmp_path, file_path)
+    return sha256, file_path
+
+
+def record_version(ml_model, sha256, file_path):
+    """Record the artifact ``ml_model`` now points at; retraining to an identical artifact bumps it"""
+    from django.utils import timezone
+    from .models import ModelVersion
+
+    version, _ = ModelVersion.objects.update_or_create(
+        ml_model=ml_model,
+        sha256=sha256,
+        defaults={
+            'file_path': _relative(file_path),
+            'model_type': ml_model.model_type,
+            'metrics': {name: getattr(ml_model, name) for name in VERSION_METRICS},
+            'created_at': timezone.now(),
+        }
+    )
+    return version
+
+
+def current_version(ml_model):
+    """The ModelVersion ``ml_model`` currently points at (None for artifacts outside the store)"""
+    return ml_model.versions.filter(file_path=ml_model.model_file_path).first()
+
+
+def previous_version(ml_model):
+    """The newest version older than the one in use, i.e. the default rollback target"""
+    current = current_version(ml_model)
+    versions = ml_model.versions.all()
+    if current is not None:
+        versions = versions.filter(created_at__lt=current.created_at)
+    return versions.exclude(file_path=ml_model.model_file_path).first()
+
+
+def rollback(ml_model, version=None):
+    """
+    Point ``ml_model`` at ``version`` (default: the previous one), restoring
+    the metrics recorded with it. Returns the version now in use.
+    """
+    if version is None:
+        version = previous_version(ml_model)
+        if version is None:
+            raise ValueError(f"No earlier version of {ml_model.name} to roll back to")
+    if not os.path.exists(_absolute(version.file_path)):
+        raise ValueError(f"Artifact of version {version.sha256[:12]} is missing")
+
+    ml_model.model_file_path = version.file_path
+    ml_model.model_type = version.model_type
+    for name, value in version.metrics.items():
+        setattr(ml_model, name, value)
+    ml_model.save()
+    return version
+
+
+def find_version(ml_model, sha256_prefix):
+    """Version of ``ml_model`` whose hash starts with ``sha256_prefix`` (None if not exactly one)"""
+    matches = list(ml_model.versions.filter(sha256__startswith=sha256_prefix)[:2])
+    return matches[0] if len(matches) == 1 else None
+
+
+def prune(ml_model, keep=None):
+    """
+    Drop all but the newest ``keep`` versions of ``ml_model`` (never the one
+    in use) and delete store files nothing refers to any more. Returns the
+    number of versions removed.
+    """
+    from .models import MLModel, ModelVersion
+
+    keep = settings.ML_MODEL_STORE_KEEP if keep is None else keep
+    with transaction.atomic():
+        stale = list(
+            ml_model.versions.exclude(file_path=ml_model.model_file_path).order_by('-created_at')[max(keep - 1, 0):]
+        )
+        ModelVersion.objects.filter(pk__in=[version.pk for version in stale]).delete()
+
+    for version in stale:
+        if (ModelVersion.objects.filter(sha256=version.sha256).exists()
+                or MLModel.objects.filter(model_file_path=version.file_path).exists()):
+            continue
+        file_path = _absolute(version.file_path)
+        if os.path.dirname(file_path) != get_store_dir():
+            continue
+        # Workers that still have the file memory-mapped keep their mapping after the unlink
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        mmap_path = get_mmap_artifact_path(file_path)
+        if os.path.isdir(mmap_path):
+            shutil.rmtree(mmap_path)
+        logger.info("Removed model artifact %s", file_path)
+    return len(stale)
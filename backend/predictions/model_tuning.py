@@ -0,0 +1,265 @@
+"""
+Time-budgeted hyperparameter search with successive halving.
+
+Candidate configurations are sampled for every estimator family and scored
+with stratified cross-validation on a growing share of the training rows:
+each rung keeps the best ``1 / eta`` of the candidates and multiplies the
+number of rows by ``eta``, up to the full training folds. Fold indices and the
+per-rung training/validation matrices are built once and shared by all
+candidates of a rung.
+
+Each family's current (default) parameters take part as one more
+candidate; it is evaluated first on every rung and always promoted. Tuned
+parameters are only reported for a family when they score above the
+defaults on the last rung (the full training folds), so tuning never
+replaces a configuration with one it measured as worse. Rankings on the
+subsampled rungs favour configurations that suit small samples (shallow
+trees, say), so when the budget runs out before the last rung the defaults
+are kept.
+
+The search never starts a fit it does not expect to finish before the
+deadline (estimated from the fits already timed). The expected cost of the
+final fit on all rows that follows the search is held back from the budget,
+so search plus refit stays within ``time_budget``. When the budget runs out
+the search stops early.
+"""
+
+import math
+import time
+
+import numpy as np
+
+# Values sampled per estimator family (keys match TurnoverPredictor.models)
+SEARCH_SPACES = {
+    'RandomForest': {
+        'n_estimators': [100, 200, 300],
+        'max_depth': [None, 10, 20],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 0.5],
+    },
+    'GradientBoosting': {
+        'n_estimators': [100, 200],
+        'learning_rate': [0.05, 0.1, 0.2],
+        'max_depth': [2, 3, 4],
+        'subsample': [0.8, 1.0],
+    },
+    'LogisticRegression': {
+        'C': [0.01, 0.1, 1.0, 10.0],
+    },
+}
+
+
+class SuccessiveHalvingSearch:
+    """
+    Successive-halving search over several estimator families under a
+    wall-clock ``time_budget`` (seconds).
+
+    ``estimators`` maps a family name to an unfitted estimator; candidates
+    are clones with parameters drawn from ``search_spaces``. Candidates are
+    scored by weighted F1 on the validation folds, the same metric
+    TurnoverPredictor.train_models selects on. ``best_params_`` holds the
+    parameters to apply per family, empty when the defaults were not beaten.
+    ``callback``, if given, is
+    called with a stage description before each candidate is evaluated.
+    With a TrainingCache as ``cache`` a candidate's score on a rung is reused
+    when the same data, parameters and resource were evaluated before.
+    """
+
+    def __init__(self, estimators, search_spaces=None, time_budget=600, n_candidates=24,
+                 eta=3, cv=3, min_resource=500, n_jobs=None, random_state=42, callback=None, cache=None):
+        self.estimators = estimators
+        self.search_spaces = SEARCH_SPACES if search_spaces is None else search_spaces
+        self.time_budget = time_budget
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.cv = cv
+        self.min_resource = min_resource
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.callback = callback
+        self.cache = cache
+
+    def _sample_candidates(self):
+        from sklearn.model_selection import ParameterSampler
+
+        families = [name for name in self.estimators if self.search_spaces.get(name)]
+        per_family = max(1, self.n_candidates // max(1, len(families)))
+        # Defaults first, so they are scored on a rung before any tuned candidate
+        candidates = [
+            {'family': name, 'params': {}, 'default': True, 'rung': -1, 'score': None} for name in families
+        ]
+        for name in families:
+            space = self.search_spaces[name]
+            # ParameterSampler samples without replacement from small grids
+            grid_size = math.prod(len(values) for values in space.values())
+            for params in ParameterSampler(space, min(per_family, grid_size), random_state=self.random_state):
+                candidates.append({'family': name, 'params': params, 'default': False, 'rung': -1, 'score': None})
+        return candidates
+
+    def _build_rungs(self, X, y, candidate_count):
+        """Resource schedule and cached (X_train, y_train, X_val, y_val) per rung and fold"""
+        from sklearn.model_selection import StratifiedKFold
+
+        rng = np.random.RandomState(self.random_state)
+        folds = []
+        for train_index, val_index in StratifiedKFold(self.cv, shuffle=True, random_state=self.random_state).split(X, y):
+            # A fixed shuffle per fold makes every rung's rows a superset of the previous rung's
+            folds.append((rng.permutation(train_index), val_index))
+
+        full_resource = min(len(train_index) for train_index, _ in folds)
+        n_rungs = 1
+        while (n_rungs < 1 + math.log(max(candidate_count, 1), self.eta)
+               and full_resource / self.eta ** n_rungs >= self.min_resource):
+            n_rungs += 1
+
+        rungs = []
+        for level in range(n_rungs):
+            resource = int(full_resource / self.eta ** (n_rungs - 1 - level))
+            rungs.append({
+                'resource': resource,
+                'folds': [
+                    (X[train_index[:resource]], y[train_index[:resource]], X[val_index], y[val_index])
+                    for train_index, val_index in folds
+                ],
+            })
+        return rungs
+
+    def _estimate(self, timings, family, level):
+        """Expected seconds to evaluate one candidate at a rung, from fits timed so far"""
+        if (family, level) in timings:
+            return np.mean(timings[(family, level)])
+        for previous in range(level - 1, -1, -1):
+            if (family, previous) in timings:
+                return np.mean(timings[(family, previous)]) * self.eta ** (level - previous)
+        return 0.0
+
+    def _refit_reserve(self, timings, rungs, n_rows):
+        """
+        Expected seconds to refit every family on ``n_rows`` rows, scaled
+        linearly from the slowest fit timed on the highest rung it reached
+        """
+        reserve = 0.0
+        for family in self.estimators:
+            for level in range(len(rungs) - 1, -1, -1):
+                if (family, level) in timings:
+                    per_fit = max(timings[(family, level)]) / len(rungs[level]['folds'])
+                    reserve += per_fit * n_rows / rungs[level]['resource']
+                    break
+        return reserve
+
+    def fit(self, X, y):
+        from sklearn.base import clone
+        from sklearn.metrics import f1_score
+
+        started = time.monotonic()
+        deadline = started + self.time_budget
+        candidates = self._sample_candidates()
+        rungs = self._build_rungs(np.asarray(X), np.asarray(y), len(candidates))
+
+        timings = {}
+        history = []
+        n_fits = 0
+        n_cached = 0
+        fingerprint = None
+        if self.cache is not None:
+            from .training_cache import dataset_fingerprint
+            
+            fingerprint = dataset_fingerprint(np.asarray(X), np.asarray(y))
+        stopped_early = False
+        survivors = candidates
+
+        for level, rung in enumerate(rungs):
+            for candidate in survivors:
+                family = candidate['family']
+                cache_key = None
+                if self.cache is not None:
+                    from .training_cache import candidate_key
+                    
+                    cache_key = candidate_key(
+                        fingerprint, clone(self.estimators[family]).set_params(**candidate['params']),
+                        search={'resource': rung['resource'], 'cv': self.cv, 'random_state': self.random_state}
+                    )
+                    score = self.cache.get(cache_key)
+                    if score is not None:
+                        candidate['rung'] = level
+                        candidate['score'] = score
+                        n_cached += 1
+                        continue
+                
+                expected = self._estimate(timings, family, level) + self._refit_reserve(timings, rungs, len(X))
+                if time.monotonic() + expected > deadline:
+                    stopped_early = True
+                    break
+                if self.callback is not None:
+                    self.callback(f"Tuning {family} on {rung['resource']} rows ({n_fits} fits done)")
+
+                candidate_started = time.monotonic()
+                scores = []
+                for X_train, y_train, X_val, y_val in rung['folds']:
+                    model = clone(self.estimators[family]).set_params(**candidate['params'])
+                    if self.n_jobs and 'n_jobs' in model.get_params():
+                        model.set_params(n_jobs=self.n_jobs)
+                    model.fit(X_train, y_train)
+                    scores.append(f1_score(y_val, model.predict(X_val), average='weighted'))
+                    n_fits += 1
+
+                timings.setdefault((family, level), []).append(time.monotonic() - candidate_started)
+                candidate['rung'] = level
+                candidate['score'] = float(np.mean(scores))
+                if cache_key is not None:
+                    self.cache.set(cache_key, candidate['score'])
+
+            evaluated = sorted(
+                (candidate for candidate in survivors if candidate['rung'] == level),
+                key=lambda candidate: -candidate['score']
+            )
+            history.append({
+                'resource': rung['resource'],
+                'candidates': len(evaluated),
+                'best_score': evaluated[0]['score'] if evaluated else None,
+            })
+            if stopped_early or level == len(rungs) - 1 or not evaluated:
+                break
+            tuned = [candidate for candidate in evaluated if not candidate['default']]
+            defaults = [candidate for candidate in survivors if candidate['default'] and candidate['rung'] == level]
+            survivors = defaults + tuned[:max(1, math.ceil(len(tuned) / self.eta))]
+
+        # Per family: the defaults, unless a tuned candidate beat them on the last rung
+        self.best_params_ = {}
+        self.best_scores_ = {}
+        self.default_scores_ = {}
+        last_rung = len(rungs) - 1
+        for default in candidates:
+            if not default['default'] or default['score'] is None:
+                continue
+            family = default['family']
+            self.best_params_[family] = {}
+            self.best_scores_[family] = self.default_scores_[family] = default['score']
+            if default['rung'] != last_rung:
+                continue
+            for candidate in candidates:
+                if (candidate['family'] == family and not candidate['default'] and candidate['rung'] == last_rung
+                        and candidate['score'] > self.best_scores_[family]):
+                    self.best_params_[family] = candidate['params']
+                    self.best_scores_[family] = candidate['score']
+
+        self.history_ = history
+        self.n_fits_ = n_fits
+        self.n_cached_ = n_cached
+        self.stopped_early_ = stopped_early
+        self.elapsed_ = time.monotonic() - started
+        return self
+
+    def summary(self):
+        """JSON-serializable description of the finished search"""
+        return {
+            'time_budget': self.time_budget,
+            'elapsed': round(self.elapsed_, 2),
+            'stopped_early': self.stopped_early_,
+            'n_fits': self.n_fits_,
+            'n_cached': self.n_cached_,
+            'rungs': self.history_,
+            'best_params': self.best_params_,
+            'best_scores': self.best_scores_,
+            'default_scores': self.default_scores_,
+        }
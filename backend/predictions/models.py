@@ -399,3 +399,177 @@ class MLModel(models.Model):
     def __str__(self):
         status = "Active" if self.is_active else "Inactive"
         return f"{self.name} ({self.model_type}) - {status}"
+
+
+class ScoringRun(models.Model):
+    """A bulk re-scoring pass, used as the watermark for incremental scoring"""
+    
+    MODES = [
+        ('full', 'Full'),
+        ('incremental', 'Incremental'),
+    ]
+    
+    mode = models.CharField(max_length=20, choices=MODES)
+    model_version = models.CharField(
+        max_length=100,
+        help_text="Version of the model used (registry version, or 'rules' for the rule-based fallback)"
+    )
+    high_water_mark = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Latest EmployeePerformanceData.updated_at covered by this run"
+    )
+    employees_scored = models.IntegerField(default=0)
+    last_processed_pk = models.BigIntegerField(
+        default=0,
+        help_text="Primary key of the last EmployeePerformanceData row written (resume point)"
+    )
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = 'Scoring Run'
+        verbose_name_plural = 'Scoring Runs'
+    
+    def __str__(self):
+        return f"{self.get_mode_display()} scoring run ({self.model_version}) - {self.employees_scored} employees"
+
+class TrainingJob(models.Model):
+    """A model training run submitted from the API and executed by run_training_worker"""
+    
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    SOURCES = [
+        ('csv', 'Training CSV'),
+        ('database', 'Performance data table'),
+    ]
+    
+    status = models.CharField(max_length=20, choices=STATUSES, default='queued')
+    source = models.CharField(max_length=20, choices=SOURCES, default='database')
+    parameters = models.JSONField(
+        default=dict, blank=True,
+        help_text="model_name, activate, parallel, n_jobs, tune, time_budget, departments"
+    )
+    submitted_by = models.ForeignKey(
+        Employee,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='training_jobs'
+    )
+    
+    # Progress
+    stage = models.CharField(max_length=100, blank=True)
+    rows_processed = models.IntegerField(default=0)
+    cancel_requested = models.BooleanField(default=False)
+    
+    # Outcome
+    ml_model = models.ForeignKey(
+        MLModel,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='training_jobs'
+    )
+    results = models.JSONField(null=True, blank=True, help_text="Hold-out metrics of every candidate model")
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Training Job'
+        verbose_name_plural = 'Training Jobs'
+    
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed', 'cancelled')
+    
+    @property
+    def elapsed_seconds(self):
+        if self.started_at is None:
+            return None
+        return ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+    
+    def __str__(self):
+        return f"Training job {self.pk} ({self.get_source_display()}) - {self.get_status_display()}"
+
+class ModelVersion(models.Model):
+    """A stored artifact an MLModel has been trained to, kept for rollback (see model_store)"""
+    
+    ml_model = models.ForeignKey(
+        MLModel,
+        on_delete=models.CASCADE,
+        related_name='versions'
+    )
+    sha256 = models.CharField(max_length=64, db_index=True, help_text="Content hash of the joblib artifact")
+    file_path = models.CharField(max_length=500)
+    model_type = models.CharField(max_length=20, choices=MLModel.MODEL_TYPES)
+    metrics = models.JSONField(
+        default=dict, blank=True,
+        help_text="MLModel metrics at training time, restored on rollback"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['ml_model', 'sha256']
+        verbose_name = 'Model Version'
+        verbose_name_plural = 'Model Versions'
+    
+    def __str__(self):
+        return f"{self.ml_model.name} @ {self.sha256[:12]} ({self.model_type})"
+
+class EmployeeActivityFeatures(models.Model):
+    """
+    Running aggregates of an employee's performance-app activity (goals,
+    feedback, learning, one-on-ones, reviews), kept current by signals in
+    O(1) per write; see feature_store for the derived model features.
+    """
+    
+    employee = models.OneToOneField(
+        Employee,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='activity_features'
+    )
+    
+    # Goals (cancelled goals are not counted)
+    goals_total = models.IntegerField(default=0)
+    goals_completed = models.IntegerField(default=0)
+    goal_progress_sum = models.IntegerField(default=0)
+    
+    # Feedback received
+    feedback_count = models.IntegerField(default=0)
+    feedback_rating_sum = models.IntegerField(default=0)
+    feedback_rating_count = models.IntegerField(default=0)
+    
+    # Learning
+    learning_minutes = models.IntegerField(default=0)
+    learning_modules_started = models.IntegerField(default=0)
+    learning_modules_completed = models.IntegerField(default=0)
+    
+    # One-on-one meetings
+    meetings_completed = models.IntegerField(default=0)
+    meeting_rating_sum = models.IntegerField(default=0)
+    meeting_rating_count = models.IntegerField(default=0)
+    
+    # Performance reviews
+    review_rating_sum = models.FloatField(default=0)
+    review_rating_count = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Employee Activity Features'
+        verbose_name_plural = 'Employee Activity Features'
+    
+    def __str__(self):
+        return f"Activity features of {self.employee.full_name}"
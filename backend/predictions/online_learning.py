@@ -0,0 +1,237 @@
+"""
+Online turnover model updated incrementally with ``partial_fit``.
+
+An SGD logistic-regression classifier is kept alongside the batch model and
+learns from EmployeePerformanceData rows as they change (new performance
+data, or the ``left`` outcome flipping). Changed rows are consumed in
+micro-batches in ``(updated_at, pk)`` order after a watermark, so the table
+itself is the queue: nothing extra is written on save, and a row updated
+several times before the next batch is learned once, in its latest state.
+
+The learner uses the active batch model's feature layout (or the
+BASE_FEATURE_NAMES, salary ordinal and department one-hots when there is
+none), standardized with statistics of the table when the layout carries no
+scaling of its own (batch Pipelines scale inside the estimator), and is
+checkpointed to ``ml_models/turnover_online.joblib`` in the same artifact
+format as the batch model, together with its watermark. Activity features
+in the layout are read from the feature store for the employees of each
+micro-batch; a change that only touches activity (goals, reviews, ...) is
+learned with the employee's next performance-data change.
+
+The online model runs in shadow: it is never registered as an MLModel or
+served by the model registry. Each micro-batch is scored by both the online
+learner and the active batch model before the update, and both log losses
+are reported, so the two can be compared on the same fresh outcomes before
+anyone decides to register the checkpoint (it loads like any other
+artifact).
+"""
+
+import itertools
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Q
+from django.utils import timezone
+
+from .feature_pipeline import FeaturePipeline
+from .feature_store import activity_columns, uses_activity_features
+from .ml_utils import BASE_FEATURE_NAMES, fill_feature_defaults, get_model_save_path
+
+ONLINE_MODEL_NAME = 'turnover_online'
+
+# Rows younger than this are left for the next batch so late-committing transactions are not skipped
+SETTLE_SECONDS = 10
+
+ROW_FIELDS = list(BASE_FEATURE_NAMES) + [
+    'employee__salary', 'employee__department__name', 'employee_id', 'left', 'updated_at', 'pk'
+]
+
+
+def get_online_model_path():
+    return get_model_save_path(ONLINE_MODEL_NAME)
+
+
+class OnlineTurnoverModel:
+    """SGD classifier plus feature pipeline and consumption watermark"""
+
+    def __init__(self, feature_pipeline, estimator=None):
+        from sklearn.linear_model import SGDClassifier
+
+        self.feature_pipeline = feature_pipeline
+        # A constant step size keeps later updates as effective as early ones, so the model follows drift
+        self.estimator = estimator or SGDClassifier(
+            loss='log_loss', alpha=1e-4, learning_rate='constant', eta0=0.01, random_state=42
+        )
+        self.watermark = None  # (updated_at, pk) of the last row learned
+        self.n_samples_seen = 0
+        self.n_updates = 0
+
+    # ---- construction -------------------------------------------------
+
+    @classmethod
+    def create(cls, chunk_size=5000):
+        """New, untrained learner using the active batch model's feature layout"""
+        from .models import Department
+        from .model_registry import get_active_model
+
+        loaded_model = get_active_model()
+        if loaded_model is not None:
+            pipeline = FeaturePipeline.from_dict(loaded_model.feature_pipeline.to_dict())
+        else:
+            names = list(BASE_FEATURE_NAMES) + ['salary_ordinal']
+            names += [f"department_{name}" for name in Department.objects.order_by('name').values_list('name', flat=True)]
+            pipeline = FeaturePipeline.from_feature_names(names)
+
+        model = cls(pipeline)
+        if pipeline.mean is None or pipeline.scale is None:
+            model._fit_scaling(chunk_size)
+        return model
+
+    @classmethod
+    def load(cls, file_path=None):
+        import joblib
+
+        artifact = joblib.load(file_path or get_online_model_path())
+        model = cls(FeaturePipeline.from_dict(artifact['feature_pipeline']), estimator=artifact['model'])
+        state = artifact['online_state']
+        if state['watermark_updated_at']:
+            model.watermark = (state['watermark_updated_at'], state['watermark_pk'])
+        model.n_samples_seen = state['n_samples_seen']
+        model.n_updates = state['n_updates']
+        return model
+
+    def save(self, file_path=None):
+        """Checkpoint atomically, in the artifact format LoadedModel understands"""
+        import joblib
+
+        file_path = file_path or get_online_model_path()
+        tmp_path = f"{file_path}.tmp-{os.getpid()}"
+        joblib.dump({
+            'model': self.estimator,
+            'scaler': None,
+            'label_encoders': {},
+            'best_model_name': 'SGDOnline',
+            'feature_names': self.feature_pipeline.feature_names,
+            'feature_pipeline': self.feature_pipeline.to_dict(),
+            'online_state': {
+                'watermark_updated_at': self.watermark[0] if self.watermark else None,
+                'watermark_pk': self.watermark[1] if self.watermark else None,
+                'n_samples_seen': self.n_samples_seen,
+                'n_updates': self.n_updates,
+            },
+        }, tmp_path)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    # ---- learning -----------------------------------------------------
+
+    @staticmethod
+    def _columns(rows, activity_features=False):
+        """Columnar feature data and labels for values_list rows in ROW_FIELDS order"""
+        columns = list(zip(*rows))
+        n_base = len(BASE_FEATURE_NAMES)
+        X = fill_feature_defaults(np.array(columns[:n_base], dtype=float).T)
+        data = dict(zip(BASE_FEATURE_NAMES, X.T))
+        data.update(salary=columns[n_base], department=columns[n_base + 1])
+        if activity_features:
+            data.update(activity_columns(list(columns[n_base + 2])))
+        return data, np.array(columns[n_base + 3], dtype=int)
+
+    def _matrix(self, rows):
+        """Model inputs and labels for values_list rows in ROW_FIELDS order"""
+        data, y = self._columns(rows, uses_activity_features(self.feature_pipeline))
+        return self.feature_pipeline.transform_columns(data), y
+
+    def _fit_scaling(self, chunk_size):
+        """Standardize the features with the mean and standard deviation of the whole table (one pass)"""
+        from .models import EmployeePerformanceData
+
+        pipeline = self.feature_pipeline
+        pipeline.mean = pipeline.scale = None
+        total = np.zeros(pipeline.n_features)
+        total_squares = np.zeros(pipeline.n_features)
+        n_rows = 0
+        rows = EmployeePerformanceData.objects.order_by().values_list(*ROW_FIELDS).iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            X, _ = self._matrix(chunk)
+            total += X.sum(axis=0)
+            total_squares += (X ** 2).sum(axis=0)
+            n_rows += len(chunk)
+
+        if n_rows:
+            mean = total / n_rows
+            scale = np.sqrt(np.maximum(total_squares / n_rows - mean ** 2, 0))
+            scale[scale == 0] = 1.0
+            pipeline.mean, pipeline.scale = mean, scale
+
+    def pending(self):
+        """Changed performance rows after the watermark that are old enough to consume"""
+        from .models import EmployeePerformanceData
+
+        queryset = EmployeePerformanceData.objects.filter(
+            updated_at__lte=timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+        )
+        if self.watermark is not None:
+            updated_at, pk = self.watermark
+            queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk))
+        return queryset.order_by('updated_at', 'pk')
+
+    def update(self, rows, active_model=None):
+        """
+        Learn from one micro-batch. Returns the batch's log loss measured
+        before the update (prequential evaluation), the log loss of
+        ``active_model`` (a LoadedModel) on the same rows, and the update time.
+        """
+        from sklearn.metrics import log_loss
+
+        X, y = self._matrix(rows)
+        loss = active_loss = None
+        if len(np.unique(y)) > 1:
+            if self.n_updates:
+                loss = log_loss(y, self.estimator.predict_proba(X)[:, 1], labels=[0, 1])
+            if active_model is not None:
+                data, _ = self._columns(rows, active_model.uses_activity_features)
+                active_proba = active_model.predict_proba(active_model.build_feature_matrix(data))
+                active_loss = log_loss(y, active_proba, labels=[0, 1])
+
+        started = time.perf_counter()
+        self.estimator.partial_fit(X, y, classes=np.array([0, 1]))
+        elapsed = time.perf_counter() - started
+
+        last = rows[-1]
+        self.watermark = (last[-2], last[-1])
+        self.n_samples_seen += len(rows)
+        self.n_updates += 1
+        return loss, active_loss, elapsed
+
+    def consume(self, batch_size=256, max_batches=None, checkpoint_every=20, file_path=None, on_batch=None):
+        """
+        Apply pending changes in micro-batches, checkpointing every
+        ``checkpoint_every`` batches and at the end. ``on_batch`` is called
+        with the row count, both log losses and the time of every update.
+        Returns the number of rows learned.
+        """
+        from .model_registry import get_active_model
+
+        active_model = get_active_model()
+        learned = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            rows = list(self.pending().values_list(*ROW_FIELDS)[:batch_size])
+            if not rows:
+                break
+            loss, active_loss, elapsed = self.update(rows, active_model)
+            learned += len(rows)
+            batches += 1
+            if on_batch is not None:
+                on_batch(len(rows), loss, active_loss, elapsed)
+            if checkpoint_every and batches % checkpoint_every == 0:
+                self.save(file_path)
+        if batches:
+            self.save(file_path)
+        return learned
@@ -0,0 +1,70 @@
+"""
+Prediction result cache for predict_turnover.
+
+Two kinds of entries live in Django's cache:
+
+* result entries, keyed by the active model version plus a hash of the
+  employee's raw feature values (performance fields, salary, department,
+  and activity features when the model uses them),
+  hold the model output, risk analysis and recommendations. Employees with
+  identical inputs share them, and a new model version or any changed input
+  simply produces a different key.
+* employee entries remember the last TurnoverPrediction row written for an
+  employee and the fingerprint/version it was computed from, so a repeated
+  request can return that row instead of inserting a duplicate. They are
+  dropped when the employee's EmployeePerformanceData is saved or deleted.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .ml_utils import BASE_FEATURE_NAMES
+
+RESULT_KEY = 'turnover:prediction:result:{version}:{fingerprint}'
+EMPLOYEE_KEY = 'turnover:prediction:employee:{employee_id}'
+
+
+def get_cache_timeout():
+    return getattr(settings, 'ML_PREDICTION_CACHE_TIMEOUT', 3600)
+
+
+def feature_fingerprint(performance_data, salary=None, department=None, activity=None):
+    """Stable hash of everything that influences a prediction for one employee"""
+    payload = [getattr(performance_data, name) for name in BASE_FEATURE_NAMES]
+    payload += [salary, department]
+    if activity:
+        payload += [activity[name] for name in sorted(activity)]
+    encoded = json.dumps(payload, default=str, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode()).hexdigest()
+
+
+def get_result(model_version, fingerprint):
+    return cache.get(RESULT_KEY.format(version=model_version, fingerprint=fingerprint))
+
+
+def set_result(model_version, fingerprint, result):
+    cache.set(RESULT_KEY.format(version=model_version, fingerprint=fingerprint), result, get_cache_timeout())
+
+
+def get_employee_prediction(employee_id, model_version, fingerprint):
+    """Last stored prediction for this employee if it was made from the same inputs and model"""
+    entry = cache.get(EMPLOYEE_KEY.format(employee_id=employee_id))
+    if entry and entry['version'] == model_version and entry['fingerprint'] == fingerprint:
+        return entry
+    return None
+
+
+def set_employee_prediction(employee_id, model_version, fingerprint, prediction):
+    cache.set(EMPLOYEE_KEY.format(employee_id=employee_id), {
+        'version': model_version,
+        'fingerprint': fingerprint,
+        'prediction_id': prediction.id,
+        'created_at': prediction.created_at.isoformat(),
+    }, get_cache_timeout())
+
+
+def invalidate_employee(employee_id):
+    cache.delete(EMPLOYEE_KEY.format(employee_id=employee_id))
@@ -0,0 +1,159 @@
+"""
+What-if scenarios for one employee's turnover risk.
+
+A grid maps features to the values to try (e.g. ``{"promotion_last_5years":
+[0, 1], "average_monthly_hours": [160, 180, 200]}``). Every combination is
+the employee's current record with those overrides applied. The grid is
+expanded column by column with ``np.repeat``/``np.tile``, with no per-row
+dicts, and scored with a single ``predict_proba`` call. Row order is that of
+``itertools.product`` over the grid values (the first feature varies
+slowest). Nothing is written to the database.
+"""
+
+import numpy as np
+
+from .feature_store import ACTIVITY_FEATURE_NAMES, activity_record
+from .ml_utils import BASE_FEATURE_NAMES, FEATURE_DEFAULTS, calculate_rule_based_probabilities, get_risk_levels
+
+CATEGORICAL_FEATURES = ['salary', 'department']
+BOOLEAN_FEATURES = {'work_accident', 'promotion_last_5years'}
+
+# Allowed (min, max) of numeric overrides
+FEATURE_RANGES = {
+    'satisfaction_level': (0.0, 1.0),
+    'last_evaluation': (0.0, 1.0),
+    'number_project': (0, 50),
+    'average_monthly_hours': (0, 744),
+    'time_spend_company': (0, 60),
+    'work_accident': (0, 1),
+    'promotion_last_5years': (0, 1),
+}
+SALARY_LEVELS = ['low', 'medium', 'high']
+
+
+def scenario_features(loaded_model=None):
+    """Features a grid may override: the base features, salary, department and any activity features the model uses"""
+    features = list(BASE_FEATURE_NAMES) + CATEGORICAL_FEATURES
+    if loaded_model is not None and loaded_model.uses_activity_features:
+        features += ACTIVITY_FEATURE_NAMES
+    return features
+
+
+def employee_record(employee, performance_data, loaded_model=None):
+    """The employee's current inputs, with missing values defaulted as in predict_turnover"""
+    record = {
+        name: float(getattr(performance_data, name) or FEATURE_DEFAULTS[name]) for name in BASE_FEATURE_NAMES
+    }
+    record['salary'] = employee.salary
+    record['department'] = employee.department.name if employee.department_id else None
+    if loaded_model is not None and loaded_model.uses_activity_features:
+        record.update(activity_record(employee.id))
+    return record
+
+
+def _parse_value(name, value):
+    if name in CATEGORICAL_FEATURES:
+        if not isinstance(value, str) or not value:
+            raise ValueError("values must be non-empty strings")
+        if name == 'salary' and value not in SALARY_LEVELS:
+            raise ValueError(f"values must be one of: {', '.join(SALARY_LEVELS)}")
+        return value
+    if name in BOOLEAN_FEATURES and isinstance(value, str):
+        value = str(value).lower() in ('true', '1', 'yes')
+    if isinstance(value, bool):
+        value = int(value)
+    if not isinstance(value, (int, float)):
+        raise ValueError("values must be numbers")
+    low, high = FEATURE_RANGES.get(name, (0, float('inf')))
+    if not low <= value <= high:
+        raise ValueError(f"values must be between {low} and {high}")
+    return value
+
+
+def parse_grid(grid, allowed_features, max_combinations):
+    """
+    Validate a request grid. Returns (grid with parsed values, errors); the
+    grid keeps the request's key order, which decides the row order.
+    """
+    if not isinstance(grid, dict) or not grid:
+        return None, {'grid': ["Must be an object mapping features to lists of values"]}
+
+    parsed = {}
+    errors = {}
+    for name, values in grid.items():
+        if name not in allowed_features:
+            errors[name] = [f"Unknown feature; use one of: {', '.join(allowed_features)}"]
+            continue
+        if not isinstance(values, list) or not values:
+            errors[name] = ["Must be a non-empty list of values"]
+            continue
+        try:
+            parsed[name] = list(dict.fromkeys(_parse_value(name, value) for value in values))
+        except ValueError as e:
+            errors[name] = [str(e)]
+    if errors:
+        return None, errors
+
+    n_combinations = int(np.prod([len(values) for values in parsed.values()], dtype=np.float64))
+    if n_combinations > max_combinations:
+        return None, {'grid': [f"{n_combinations} combinations exceed the limit of {max_combinations}"]}
+    return parsed, {}
+
+
+def expand_grid(base_record, grid):
+    """
+    Columns (feature -> array of length n) for every combination of
+    ``grid`` applied to ``base_record``, and n
+    """
+    n_rows = 1
+    for values in grid.values():
+        n_rows *= len(values)
+
+    columns = {}
+    repeat = n_rows
+    for name, values in grid.items():
+        repeat //= len(values)
+        dtype = object if name in CATEGORICAL_FEATURES else np.float64
+        columns[name] = np.tile(np.repeat(np.asarray(values, dtype=dtype), repeat), n_rows // (len(values) * repeat))
+
+    for name, value in base_record.items():
+        if name not in columns:
+            if name in CATEGORICAL_FEATURES:
+                columns[name] = np.full(n_rows, value, dtype=object)
+            else:
+                columns[name] = np.full(n_rows, np.nan if value is None else value, dtype=np.float64)
+    return columns, n_rows
+
+
+def score_scenarios(loaded_model, base_record, grid):
+    """
+    Score every combination of ``grid`` in one batch. Returns a dict with the
+    expanded ``columns``, ``probabilities`` and ``risk_levels``; without a
+    loaded model the rule-based probabilities are used.
+    """
+    columns, _ = expand_grid(base_record, grid)
+    probabilities = score_columns(loaded_model, columns)
+    return {
+        'columns': columns,
+        'probabilities': probabilities,
+        'risk_levels': get_risk_levels(probabilities),
+    }
+
+
+def score_columns(loaded_model, columns):
+    """Probabilities for columnar model input (feature -> array), rule-based without a loaded model"""
+    if loaded_model is not None:
+        return loaded_model.predict_proba(loaded_model.build_feature_matrix(columns))
+    X = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in BASE_FEATURE_NAMES])
+    return calculate_rule_based_probabilities(X)
+
+
+def scenario_table(grid, scored, decimals=4):
+    """Compact table: one row per combination with the overridden values, probability and risk level"""
+    values = [scored['columns'][name].tolist() for name in grid]
+    probabilities = np.round(scored['probabilities'], decimals).tolist()
+    risk_levels = scored['risk_levels'].tolist()
+    return {
+        'columns': list(grid) + ['probability', 'risk_level'],
+        'rows': [list(row) for row in zip(*values, probabilities, risk_levels)],
+    }
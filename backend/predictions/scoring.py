@@ -0,0 +1,261 @@
+"""
+Bulk re-scoring of the workforce.
+
+Shared by the ``rescore_workforce`` command and the admin rescore endpoint.
+Employees are streamed from EmployeePerformanceData in primary key order,
+scored a chunk at a time (inline or in a forked process pool) and written
+with bulk_create, one transaction per chunk. Each pass is recorded as a
+ScoringRun whose ``last_processed_pk`` is advanced in the same transaction as
+the rows it covers, so an interrupted run can be resumed exactly.
+
+Incremental runs only re-score employees whose performance data changed
+after their latest TurnoverPrediction; a change of the active model (its
+registry version) makes the next run a full one.
+"""
+
+import multiprocessing
+from collections import deque
+
+import numpy as np
+from django.db import connections, transaction
+from django.db.models import Max, OuterRef, Q, Subquery, F
+from django.utils import timezone
+
+from hr_features.models import MLPredictionHistory
+from .ml_utils import (
+    BASE_FEATURE_NAMES, TurnoverRiskCalculator, calculate_rule_based_probabilities,
+    fill_feature_defaults, get_risk_levels
+)
+from .feature_store import activity_columns
+from .models import EmployeePerformanceData, ScoringRun, TurnoverPrediction
+
+RULE_BASED_VERSION = 'rules'
+
+# Set in the parent before the pool forks, so workers share the resident model
+_pool_model = None
+
+
+def get_model_version(loaded_model):
+    """Version string recorded on ScoringRun for a LoadedModel (or the rule-based fallback)"""
+    return loaded_model.version if loaded_model is not None else RULE_BASED_VERSION
+
+
+def stale_performance_data(since=None):
+    """
+    Performance rows whose employee has no prediction newer than the row's
+    last update; ``since`` (a previous run's high-water mark) narrows the scan
+    to rows updated after it
+    """
+    latest_prediction = TurnoverPrediction.objects.filter(
+        employee_id=OuterRef('employee_id')
+    ).order_by('-created_at').values('created_at')[:1]
+
+    queryset = EmployeePerformanceData.objects.all()
+    if since is not None:
+        queryset = queryset.filter(updated_at__gt=since)
+    return queryset.annotate(last_predicted_at=Subquery(latest_prediction)).filter(
+        Q(last_predicted_at__isnull=True) | Q(updated_at__gt=F('last_predicted_at'))
+    )
+
+
+def plan_scoring(loaded_model, incremental=True, resume=False):
+    """
+    Decide what the next scoring pass covers.
+
+    Returns a dict with ``mode`` ('full' or 'incremental'), ``model_version``,
+    ``reason``, ``queryset`` (rows to score) and ``run`` (an unfinished
+    ScoringRun being resumed, or None).
+    """
+    model_version = get_model_version(loaded_model)
+    last_finished = ScoringRun.objects.filter(finished_at__isnull=False).first()
+
+    run = None
+    if resume:
+        run = ScoringRun.objects.filter(finished_at__isnull=True, model_version=model_version).first()
+
+    if run is not None:
+        mode, reason = run.mode, f"resuming scoring run {run.pk}"
+    elif not incremental:
+        mode, reason = 'full', "full re-scoring requested"
+    elif last_finished is None:
+        mode, reason = 'full', "no previous scoring run"
+    elif last_finished.model_version != model_version:
+        mode, reason = 'full', f"active model changed ({last_finished.model_version} -> {model_version})"
+    else:
+        mode, reason = 'incremental', f"performance data updated since scoring run {last_finished.pk}"
+
+    if mode == 'incremental':
+        queryset = stale_performance_data(since=last_finished.high_water_mark if last_finished else None)
+    else:
+        queryset = EmployeePerformanceData.objects.all()
+
+    return {
+        'mode': mode,
+        'model_version': model_version,
+        'reason': reason,
+        'queryset': queryset,
+        'run': run,
+    }
+
+
+def iter_chunks(queryset, chunk_size, after_pk=0):
+    """Stream performance rows in primary key order as column chunks"""
+    rows = queryset.filter(pk__gt=after_pk).order_by('pk').values_list(
+        'pk', 'employee_id', 'employee__salary', 'employee__department__name', *BASE_FEATURE_NAMES
+    ).iterator(chunk_size=chunk_size)
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_size:
+            yield _to_chunk(batch)
+            batch = []
+    if batch:
+        yield _to_chunk(batch)
+
+
+def _to_chunk(rows):
+    pks, employee_ids, salaries, departments = [list(column) for column in zip(*(row[:4] for row in rows))]
+    return {
+        'last_pk': pks[-1],
+        'employee_ids': employee_ids,
+        'salaries': salaries,
+        'departments': departments,
+        'features': fill_feature_defaults([row[4:] for row in rows]),
+    }
+
+
+def score_chunk(chunk, loaded_model):
+    """Add probabilities, confidence and rule-based risk scores to a chunk"""
+    X = chunk['features']
+    if loaded_model is not None:
+        columns = dict(zip(BASE_FEATURE_NAMES, X.T))
+        columns.update(salary=chunk['salaries'], department=chunk['departments'])
+        columns.update(chunk.get('activity', {}))
+        probabilities = loaded_model.predict_proba(loaded_model.build_feature_matrix(columns))
+        confidence_scores = np.maximum(probabilities, 1 - probabilities)
+    else:
+        probabilities = calculate_rule_based_probabilities(X)
+        confidence_scores = np.full(len(X), 0.85)
+
+    risk_scores = TurnoverRiskCalculator().calculate_risk_scores(dict(zip(BASE_FEATURE_NAMES, X.T)))
+    return dict(
+        chunk,
+        probabilities=probabilities,
+        confidence_scores=confidence_scores,
+        overall_risk_scores=risk_scores['overall_risk_score']
+    )
+
+
+def _score_in_pool(chunk):
+    return score_chunk(chunk, _pool_model)
+
+
+def create_scoring_pool(loaded_model, workers):
+    """
+    Fork ``workers`` scoring processes that share ``loaded_model``.
+    Call before any database cursor is open; workers never touch the database.
+    """
+    global _pool_model
+
+    _pool_model = loaded_model
+    connections.close_all()
+    return multiprocessing.get_context('fork').Pool(workers)
+
+
+def write_scored_chunk(result, run, model_used, batch_size=1000, history=True):
+    """Persist one scored chunk and advance the run's checkpoint in a single transaction"""
+    employee_ids = result['employee_ids']
+    probabilities = result['probabilities']
+    confidence_scores = result['confidence_scores']
+    risk_levels = get_risk_levels(probabilities)
+    features = result['features'].tolist()
+
+    with transaction.atomic():
+        TurnoverPrediction.objects.bulk_create([
+            TurnoverPrediction(
+                employee_id=employee_pk,
+                prediction_probability=float(probability),
+                prediction_result=bool(probability > 0.5),
+                model_used=model_used,
+                confidence_score=float(confidence),
+                features_used=dict(zip(BASE_FEATURE_NAMES, row)),
+                risk_level=str(risk_level)
+            )
+            for employee_pk, probability, confidence, risk_level, row
+            in zip(employee_ids, probabilities, confidence_scores, risk_levels, features)
+        ], batch_size=batch_size)
+
+        if history:
+            MLPredictionHistory.objects.bulk_create([
+                MLPredictionHistory(
+                    employee_id=employee_pk,
+                    prediction_id=f"scoring-{run.pk}-{employee_pk}",
+                    probability=round(float(probability), 4),
+                    risk_level=str(risk_level),
+                    confidence_score=round(float(confidence), 4),
+                    satisfaction_level=round(row[0], 4),
+                    last_evaluation=round(row[1], 4),
+                    number_project=int(row[2]),
+                    average_monthly_hours=int(row[3]),
+                    time_spend_company=int(row[4]),
+                    work_accident=bool(row[5]),
+                    promotion_last_5years=bool(row[6]),
+                    model_used=model_used,
+                    overall_risk_score=round(float(risk_score), 4)
+                )
+                for employee_pk, probability, confidence, risk_level, risk_score, row
+                in zip(employee_ids, probabilities, confidence_scores, risk_levels,
+                       result['overall_risk_scores'], features)
+            ], batch_size=batch_size)
+
+        run.last_processed_pk = result['last_pk']
+        run.employees_scored += len(employee_ids)
+        run.save(update_fields=['last_processed_pk', 'employees_scored'])
+
+    return len(employee_ids)
+
+
+def run_scoring(plan, loaded_model, chunk_size=2000, batch_size=1000, history=True,
+                pool=None, workers=1, after_pk=0):
+    """
+    Execute a plan from plan_scoring and return the finished ScoringRun.
+
+    With a ``pool`` from create_scoring_pool chunks are scored in the workers,
+    at most two per worker in flight, and written in submission order.
+    """
+    run = plan['run']
+    if run is None:
+        high_water_mark = EmployeePerformanceData.objects.aggregate(latest=Max('updated_at'))['latest']
+        run = ScoringRun.objects.create(
+            mode=plan['mode'],
+            model_version=plan['model_version'],
+            high_water_mark=high_water_mark
+        )
+    after_pk = max(after_pk, run.last_processed_pk)
+    model_used = loaded_model.model_name if loaded_model is not None else 'RuleBasedModel'
+
+    pending = deque()
+    for chunk in iter_chunks(plan['queryset'], chunk_size, after_pk=after_pk):
+        if loaded_model is not None and loaded_model.uses_activity_features:
+            # Read here: pool workers have no database access
+            chunk['activity'] = activity_columns(chunk['employee_ids'])
+        if pool is None:
+            pending.append(score_chunk(chunk, loaded_model))
+        else:
+            pending.append(pool.apply_async(_score_in_pool, (chunk,)))
+
+        while pending and (pool is None or len(pending) >= workers * 2):
+            write_scored_chunk(_result(pending.popleft()), run, model_used, batch_size, history)
+
+    while pending:
+        write_scored_chunk(_result(pending.popleft()), run, model_used, batch_size, history)
+
+    run.finished_at = timezone.now()
+    run.save(update_fields=['finished_at'])
+    return run
+
+
+def _result(pending):
+    # Inline chunks are already scored; pool chunks are AsyncResults
+    return pending if isinstance(pending, dict) else pending.get()
@@ -2,7 +2,7 @@ from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
-from .models import Department, Employee, EmployeePerformanceData
+from .models import Department, Employee, EmployeePerformanceData, TrainingJob
 
 class DepartmentSerializer(serializers.ModelSerializer):
     """Serializer untuk Department - digunakan di registrasi dan ML"""
@@ -209,3 +209,20 @@ class EmployeePerformanceDataSerializer(serializers.ModelSerializer):
         if self.instance is None and EmployeePerformanceData.objects.filter(employee=value).exists():
             raise serializers.ValidationError("Employee sudah memiliki data performance")
         return value
+
+
+class TrainingJobSerializer(serializers.ModelSerializer):
+    """Status and progress of a background training job"""
+    submitted_by = serializers.CharField(source='submitted_by.email', read_only=True, default=None)
+    ml_model_name = serializers.CharField(source='ml_model.name', read_only=True, default=None)
+    elapsed_seconds = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = TrainingJob
+        fields = [
+            'id', 'status', 'source', 'parameters', 'submitted_by',
+            'stage', 'rows_processed', 'elapsed_seconds', 'cancel_requested',
+            'ml_model', 'ml_model_name', 'results', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import EmployeePerformanceData, MLModel
+from . import feature_store, prediction_cache
+from .model_registry import model_registry
+
+
+@receiver([post_save, post_delete], sender=MLModel)
+def reload_active_model(sender, instance, **kwargs):
+    """Make this worker re-check the active model after any MLModel change"""
+    model_registry.invalidate()
+
+
+@receiver([post_save, post_delete], sender=EmployeePerformanceData)
+def invalidate_cached_prediction(sender, instance, **kwargs):
+    """Changed performance data must not be answered with the previous prediction row"""
+    prediction_cache.invalidate_employee(instance.employee_id)
+
+
+def remember_previous_activity(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feature_store.remember_previous(sender, instance)
+
+
+def update_activity_features(sender, instance, raw=False, **kwargs):
+    """Fold a saved performance-app row into the employee's activity features"""
+    if not raw:
+        feature_store.record_save(sender, instance)
+
+
+def remove_activity_features(sender, instance, **kwargs):
+    feature_store.record_delete(sender, instance)
+
+
+# Senders are given by label because the performance app imports this one
+for label in feature_store.SOURCES:
+    pre_save.connect(remember_previous_activity, sender=label, dispatch_uid=f'activity-previous-{label}')
+    pre_delete.connect(remember_previous_activity, sender=label, dispatch_uid=f'activity-deleting-{label}')
+    post_save.connect(update_activity_features, sender=label, dispatch_uid=f'activity-save-{label}')
+    post_delete.connect(remove_activity_features, sender=label, dispatch_uid=f'activity-delete-{label}')
@@ -1,3 +1,966 @@
-from django.test import TestCase
+import itertools
+import os
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import feature_store
+from .attrition_forecast import get_forecast, histogram, simulate_leavers, summarize
+from .benchmarking import run_benchmark
+from .counterfactuals import _stack, candidate_changes, search_counterfactuals
+from .feature_pipeline import FeaturePipeline
+from .ml_utils import PerformanceAnalyzer, TurnoverPredictor, TurnoverRiskCalculator, get_model_save_path
+from .model_artifacts import FlatForest, export_mmap_artifact, load_mmap_artifact, verification_sample
+from .model_compression import compress_model
+from .model_registry import DEFAULT_MODEL_NAME, LoadedModel, ModelRegistry, model_registry
+from .model_tuning import SuccessiveHalvingSearch
+from .models import (
+    Department, Employee, EmployeeActivityFeatures, EmployeePerformanceData, MLModel, ModelVersion, ScoringRun,
+    TurnoverPrediction
+)
+from .online_learning import OnlineTurnoverModel
+from .scenarios import (
+    expand_grid, parse_grid, scenario_features, scenario_table, score_columns, score_scenarios
+)
+from .training_cache import TrainingCache, candidate_key, dataset_fingerprint
+from .training_data import TrainingData
+from .training_jobs import get_training_csv_path
+
+SAMPLE_FEATURES = {
+    'satisfaction_level': 0.2,
+    'last_evaluation': 0.9,
+    'number_project': 6,
+    'average_monthly_hours': 260,
+    'time_spend_company': 4,
+    'work_accident': 0,
+    'promotion_last_5years': 0,
+}
+
+
+def create_employee(email, department=None, salary='low', **performance):
+    """Employee with performance data (SAMPLE_FEATURES unless overridden)"""
+    employee = Employee.objects.create_user(
+        email=email, first_name='Test', last_name=email.split('@')[0], department=department, salary=salary
+    )
+    EmployeePerformanceData.objects.create(employee=employee, **dict(SAMPLE_FEATURES, **performance))
+    return employee
+
+
+class ModelRegistryTests(TestCase):
+    """Loading, hot-swapping and failure handling of the per-worker model registry"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        # A long interval so only invalidate() (or the MLModel signals) trigger a re-check
+        self.registry = ModelRegistry(check_interval=3600)
+
+    def copy_default_artifact(self, name):
+        file_path = os.path.join(self.tmp_dir, f"{name}.joblib")
+        shutil.copyfile(get_model_save_path(DEFAULT_MODEL_NAME), file_path)
+        return file_path
+
+    def activate(self, name, file_path):
+        return MLModel.objects.create(name=name, model_type='RandomForest', model_file_path=file_path, is_active=True)
+
+    def test_loads_default_artifact_without_active_model(self):
+        loaded = self.registry.get()
+
+        self.assertIsNotNone(loaded)
+        self.assertIsNone(loaded.ml_model_id)
+        self.assertEqual(loaded.file_path, get_model_save_path(DEFAULT_MODEL_NAME))
+        self.assertTrue(loaded.version.startswith('default:'))
+        probability = loaded.predict_one(SAMPLE_FEATURES, salary='low', department='sales')
+        self.assertGreaterEqual(probability, 0.0)
+        self.assertLessEqual(probability, 1.0)
+
+    def test_hot_swaps_when_active_model_changes(self):
+        default = self.registry.get()
+        ml_model = self.activate('swap_target', self.copy_default_artifact('swap_target'))
+        self.registry.invalidate()
+
+        swapped = self.registry.get()
+        self.assertIsNot(swapped, default)
+        self.assertEqual(swapped.ml_model_id, ml_model.id)
+        self.assertEqual(swapped.file_path, ml_model.model_file_path)
+        # Unchanged row: the same object keeps serving
+        self.registry.invalidate()
+        self.assertIs(self.registry.get(), swapped)
+
+    def test_keeps_serving_previous_model_when_artifact_is_missing(self):
+        current = self.registry.get()
+        self.activate('missing', os.path.join(self.tmp_dir, 'missing.joblib'))
+        self.registry.invalidate()
+
+        with self.assertLogs('predictions.model_registry', level='WARNING'):
+            self.assertIs(self.registry.get(), current)
+
+    def test_keeps_serving_previous_model_when_artifact_is_broken(self):
+        current = self.registry.get()
+        broken_path = os.path.join(self.tmp_dir, 'broken.joblib')
+        with open(broken_path, 'wb') as f:
+            f.write(b'not a joblib file')
+        self.activate('broken', broken_path)
+        self.registry.invalidate()
+
+        with self.assertLogs('predictions.model_registry', level='ERROR'):
+            self.assertIs(self.registry.get(), current)
+        # The broken artifact is not retried on every request
+        self.registry.invalidate()
+        self.assertIs(self.registry.get(), current)
+
+    def test_invalidate_forces_recheck(self):
+        current = self.registry.get()
+        file_path = self.copy_default_artifact('recheck')
+        # QuerySet.update bypasses the MLModel signals, so nothing invalidates on its own
+        ml_model = MLModel.objects.create(name='recheck', model_type='RandomForest', model_file_path=file_path)
+        MLModel.objects.filter(pk=ml_model.pk).update(is_active=True)
+
+        self.assertIs(self.registry.get(), current)
+        self.registry.invalidate()
+        self.assertEqual(self.registry.get().ml_model_id, ml_model.id)
+
+    def test_warmup_preloads_previous_version_off_the_request_path(self):
+        previous_path = self.copy_default_artifact('rollback_v1')
+        current_path = self.copy_default_artifact('rollback_v2')
+        ml_model = self.activate('rollback', current_path)
+        ModelVersion.objects.create(
+            ml_model=ml_model, sha256='1' * 64, file_path=previous_path, model_type='RandomForest',
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        ModelVersion.objects.create(ml_model=ml_model, sha256='2' * 64, file_path=current_path, model_type='RandomForest')
+
+        self.registry.get()
+        self.assertEqual(self.registry._warm, {})
+
+        # Keep the test transaction's connection and the collector as they are
+        with mock.patch('django.db.connections.close_all'), mock.patch('gc.freeze'):
+            current = self.registry.warmup()
+        self.assertEqual(current.file_path, current_path)
+        warm = list(self.registry._warm.values())
+        self.assertEqual([loaded.file_path for loaded in warm], [previous_path])
+
+        MLModel.objects.filter(pk=ml_model.pk).update(model_file_path=previous_path)
+        self.registry.invalidate()
+        self.assertIs(self.registry.get(), warm[0])
+
+
+class BatchPredictionViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(Employee.objects.create_superuser(email='admin@example.com', password='pw'))
+
+    def test_rejects_non_integer_employee_ids(self):
+        for employee_ids in (['x'], [1.5], [True], [1, '2']):
+            response = self.client.post('/api/predict/batch/', {'employee_ids': employee_ids}, format='json')
+            self.assertEqual(response.status_code, 400, employee_ids)
+            self.assertIn('employee_ids', response.json()['errors'])
+
+    def test_rejects_non_integer_department_id(self):
+        for department_id in ('abc', '1.5', -1, True):
+            response = self.client.post('/api/predict/batch/', {'department_id': department_id}, format='json')
+            self.assertEqual(response.status_code, 400, department_id)
+            self.assertIn('department_id', response.json()['errors'])
+
+
+class RiskCalculatorBatchTests(SimpleTestCase):
+    """calculate_risk_scores over a matrix must agree with calculate_risk_score row by row"""
+
+    def performance_rows(self, n=500):
+        rng = np.random.RandomState(0)
+        rows = []
+        for _ in range(n):
+            row = {
+                'satisfaction_level': rng.choice([0.4, 0.6, rng.rand()]),
+                'last_evaluation': rng.choice([0.4, 0.6, rng.rand()]),
+                'number_project': int(rng.randint(1, 8)),
+                'average_monthly_hours': int(rng.choice([160, 200, rng.randint(100, 300)])),
+                'time_spend_company': int(rng.randint(1, 8)),
+                'work_accident': bool(rng.randint(2)),
+                'promotion_last_5years': bool(rng.randint(2)),
+            }
+            # Missing values carry no risk on either path
+            if rng.rand() < 0.1:
+                row[rng.choice(list(row))] = None
+            rows.append(row)
+        return rows
+
+    def test_batch_matches_per_row(self):
+        calculator = TurnoverRiskCalculator()
+        rows = self.performance_rows()
+        batch = calculator.calculate_risk_scores([
+            [np.nan if row[name] is None else row[name] for name in calculator.factor_names] for row in rows
+        ])
+        batch_recommendations = calculator.get_batch_risk_recommendations(batch)
+
+        for i, row in enumerate(rows):
+            single = calculator.calculate_risk_score(SimpleNamespace(**row))
+            self.assertAlmostEqual(single['overall_risk_score'], batch['overall_risk_score'][i], places=12)
+            self.assertEqual(single['risk_level'], batch['risk_level'][i])
+            for j, name in enumerate(calculator.factor_names):
+                self.assertEqual(single['risk_details'][name]['risk'], batch['factor_risk'][i, j])
+            self.assertEqual(calculator.get_risk_recommendations(single), batch_recommendations[i])
+
+
+class PerformanceAnalyzerTests(SimpleTestCase):
+    def test_group_breakdowns_keep_missing_keys(self):
+        rows = [
+            {'department': 'sales', 'salary': 'low', 'satisfaction_level': 0.2, 'last_evaluation': 0.5,
+             'number_project': 3, 'average_monthly_hours': 150, 'time_spend_company': 3,
+             'work_accident': 0, 'promotion_last_5years': 0},
+            {'department': 'sales', 'salary': None, 'satisfaction_level': 0.6, 'last_evaluation': 0.7,
+             'number_project': 5, 'average_monthly_hours': 210, 'time_spend_company': 6,
+             'work_accident': 1, 'promotion_last_5years': 0},
+            {'department': None, 'salary': 'low', 'satisfaction_level': 0.9, 'last_evaluation': 0.8,
+             'number_project': 4, 'average_monthly_hours': 180, 'time_spend_company': 2,
+             'work_accident': 0, 'promotion_last_5years': 1},
+        ]
+        analysis = PerformanceAnalyzer().analyze_performance_trends(rows)
+
+        departments = analysis['department_analysis']
+        self.assertEqual(departments['sales']['employee_count'], 2)
+        self.assertAlmostEqual(departments['sales']['avg_satisfaction'], 0.4)
+        missing = [group for key, group in departments.items() if key != 'sales']
+        self.assertEqual(len(missing), 1)
+        self.assertEqual(missing[0]['employee_count'], 1)
+        self.assertAlmostEqual(missing[0]['avg_hours'], 180)
+        self.assertEqual(sum(group['employee_count'] for group in analysis['salary_analysis'].values()), 3)
+
+
+class FeaturePipelineTests(SimpleTestCase):
+    """The compiled pipeline must reproduce prepare_data's encoding and scaling"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        import pandas as pd
+
+        cls.records = pd.read_csv(get_training_csv_path()).to_dict('records')
+        cls.predictor = TurnoverPredictor()
+        cls.X, _ = cls.predictor.prepare_data(cls.records)
+        cls.pipeline = cls.predictor.feature_pipeline
+        # Serving works on the saved form of the pipeline
+        cls.served = FeaturePipeline.from_dict(cls.pipeline.to_dict())
+
+    def serving_record(self, record):
+        return {
+            'satisfaction_level': record['satisfaction_level'],
+            'last_evaluation': record['last_evaluation'],
+            'number_project': record['number_project'],
+            'average_monthly_hours': record['average_montly_hours'],
+            'time_spend_company': record['time_spend_company'],
+            'work_accident': record['Work_accident'],
+            'promotion_last_5years': record['promotion_last_5years'],
+            'salary': record['salary'],
+            'department': record['sales'],
+        }
+
+    def test_transform_columns_matches_prepare_data(self):
+        rows = [self.serving_record(record) for record in self.records]
+        columns = {name: [row[name] for row in rows] for name in rows[0]}
+
+        np.testing.assert_allclose(self.served.transform_columns(columns), self.X, rtol=0, atol=1e-12)
+
+    def test_transform_record_matches_prepare_data(self):
+        for i in range(0, len(self.records), 97):
+            np.testing.assert_allclose(
+                self.served.transform_record(self.serving_record(self.records[i])), self.X[i], rtol=0, atol=1e-12
+            )
+
+    def test_unknown_categorical_values_are_not_cached(self):
+        record = self.serving_record(self.records[0])
+        for i in range(1000):
+            self.served.transform_record(dict(record, department=f"unknown-{i}", salary=f"unknown-{i}"))
+
+        for source, resolved in self.served._resolved.items():
+            self.assertLessEqual(set(resolved.values()), self.served._vocabulary[source])
+            self.assertLessEqual(len(resolved), len(self.served._vocabulary[source]))
+
+
+class PredictionCacheTests(TestCase):
+    """predict_turnover results are reused for unchanged inputs and model version"""
+
+    def setUp(self):
+        cache.clear()
+        model_registry.clear()
+        self.addCleanup(model_registry.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(Employee.objects.create_superuser(email='admin@example.com', password='pw'))
+        self.employee = create_employee('cached@example.com', Department.objects.create(name='Sales'))
+
+    def predict(self):
+        response = self.client.post('/api/predict/', {'employee_id': self.employee.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.predict()
+        second = self.predict()
+
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['prediction_id'], first['prediction_id'])
+        self.assertEqual(second['prediction'], first['prediction'])
+        self.assertEqual(TurnoverPrediction.objects.count(), 1)
+
+    def test_model_change_misses_cache(self):
+        first = self.predict()
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        file_path = os.path.join(tmp_dir, 'replacement.joblib')
+        shutil.copyfile(get_model_save_path(DEFAULT_MODEL_NAME), file_path)
+        # Saving the row invalidates the registry through the MLModel signals
+        MLModel.objects.create(name='replacement', model_type='RandomForest', model_file_path=file_path, is_active=True)
+
+        second = self.predict()
+        self.assertFalse(second['cached'])
+        self.assertNotEqual(second['prediction_id'], first['prediction_id'])
+        self.assertEqual(TurnoverPrediction.objects.count(), 2)
+
+    def test_changed_performance_data_misses_cache(self):
+        first = self.predict()
+        performance_data = self.employee.performance_data
+        performance_data.satisfaction_level = 0.9
+        performance_data.save()
+
+        second = self.predict()
+        self.assertFalse(second['cached'])
+        self.assertNotEqual(second['prediction_id'], first['prediction_id'])
+
+
+class RescoreViewTests(TestCase):
+    """The rescore endpoint runs incremental passes only; full passes belong to rescore_workforce"""
+
+    def setUp(self):
+        model_registry.clear()
+        self.addCleanup(model_registry.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(Employee.objects.create_superuser(email='admin@example.com', password='pw'))
+        self.employee = create_employee('rescore@example.com')
+
+    def rescore(self, **data):
+        return self.client.post('/api/predict/rescore/', data, format='json')
+
+    def test_full_run_is_refused(self):
+        response = self.rescore()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['data']['mode'], 'full')
+
+        response = self.rescore(full=True)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(ScoringRun.objects.exists())
+
+    def test_dry_run_reports_full_run(self):
+        response = self.rescore(full=True, dry_run=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['employees_to_score'], 1)
+
+    def test_incremental_run_after_command(self):
+        call_command('rescore_workforce', workers=1, stdout=StringIO())
+        performance_data = self.employee.performance_data
+        performance_data.satisfaction_level = 0.8
+        performance_data.save()
+
+        response = self.rescore()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['mode'], 'incremental')
+        self.assertEqual(response.json()['data']['employees_scored'], 1)
+
+
+class FlatForestTests(SimpleTestCase):
+    """The flat and memory-mapped evaluators reproduce scikit-learn's predict_proba bit for bit"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        rng = np.random.RandomState(0)
+        X = rng.normal(size=(400, 7)) * [0.25, 0.2, 1.5, 50, 1.5, 0.4, 0.2] + [0.6, 0.7, 4, 200, 3.5, 0.1, 0.05]
+        y = (X[:, 0] + rng.normal(scale=0.2, size=len(X)) < 0.5).astype(int)
+        cls.forest = RandomForestClassifier(n_estimators=25, random_state=0).fit(X, y)
+        cls.pipeline = Pipeline([
+            ('scaler', StandardScaler()),
+            ('classifier', RandomForestClassifier(n_estimators=25, random_state=0)),
+        ]).fit(X, y)
+
+    def assert_matches(self, flat, estimator):
+        X = verification_sample(flat)
+        expected = estimator.predict_proba(X)
+        np.testing.assert_array_equal(flat.predict_proba(X), expected)
+        np.testing.assert_array_equal(np.array([flat.predict_positive_one(row) for row in X]), expected[:, 1])
+        np.testing.assert_array_equal(flat.predict_proba(X[:1]), expected[:1])
+
+    def test_forest_with_separate_scaler(self):
+        from sklearn.preprocessing import StandardScaler
+
+        scaler = StandardScaler().fit(verification_sample(FlatForest.from_model_data({'model': self.forest})))
+        flat = FlatForest.from_model_data({'model': self.forest, 'scaler': scaler})
+        X = verification_sample(flat)
+        np.testing.assert_array_equal(flat.predict_proba(X), self.forest.predict_proba(scaler.transform(X)))
+
+    def test_bare_forest(self):
+        self.assert_matches(FlatForest.from_model_data({'model': self.forest}), self.forest)
+
+    def test_pipeline_with_folded_scaler(self):
+        self.assert_matches(FlatForest.from_model_data({'model': self.pipeline}), self.pipeline)
+
+    def test_memory_mapped_export(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        export_mmap_artifact({'model': self.pipeline}, os.path.join(directory, 'model.mmap'))
+
+        model_data = load_mmap_artifact(os.path.join(directory, 'model.mmap'))
+        self.assertIsNone(model_data['scaler'])
+        self.assert_matches(model_data['model'], self.pipeline)
+
+
+class SuccessiveHalvingSearchTests(SimpleTestCase):
+    """Tuned parameters only replace the defaults when they score better on the full folds"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.RandomState(0)
+        cls.X = rng.normal(size=(600, 4))
+        cls.y = (cls.X[:, 0] + 0.5 * cls.X[:, 1] + rng.normal(scale=0.3, size=600) > 0).astype(int)
+
+    def search(self, default_c, space, time_budget=60):
+        from sklearn.linear_model import LogisticRegression
+
+        return SuccessiveHalvingSearch(
+            {'LogisticRegression': LogisticRegression(C=default_c, max_iter=1000)},
+            search_spaces={'LogisticRegression': {'C': space}}, time_budget=time_budget, min_resource=100
+        ).fit(self.X, self.y)
+
+    def test_keeps_defaults_when_tuning_scores_worse(self):
+        search = self.search(1.0, [1e-4, 2e-4, 5e-4])
+        self.assertGreater(len(search.history_), 1)
+        self.assertEqual(search.best_params_, {'LogisticRegression': {}})
+        self.assertEqual(search.best_scores_, search.default_scores_)
+
+    def test_applies_parameters_that_beat_defaults_on_full_folds(self):
+        search = self.search(1e-4, [1e-4, 2e-4, 1.0])
+        self.assertEqual(search.best_params_, {'LogisticRegression': {'C': 1.0}})
+        self.assertGreater(search.best_scores_['LogisticRegression'], search.default_scores_['LogisticRegression'])
+
+    def test_no_fits_without_budget(self):
+        search = self.search(1.0, [0.1, 10.0], time_budget=0)
+        self.assertTrue(search.stopped_early_)
+        self.assertEqual(search.n_fits_, 0)
+        self.assertEqual(search.best_params_, {})
+
+
+class TrainingDataTests(SimpleTestCase):
+    def test_missing_counts_are_filled_with_rounded_median(self):
+        data = TrainingData.from_columns({
+            'satisfaction_level': [0.1, 0.2, np.nan, 0.4, 0.5],
+            'number_project': [3, 4, np.nan, 2, 5],
+            'average_monthly_hours': [150, 161, np.nan, 170, 180],
+        })
+        # Medians 0.3 (float column), 3.5 -> 4 and 165.5 -> 166 (integer columns)
+        self.assertAlmostEqual(float(data.numeric['satisfaction_level'][2]), 0.3, places=6)
+        self.assertEqual(data.numeric['number_project'].dtype, np.int16)
+        self.assertEqual(int(data.numeric['number_project'][2]), 4)
+        self.assertEqual(data.numeric['average_monthly_hours'].tolist(), [150, 161, 166, 170, 180])
+
+    def test_counts_above_int8_range_are_kept(self):
+        data = TrainingData.from_columns({
+            'number_project': [3, 200],
+            'time_spend_company': [2, 130],
+            'work_accident': [0, 1],
+        })
+        self.assertEqual(data.numeric['number_project'].tolist(), [3, 200])
+        self.assertEqual(data.numeric['time_spend_company'].tolist(), [2, 130])
+        self.assertEqual(data.numeric['work_accident'].dtype, np.int8)
+
+
+class BenchmarkTests(SimpleTestCase):
+    def test_parallel_training_uses_several_workers(self):
+        # A daemonic child (e.g. a Pool worker) would silently fit with one
+        source = TrainingData.from_csv(get_training_csv_path())
+        report = run_benchmark(
+            source, [300], model_names=['RandomForest', 'LogisticRegression'], parallel=True, n_jobs=2
+        )
+        self.assertEqual(report['options']['n_jobs'], 2)
+        self.assertEqual(report['scales'][0]['training_workers'], 2)
+        self.assertEqual(set(report['scales'][0]['models']), {'RandomForest', 'LogisticRegression'})
+
+
+class OnlineLearningTests(TestCase):
+    """Consumption of changed performance rows after the (updated_at, pk) watermark"""
+
+    def setUp(self):
+        model_registry.clear()
+        self.addCleanup(model_registry.clear)
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.file_path = os.path.join(tmp_dir, 'online.joblib')
+
+        for i in range(5):
+            create_employee(f"online{i}@example.com", left=i % 2 == 0)
+        # Rows saved in one transaction can share a timestamp
+        self.updated_at = timezone.now() - timedelta(minutes=5)
+        EmployeePerformanceData.objects.update(updated_at=self.updated_at)
+        self.pks = sorted(EmployeePerformanceData.objects.values_list('pk', flat=True))
+
+    def test_batches_split_rows_with_equal_timestamps(self):
+        model = OnlineTurnoverModel.create()
+        batches = []
+        learned = model.consume(batch_size=2, file_path=self.file_path, on_batch=lambda *args: batches.append(args))
+
+        self.assertEqual(learned, 5)
+        self.assertEqual([batch[0] for batch in batches], [2, 2, 1])
+        self.assertEqual(model.watermark, (self.updated_at, self.pks[-1]))
+        self.assertEqual(model.n_samples_seen, 5)
+        self.assertEqual(model.consume(file_path=self.file_path), 0)
+
+    def test_later_change_is_learned_once_after_reload(self):
+        OnlineTurnoverModel.create().consume(file_path=self.file_path)
+        model = OnlineTurnoverModel.load(self.file_path)
+        self.assertEqual(model.watermark, (self.updated_at, self.pks[-1]))
+
+        EmployeePerformanceData.objects.filter(pk=self.pks[0]).update(updated_at=self.updated_at + timedelta(minutes=1))
+        self.assertEqual(model.consume(file_path=self.file_path), 1)
+        self.assertEqual(model.watermark, (self.updated_at + timedelta(minutes=1), self.pks[0]))
+        self.assertEqual(model.consume(file_path=self.file_path), 0)
+
+    def test_batches_are_compared_with_active_model(self):
+        model = OnlineTurnoverModel.create()
+        model.consume(file_path=self.file_path)
+        EmployeePerformanceData.objects.update(updated_at=self.updated_at + timedelta(minutes=1))
+
+        batches = []
+        model.consume(file_path=self.file_path, on_batch=lambda *args: batches.append(args))
+        n_rows, loss, active_loss, _ = batches[0]
+        self.assertEqual(n_rows, 5)
+        self.assertIsNotNone(loss)
+        self.assertIsNotNone(active_loss)
+
+
+class TrainingCacheTests(SimpleTestCase):
+    """train_models reuses fits only for identical prepared data and hyperparameters"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.cache = TrainingCache(directory, max_entries=100)
+        rng = np.random.RandomState(0)
+        self.X = rng.normal(size=(300, 4))
+        self.y = (self.X[:, 0] + rng.normal(scale=0.5, size=300) > 0).astype(int)
+
+    def train(self, X=None, y=None, C=1.0):
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.linear_model import LogisticRegression
+
+        predictor = TurnoverPredictor()
+        predictor.models = {
+            'RandomForest': RandomForestClassifier(n_estimators=10, random_state=42),
+            'LogisticRegression': LogisticRegression(C=C, random_state=42),
+        }
+        results, _ = predictor.train_models(
+            self.X if X is None else X, self.y if y is None else y, cache=self.cache
+        )
+        return {name: metrics.get('cached', False) for name, metrics in results.items()}, predictor
+
+    def test_identical_data_and_parameters_hit(self):
+        first, predictor = self.train()
+        self.assertEqual(first, {'RandomForest': False, 'LogisticRegression': False})
+
+        second, cached_predictor = self.train()
+        self.assertEqual(second, {'RandomForest': True, 'LogisticRegression': True})
+        self.assertEqual(cached_predictor.best_model_name, predictor.best_model_name)
+        np.testing.assert_array_equal(
+            cached_predictor.best_model.predict_proba(self.X), predictor.best_model.predict_proba(self.X)
+        )
+
+    def test_changed_parameters_miss_only_that_candidate(self):
+        self.train()
+        cached, _ = self.train(C=0.1)
+        self.assertEqual(cached, {'RandomForest': True, 'LogisticRegression': False})
+
+    def test_changed_data_misses(self):
+        self.train()
+        y = self.y.copy()
+        y[0] = 1 - y[0]
+        cached, _ = self.train(y=y)
+        self.assertEqual(cached, {'RandomForest': False, 'LogisticRegression': False})
+
+    def test_key_ignores_n_jobs(self):
+        from sklearn.ensemble import RandomForestClassifier
+
+        fingerprint = dataset_fingerprint(self.X, self.y)
+        self.assertEqual(
+            candidate_key(fingerprint, RandomForestClassifier(n_jobs=1)),
+            candidate_key(fingerprint, RandomForestClassifier(n_jobs=4))
+        )
+        self.assertNotEqual(
+            candidate_key(fingerprint, RandomForestClassifier(max_depth=3)),
+            candidate_key(fingerprint, RandomForestClassifier())
+        )
+
+
+class FeatureStoreTests(TestCase):
+    """Signal-applied deltas keep the activity aggregates equal to a recomputation from the source tables"""
+
+    maxDiff = None
+
+    STATUSES = {'goal': ['not_started', 'in_progress', 'completed', 'cancelled'],
+                'meeting': ['scheduled', 'completed', 'cancelled']}
+
+    def setUp(self):
+        from performance.models import LearningModule
+
+        self.rng = random.Random(7)
+        self.employees = [create_employee(f"activity{i}@example.com") for i in range(5)]
+        self.modules = [
+            LearningModule.objects.create(
+                title=f"Module {i}", description='-', content_type='article', category='technical', duration_minutes=30
+            )
+            for i in range(30)
+        ]
+
+    def employee(self):
+        return self.rng.choice(self.employees)
+
+    def rating(self):
+        return self.rng.choice([None, 1, 2, 3, 4, 5])
+
+    def goal_values(self):
+        return {'owner': self.employee(), 'status': self.rng.choice(self.STATUSES['goal']),
+                'progress_percentage': self.rng.randint(0, 100)}
+
+    def feedback_values(self):
+        return {'to_employee': self.employee(), 'rating': self.rating()}
+
+    def learning_values(self):
+        return {'time_spent_minutes': self.rng.randint(0, 120), 'is_completed': self.rng.random() < 0.5}
+
+    def meeting_values(self):
+        return {'employee': self.employee(), 'status': self.rng.choice(self.STATUSES['meeting']),
+                'satisfaction_rating': self.rating()}
+
+    def review_values(self):
+        # Halves are exact in binary, so float sums can be compared exactly
+        return {'employee': self.employee(), 'overall_rating': self.rng.choice([None, 1.0, 2.5, 3.5, 4.0, 5.0])}
+
+    def create(self, kind):
+        from datetime import date
+        from performance.models import Feedback, Goal, LearningProgress, OneOnOneMeeting, PerformanceReview
+
+        other = self.employee()
+        if kind == 'goal':
+            return Goal.objects.create(title='Goal', description='-', due_date=date.today(), **self.goal_values())
+        if kind == 'feedback':
+            return Feedback.objects.create(from_employee=other, feedback_type='peer', content='-',
+                                           **self.feedback_values())
+        if kind == 'learning':
+            taken = set(LearningProgress.objects.values_list('employee_id', 'module_id'))
+            free = [(employee, module) for employee in self.employees for module in self.modules
+                    if (employee.pk, module.pk) not in taken]
+            employee, module = self.rng.choice(free)
+            return LearningProgress.objects.create(employee=employee, module=module, **self.learning_values())
+        if kind == 'meeting':
+            return OneOnOneMeeting.objects.create(manager=other, meeting_date=timezone.now(), topic='-',
+                                                  **self.meeting_values())
+        return PerformanceReview.objects.create(reviewer=other, review_period_start=timezone.now().date(),
+                                                review_period_end=timezone.now().date(), **self.review_values())
+
+    def update(self, instance, kind):
+        values = getattr(self, f"{kind}_values")()
+        if kind != 'learning':
+            # Reassigning to another employee moves the contribution
+            instance = type(instance).objects.get(pk=instance.pk)
+        for name, value in values.items():
+            setattr(instance, name, value)
+        instance.save()
+
+    def assert_table_matches_source(self):
+        expected = {
+            employee_id: {name: value for name, value in counts.items() if value}
+            for employee_id, counts in feature_store.compute_aggregates().items()
+        }
+        actual = {}
+        for row in EmployeeActivityFeatures.objects.values('employee_id', *feature_store.AGGREGATE_FIELDS):
+            counts = {name: row[name] for name in feature_store.AGGREGATE_FIELDS if row[name]}
+            if counts:
+                actual[row['employee_id']] = counts
+        expected = {employee_id: counts for employee_id, counts in expected.items() if counts}
+        self.assertEqual(actual, expected)
+
+    def test_random_writes_match_recomputation(self):
+        kinds = ['goal', 'feedback', 'learning', 'meeting', 'review']
+        rows = {kind: [] for kind in kinds}
+        # No rows yet: the first activity of every employee goes through the missing-row rebuild
+        self.assertFalse(EmployeeActivityFeatures.objects.exists())
+
+        for step in range(400):
+            kind = self.rng.choice(kinds)
+            action = self.rng.random()
+            if not rows[kind] or action < 0.4:
+                rows[kind].append(self.create(kind))
+            elif action < 0.8:
+                self.update(self.rng.choice(rows[kind]), kind)
+            else:
+                rows[kind].pop(self.rng.randrange(len(rows[kind]))).delete()
+
+            if step % 100 == 50:
+                # A lost row is rebuilt from the source tables on the employee's next write
+                EmployeeActivityFeatures.objects.filter(employee=self.employee()).delete()
+            if step % 50 == 49:
+                self.assert_table_matches_source()
+        self.assert_table_matches_source()
+
+    def test_rebuild_restores_table_after_bulk_writes(self):
+        from performance.models import Goal
+
+        for _ in range(20):
+            self.create('goal')
+        # QuerySet.update bypasses the signals
+        Goal.objects.update(status='completed')
+        feature_store.rebuild()
+        self.assert_table_matches_source()
+        self.assertEqual(EmployeeActivityFeatures.objects.count(), Employee.objects.count())
+
+
+class ModelCompressionTests(SimpleTestCase):
+    """Compression is chosen on a validation slice of the training split, never on the hold-out"""
+
+    def test_holdout_does_not_influence_selection(self):
+        from sklearn.ensemble import RandomForestClassifier
+
+        rng = np.random.RandomState(0)
+        X = rng.normal(size=(800, 4))
+        y = (X[:, 0] + X[:, 1] + rng.normal(scale=0.5, size=800) > 0).astype(int)
+        X_train, y_train, X_test, y_test = X[:600], y[:600], X[600:], y[600:]
+        model = RandomForestClassifier(n_estimators=60, random_state=0).fit(X_train, y_train)
+
+        options = {'tree_counts': (30, 10), 'max_depths': (4,)}
+        _, report = compress_model(model, X_train, y_train, X_test, y_test, 0.02, **options)
+        _, inverted = compress_model(model, X_train, y_train, X_test, 1 - y_test, 0.02, **options)
+
+        self.assertIsNotNone(report['selected'])
+        self.assertEqual(inverted['selected'], report['selected'])
+        self.assertEqual(
+            [candidate['metrics'] for candidate in inverted['candidates']],
+            [candidate['metrics'] for candidate in report['candidates']]
+        )
+        # Only the reported hold-out numbers see the (inverted) test labels
+        self.assertLess(inverted['selected_holdout']['metrics']['auc_score'], 0.5)
+
+
+class ScenarioGridTests(SimpleTestCase):
+    """Grid expansion follows itertools.product order and batch scoring matches per-row scoring"""
+
+    GRID = {
+        'promotion_last_5years': [0, 1],
+        'salary': ['low', 'high'],
+        'average_monthly_hours': [160, 200, 240],
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        import joblib
+
+        file_path = get_model_save_path(DEFAULT_MODEL_NAME)
+        cls.loaded = LoadedModel(joblib.load(file_path), file_path, 'test')
+        cls.base_record = dict({name: float(value) for name, value in SAMPLE_FEATURES.items()},
+                               salary='medium', department='sales')
+
+    def test_rows_follow_product_order(self):
+        columns, n_rows = expand_grid(self.base_record, self.GRID)
+
+        combinations = list(itertools.product(*self.GRID.values()))
+        self.assertEqual(n_rows, len(combinations))
+        for name, column in columns.items():
+            self.assertEqual(column.shape, (n_rows,))
+        rows = list(zip(*(columns[name].tolist() for name in self.GRID)))
+        self.assertEqual(rows, combinations)
+        # Features outside the grid keep the employee's value
+        self.assertEqual(set(columns['satisfaction_level']), {self.base_record['satisfaction_level']})
+        self.assertEqual(set(columns['department']), {'sales'})
+
+    def test_batch_matches_per_row_scoring(self):
+        scored = score_scenarios(self.loaded, self.base_record, self.GRID)
+        for i, combination in enumerate(itertools.product(*self.GRID.values())):
+            record = dict(self.base_record, **dict(zip(self.GRID, combination)))
+            features = {name: record[name] for name in SAMPLE_FEATURES}
+            expected = self.loaded.predict_one(features, salary=record['salary'], department=record['department'])
+            self.assertAlmostEqual(float(scored['probabilities'][i]), expected, places=12)
+
+    def test_table_shape(self):
+        table = scenario_table(self.GRID, score_scenarios(self.loaded, self.base_record, self.GRID))
+        self.assertEqual(table['columns'], list(self.GRID) + ['probability', 'risk_level'])
+        self.assertEqual(len(table['rows']), 12)
+        self.assertEqual(table['rows'][0][:3], [0.0, 'low', 160.0])
+        self.assertEqual(table['rows'][-1][:3], [1.0, 'high', 240.0])
+
+    def test_parse_grid_keeps_key_order_and_limits_size(self):
+        grid = {'salary': ['high', 'low', 'high'], 'work_accident': ['yes', 0]}
+        parsed, errors = parse_grid(grid, scenario_features(), max_combinations=10)
+        self.assertEqual(errors, {})
+        self.assertEqual(list(parsed), ['salary', 'work_accident'])
+        self.assertEqual(parsed['salary'], ['high', 'low'])
+
+        _, errors = parse_grid(self.GRID, scenario_features(), max_combinations=11)
+        self.assertIn('grid', errors)
+
+
+class CounterfactualTests(SimpleTestCase):
+    """Counterfactuals are the cheapest change sets and really score below the target"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        import joblib
+
+        file_path = get_model_save_path(DEFAULT_MODEL_NAME)
+        cls.loaded = LoadedModel(joblib.load(file_path), file_path, 'test')
+        cls.record = dict({name: float(value) for name, value in SAMPLE_FEATURES.items()},
+                          salary='low', department='sales')
+
+    def score(self, record):
+        return float(score_columns(self.loaded, {name: np.array([value]) for name, value in record.items()})[0])
+
+    def test_candidates_are_ordered_by_cost(self):
+        _, _, costs, changed = candidate_changes(self.record)
+        self.assertTrue((np.diff(costs) >= 0).all())
+        self.assertTrue(changed.any(axis=0).all())
+
+    def test_counterfactuals_are_cheapest_and_below_target(self):
+        # Low enough that the answer needs several levers and several batches
+        target = 0.35
+        result = search_counterfactuals(self.loaded, [self.record], target=target, batch_size=16)[0]
+        self.assertEqual(result['status'], 'found')
+        self.assertGreater(result['evaluated'], 16)
+
+        _, columns, costs, _ = candidate_changes(self.record)
+        probabilities = score_columns(self.loaded, _stack([self.record], columns, np.array([len(costs)])))
+        cheapest = costs[probabilities < target].min()
+
+        found = result['counterfactuals']
+        self.assertEqual(found[0]['cost'], cheapest)
+        self.assertEqual([cf['cost'] for cf in found], sorted(cf['cost'] for cf in found))
+        for counterfactual in found:
+            changed = dict(self.record, **{change['feature']: change['to'] for change in counterfactual['changes']})
+            probability = self.score(changed)
+            self.assertLess(probability, target)
+            self.assertAlmostEqual(probability, counterfactual['probability'], places=4)
+
+    def test_record_below_target_is_not_searched(self):
+        result = search_counterfactuals(self.loaded, [self.record], target=0.9)[0]
+        self.assertEqual(result['status'], 'below_target')
+        self.assertEqual(result['evaluated'], 0)
+        self.assertEqual(result['counterfactuals'], [])
+
+
+class CounterfactualViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(Employee.objects.create_superuser(email='admin@example.com', password='pw'))
+
+    def test_rejects_non_integer_ids(self):
+        for field, value in (('employee_ids', ['x']), ('employee_id', 'abc'), ('employee_id', 1.5),
+                             ('department_id', 'abc'), ('department_id', -1)):
+            response = self.client.post('/api/predict/counterfactuals/', {field: value}, format='json')
+            self.assertEqual(response.status_code, 400, (field, value))
+            self.assertIn(field, response.json()['errors'])
+
+
+class AttritionForecastTests(SimpleTestCase):
+    """Monte Carlo leaver counts and the summaries read off their histograms"""
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.groups = np.repeat([0, 1, 2], [40, 25, 35])
+        self.probabilities = rng.uniform(0, 0.6, size=100)
+
+    def test_mean_matches_expected_leavers(self):
+        n_trials = 20000
+        counts = simulate_leavers(self.groups, self.probabilities, n_trials, seed=1)
+        self.assertEqual(counts.shape, (3, n_trials))
+
+        for group in range(3):
+            p = self.probabilities[self.groups == group]
+            # Within four standard errors of the Bernoulli-sum mean
+            standard_error = np.sqrt((p * (1 - p)).sum() / n_trials)
+            self.assertLess(abs(counts[group].mean() - p.sum()), 4 * standard_error)
+        self.assertLess(abs(counts.sum(axis=0).var() - (self.probabilities * (1 - self.probabilities)).sum()), 1.0)
+
+    def test_seed_and_block_size_do_not_change_results(self):
+        first = simulate_leavers(self.groups, self.probabilities, 3001, seed=5)
+        np.testing.assert_array_equal(simulate_leavers(self.groups, self.probabilities, 3001, seed=5), first)
+        # Rows are simulated block by block; the split must not change the draws
+        np.testing.assert_array_equal(
+            simulate_leavers(self.groups, self.probabilities, 3001, seed=5, block_size=7000), first
+        )
+
+    def test_certain_outcomes(self):
+        probabilities = np.array([0.0, 1.0, 1.0, 0.0])
+        counts = simulate_leavers(np.array([0, 0, 1, 1]), probabilities, 500, seed=0)
+        self.assertTrue((counts == 1).all())
+
+    def test_summary_of_known_histogram(self):
+        # 10 trials: 2 leavers twice, 3 five times, 4 twice, 6 once
+        entry = {
+            'department_id': 1, 'department': 'Sales', 'employees': 20, 'expected_leavers': 3.3,
+            'histogram': histogram(np.array([2, 2, 3, 3, 3, 3, 3, 4, 4, 6])),
+        }
+        self.assertEqual(entry['histogram'], {'offset': 2, 'frequencies': [2, 5, 2, 0, 1]})
+
+        summary = summarize(entry, 10, confidence=0.8, at_least=[0, 2, 3, 4, 5, 7])
+        self.assertEqual(summary['simulated_mean'], 3.3)
+        self.assertEqual(summary['std'], 1.1)
+        # 10% tails: cumulative 0.2 at 2 and 0.9 at 4
+        self.assertEqual(summary['confidence_interval'], {'level': 0.8, 'low': 2, 'high': 4})
+        self.assertEqual(
+            summary['probability_at_least'], {'0': 1.0, '2': 1.0, '3': 0.8, '4': 0.3, '5': 0.1, '7': 0.0}
+        )
+
+
+class ForecastCacheTests(TestCase):
+    """A cached forecast is replaced once predictions are added, with or without a scoring run"""
+
+    def setUp(self):
+        model_registry.clear()
+        self.addCleanup(model_registry.clear)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(Employee.objects.create_superuser(email='admin@example.com', password='pw'))
+        create_employee('first@example.com')
+        create_employee('second@example.com')
+        call_command('rescore_workforce', workers=1, stdout=StringIO())
+
+    def test_batch_prediction_after_run_misses_cache(self):
+        forecast, cached = get_forecast(n_trials=100)
+        self.assertFalse(cached)
+        self.assertEqual(forecast['employees'], 2)
+        self.assertTrue(get_forecast(n_trials=100)[1])
+
+        employee = create_employee('third@example.com', satisfaction_level=0.1)
+        response = self.client.post('/api/predict/batch/', {'employee_ids': [employee.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        forecast, cached = get_forecast(n_trials=100)
+        self.assertFalse(cached)
+        self.assertEqual(forecast['employees'], 3)
+        self.assertAlmostEqual(
+            forecast['total']['expected_leavers'],
+            sum(TurnoverPrediction.objects.values_list('prediction_probability', flat=True)),
+            places=6
+        )
@@ -0,0 +1,125 @@
+"""
+On-disk cache of candidate model fits and cross-validation scores.
+
+Retraining on an unchanged dataset (e.g. train_model_from_csv after every
+deploy) would otherwise refit every candidate from scratch. Entries are keyed
+by a fingerprint of the prepared feature matrix and target, the estimator
+class and its hyperparameters (and whatever else determines the result,
+such as the split or the search rung), so any change to the data, the
+preprocessing or the parameters misses the cache. ``n_jobs`` is left out of
+the key because it does not change the fitted model.
+
+Entries live in ``ml_models/cache/`` as joblib files; the least recently
+used ones are removed beyond ``ML_TRAINING_CACHE_MAX_ENTRIES``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+from django.conf import settings
+
+from .ml_utils import get_model_save_path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIRNAME = 'cache'
+
+# Parameters that affect speed or logging but not the fitted model
+IGNORED_PARAMS = {'n_jobs', 'verbose'}
+
+
+def dataset_fingerprint(*arrays):
+    """Hex digest of the shapes, dtypes and contents of the given arrays"""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.shape}{array.dtype.str}".encode())
+        digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+
+def candidate_key(fingerprint, estimator, **extra):
+    """Cache key for fitting ``estimator`` (with its current parameters) on the fingerprinted data"""
+    import sklearn
+
+    params = {
+        name: value for name, value in estimator.get_params(deep=True).items()
+        if name.split('__')[-1] not in IGNORED_PARAMS
+    }
+    payload = {
+        'fingerprint': fingerprint,
+        'estimator': f"{type(estimator).__module__}.{type(estimator).__qualname__}",
+        'params': params,
+        'sklearn': sklearn.__version__,
+        **extra,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+class TrainingCache:
+    """Joblib files keyed by ``candidate_key`` in a cache directory"""
+
+    def __init__(self, directory=None, max_entries=None):
+        self.directory = directory or os.path.join(
+            os.path.dirname(get_model_save_path(CACHE_DIRNAME)), CACHE_DIRNAME
+        )
+        self.max_entries = settings.ML_TRAINING_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.joblib")
+
+    def get(self, key):
+        """Cached value, or None"""
+        import joblib
+
+        path = self._path(key)
+        try:
+            value = joblib.load(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            logger.warning("Discarding unreadable training cache entry %s", path)
+            os.remove(path)
+            self.misses += 1
+            return None
+        # The modification time doubles as last-use time for eviction
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        import joblib
+
+        path = self._path(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries beyond ``max_entries``"""
+        entries = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.joblib')
+        ]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def get_training_cache():
+    """The configured training cache, or None when ML_TRAINING_CACHE is off"""
+    if not getattr(settings, 'ML_TRAINING_CACHE', True):
+        return None
+    return TrainingCache()
@@ -0,0 +1,203 @@
+"""
+Columnar training data.
+
+TrainingData holds a training set as one typed NumPy array per column
+(float32 for continuous features, int16 for counts, int8 for 0/1 flags, small
+integer codes plus a label list for categoricals), using the names the rest
+of the code expects. CSV headers (``average_montly_hours``, ``Work_accident``,
+``sales``) are mapped once at load time, so training never materializes
+per-row dicts or intermediate DataFrames. The same structure is filled
+straight from the EmployeePerformanceData table by ``from_queryset``,
+optionally with the employees' activity features from the feature store.
+"""
+
+import itertools
+
+import numpy as np
+
+from .feature_store import ACTIVITY_FEATURE_NAMES
+from .ml_utils import BASE_FEATURE_NAMES
+
+NUMERIC_DTYPES = {
+    'satisfaction_level': np.float32,
+    'last_evaluation': np.float32,
+    'number_project': np.int16,
+    'average_monthly_hours': np.int16,
+    'time_spend_company': np.int16,
+    'work_accident': np.int8,
+    'promotion_last_5years': np.int8,
+}
+CATEGORICAL_COLUMNS = ['salary', 'department']
+TARGET_COLUMN = 'left'
+
+# Header in the HR analytics CSV -> canonical column name
+CSV_COLUMN_MAP = {
+    'average_montly_hours': 'average_monthly_hours',  # Note: montly not monthly in CSV
+    'Work_accident': 'work_accident',
+    'sales': 'department',
+}
+
+
+class TrainingData:
+    """
+    A training set as typed column arrays.
+
+    ``numeric`` maps feature name -> array (NUMERIC_DTYPES), ``categorical``
+    maps name -> (codes, labels) with labels sorted like LabelEncoder's
+    classes, and ``target`` is an int8 array (or None).
+    """
+
+    def __init__(self, numeric, categorical=None, target=None):
+        self.numeric = numeric
+        self.categorical = categorical or {}
+        self.target = target
+        self.n_rows = len(next(iter(numeric.values())))
+
+    @property
+    def columns(self):
+        return list(self.numeric) + list(self.categorical)
+
+    @property
+    def nbytes(self):
+        total = sum(values.nbytes for values in self.numeric.values())
+        total += sum(codes.nbytes for codes, _ in self.categorical.values())
+        return total + (self.target.nbytes if self.target is not None else 0)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Build from raw columns (canonical name -> sequence). Missing numeric
+        values are filled with the column median; categoricals are encoded
+        (or may already be given as a ``(codes, labels)`` tuple).
+        """
+        numeric = {}
+        for name in list(BASE_FEATURE_NAMES) + ACTIVITY_FEATURE_NAMES:
+            if name not in columns:
+                continue
+            values = np.asarray(columns[name], dtype=np.float32)
+            missing = np.isnan(values)
+            dtype = NUMERIC_DTYPES.get(name, np.float32)
+            if missing.any():
+                fill = np.median(values[~missing]) if (~missing).any() else 0
+                # Integer columns get a whole count (the median of an even count can be x.5)
+                values[missing] = np.round(fill) if np.issubdtype(dtype, np.integer) else fill
+            numeric[name] = values.astype(dtype, copy=False)
+
+        categorical = {}
+        for name in CATEGORICAL_COLUMNS:
+            if name not in columns:
+                continue
+            if isinstance(columns[name], tuple):
+                codes, labels = _sort_labels(*columns[name])
+            else:
+                labels, codes = np.unique(np.asarray(columns[name]).astype(str), return_inverse=True)
+            code_dtype = np.int8 if len(labels) <= np.iinfo(np.int8).max else np.int32
+            categorical[name] = (codes.astype(code_dtype), list(labels))
+
+        target = None
+        if TARGET_COLUMN in columns:
+            target = np.asarray(columns[TARGET_COLUMN]).astype(np.int8)
+        return cls(numeric, categorical, target)
+
+    @classmethod
+    def from_csv(cls, csv_path, chunk_size=100000):
+        """
+        Read only the training columns of a CSV in chunks, converting each
+        chunk to compact arrays before the next is parsed
+        """
+        import pandas as pd
+
+        header = pd.read_csv(csv_path, nrows=0).columns
+        wanted = set(BASE_FEATURE_NAMES) | set(CATEGORICAL_COLUMNS) | {TARGET_COLUMN}
+        usecols = [column for column in header if CSV_COLUMN_MAP.get(column, column) in wanted]
+
+        parts = {CSV_COLUMN_MAP.get(column, column): [] for column in usecols}
+        label_ids = {name: {} for name in CATEGORICAL_COLUMNS}
+        for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunk_size):
+            for column in usecols:
+                name = CSV_COLUMN_MAP.get(column, column)
+                if name in CATEGORICAL_COLUMNS:
+                    # Chunk-local codes -> ids in a label table shared by all chunks (missing stays -1)
+                    codes, uniques = pd.factorize(chunk[column])
+                    ids = np.array(
+                        [label_ids[name].setdefault(str(label), len(label_ids[name])) for label in uniques] + [-1],
+                        dtype=np.int64
+                    )
+                    parts[name].append(ids[codes])
+                else:
+                    # Parsed as int64/float64 (float32 parsing is much slower), stored as float32
+                    parts[name].append(chunk[column].to_numpy(dtype=np.float32))
+
+        columns = {}
+        for name, arrays in parts.items():
+            values = np.concatenate(arrays) if arrays else np.empty(0)
+            columns[name] = (values, list(label_ids[name])) if name in CATEGORICAL_COLUMNS else values
+        return cls.from_columns(columns)
+
+    @classmethod
+    def from_queryset(cls, queryset=None, chunk_size=5000, activity_features=False):
+        """
+        Stream EmployeePerformanceData rows (with the employee's salary and
+        department name joined in the same query) into preallocated arrays.
+        ``iterator()`` uses a server-side cursor where the database supports it,
+        so no ORM instances and no full result set are held in memory. With
+        ``activity_features`` the ACTIVITY_FEATURE_NAMES columns are read from
+        the feature store for the same employees.
+        """
+        from .models import EmployeePerformanceData
+
+        if queryset is None:
+            queryset = EmployeePerformanceData.objects.all()
+        queryset = queryset.order_by()
+        fields = list(BASE_FEATURE_NAMES) + [TARGET_COLUMN, 'employee_id', 'employee__salary',
+                                             'employee__department__name']
+
+        # Rows inserted after count() are ignored; deleted ones shrink the arrays at the end
+        n_rows = queryset.count()
+        numeric = {name: np.empty(n_rows, dtype=np.float32) for name in BASE_FEATURE_NAMES}
+        target = np.empty(n_rows, dtype=np.int8)
+        employee_ids = np.empty(n_rows, dtype=np.int64)
+        codes = {name: np.empty(n_rows, dtype=np.int64) for name in CATEGORICAL_COLUMNS}
+        label_ids = {name: {} for name in CATEGORICAL_COLUMNS}
+
+        rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+        filled = 0
+        while filled < n_rows:
+            chunk = list(itertools.islice(rows, min(chunk_size, n_rows - filled)))
+            if not chunk:
+                break
+            end = filled + len(chunk)
+            columns = list(zip(*chunk))
+            for j, name in enumerate(BASE_FEATURE_NAMES):
+                # None becomes NaN and is filled with the median in from_columns
+                numeric[name][filled:end] = np.array(columns[j], dtype=np.float32)
+            target[filled:end] = np.array(columns[len(BASE_FEATURE_NAMES)], dtype=np.int8)
+            employee_ids[filled:end] = columns[len(BASE_FEATURE_NAMES) + 1]
+            for name, values in zip(CATEGORICAL_COLUMNS, columns[-2:]):
+                table = label_ids[name]
+                codes[name][filled:end] = [
+                    -1 if value is None else table.setdefault(value, len(table)) for value in values
+                ]
+            filled = end
+
+        columns = {name: values[:filled] for name, values in numeric.items()}
+        columns[TARGET_COLUMN] = target[:filled]
+        for name in CATEGORICAL_COLUMNS:
+            columns[name] = (codes[name][:filled], list(label_ids[name]))
+        if activity_features:
+            from .feature_store import activity_columns
+            columns.update(activity_columns(employee_ids[:filled].tolist()))
+        return cls.from_columns(columns)
+
+
+def _sort_labels(codes, labels):
+    """Re-code categorical codes so labels are sorted as strings (LabelEncoder order); -1 becomes 'nan'"""
+    labels = [str(label) for label in labels]
+    codes = np.asarray(codes)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(labels), codes)
+        labels.append('nan')
+    order = np.argsort(labels, kind='stable')
+    remap = np.empty(len(labels), dtype=np.int64)
+    remap[order] = np.arange(len(labels))
+    return remap[codes], [labels[i] for i in order]
@@ -0,0 +1,181 @@
+"""
+Model training shared by the training commands and background training jobs.
+
+``train_and_register`` fits the candidate models, saves the best one in the
+content-addressed model store (see model_store) and points an MLModel row at
+it. TrainingJob rows submitted through the API are picked up by the
+``run_training_worker`` command (``claim_next_job`` / ``execute_job``), which
+reports the stage and rows processed on the job as it goes. Cancellation is cooperative: a job with
+``cancel_requested`` set stops at the next stage or candidate fit.
+"""
+
+import os
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import model_store
+from .ml_utils import TurnoverPredictor
+from .training_cache import get_training_cache
+from .models import EmployeePerformanceData, MLModel, TrainingJob
+from .training_data import TrainingData
+
+DEFAULT_MODEL_NAME = 'turnover_model_v1'
+
+
+class TrainingCancelled(Exception):
+    """Raised from a progress callback when the job was cancelled"""
+
+
+def get_training_csv_path():
+    """Path of the bundled HR analytics CSV, or None if it is missing"""
+    for csv_path in (
+        os.path.join(settings.BASE_DIR, 'ml_data', 'training_data.csv'),
+        os.path.join(settings.BASE_DIR, 'backend', 'ml_data', 'training_data.csv'),
+    ):
+        if os.path.exists(csv_path):
+            return csv_path
+    return None
+
+
+def train_and_register(training_data, model_name=DEFAULT_MODEL_NAME, activate=False, parallel=False,
+                       n_jobs=None, tune=False, time_budget=None, progress=None, use_cache=True,
+                       compress=False, max_auc_loss=None):
+    """
+    Train on ``training_data``, store the best model and create or update the
+    MLModel row ``model_name`` to point at it. With ``use_cache`` candidates
+    already fitted on identical data come from the training cache. With
+    ``compress`` the best model is replaced by its smallest compressed variant
+    within ``max_auc_loss`` (default ML_COMPRESSION_MAX_AUC_LOSS) of its AUC;
+    the report is ``predictor.compression_summary``. Returns
+    (ml_model, created, results, predictor).
+    """
+    predictor = TurnoverPredictor()
+    if progress is not None:
+        progress("Preparing features")
+    X, y = predictor.prepare_columns(training_data)
+    if X is None or y is None:
+        raise ValueError("Failed to prepare data")
+
+    results, best_model_name = predictor.train_models(
+        X, y, parallel=parallel, n_jobs=n_jobs, tune=tune,
+        time_budget=time_budget or settings.ML_TUNING_TIME_BUDGET, progress=progress,
+        cache=get_training_cache() if use_cache else None
+    )
+    if best_model_name is None:
+        raise ValueError("No candidate model could be trained")
+
+    if compress:
+        if progress is not None:
+            progress("Compressing model")
+        if max_auc_loss is None:
+            max_auc_loss = settings.ML_COMPRESSION_MAX_AUC_LOSS
+        compressed_metrics = predictor.compress(X, y, max_auc_loss, progress=progress)
+        if predictor.compression_summary['selected'] is not None:
+            results[best_model_name] = dict(results[best_model_name], **compressed_metrics, compressed=True)
+
+    if progress is not None:
+        progress("Saving model")
+    sha256, model_path = model_store.save_predictor(predictor)
+
+    best_metrics = results[best_model_name]
+    ml_model, created = MLModel.objects.update_or_create(
+        name=model_name,
+        defaults={
+            'model_type': best_model_name,
+            'model_file_path': os.path.relpath(model_path, settings.BASE_DIR),
+            'accuracy': best_metrics['accuracy'],
+            'precision': best_metrics['precision'],
+            'recall': best_metrics['recall'],
+            'f1_score': best_metrics['f1_score'],
+            'auc_score': best_metrics['auc_score'],
+            'hyperparameters': predictor.get_hyperparameters(),
+            'feature_importance': predictor.get_feature_importance(),
+            'training_data_size': len(X),
+            'last_trained': timezone.now(),
+            **({'is_active': True} if activate else {})
+        }
+    )
+    model_store.record_version(ml_model, sha256, model_path)
+    model_store.prune(ml_model)
+    return ml_model, created, results, predictor
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running and return it (None if
+    there is none). The conditional UPDATE lets several workers poll safely.
+    """
+    for job_id in TrainingJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True)[:10]:
+        claimed = TrainingJob.objects.filter(pk=job_id, status='queued').update(
+            status='running', stage="Starting", started_at=timezone.now()
+        )
+        if claimed:
+            return TrainingJob.objects.get(pk=job_id)
+    return None
+
+
+def _update_job(job, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=list(fields) + ['updated_at'])
+
+
+def _load_job_data(job):
+    parameters = job.parameters
+    if job.source == 'csv':
+        csv_path = get_training_csv_path()
+        if csv_path is None:
+            raise ValueError("Training CSV not found")
+        return TrainingData.from_csv(csv_path)
+
+    queryset = EmployeePerformanceData.objects.all()
+    if parameters.get('departments'):
+        queryset = queryset.filter(employee__department__name__in=parameters['departments'])
+    return TrainingData.from_queryset(queryset, activity_features=bool(parameters.get('activity_features')))
+
+
+def execute_job(job):
+    """Run a claimed job to completion, recording progress and the outcome on the row"""
+    def progress(stage):
+        if TrainingJob.objects.filter(pk=job.pk, cancel_requested=True).exists():
+            raise TrainingCancelled()
+        _update_job(job, stage=stage[:100])
+
+    parameters = job.parameters
+    try:
+        progress("Loading training data")
+        training_data = _load_job_data(job)
+        _update_job(job, rows_processed=training_data.n_rows)
+        if training_data.n_rows == 0:
+            raise ValueError("No training data found")
+
+        ml_model, _, results, predictor = train_and_register(
+            training_data,
+            model_name=parameters.get('model_name') or DEFAULT_MODEL_NAME,
+            activate=bool(parameters.get('activate')),
+            parallel=bool(parameters.get('parallel')),
+            n_jobs=parameters.get('n_jobs'),
+            tune=bool(parameters.get('tune')),
+            time_budget=parameters.get('time_budget'),
+            progress=progress,
+            use_cache=parameters.get('use_cache', True),
+            compress=bool(parameters.get('compress')),
+            max_auc_loss=parameters.get('max_auc_loss')
+        )
+        job_results = {name: {key: float(value) for key, value in metrics.items()} for name, metrics in results.items()}
+        if predictor.compression_summary is not None:
+            job_results['compression'] = predictor.compression_summary
+        _update_job(
+            job, status='succeeded', stage="Finished", ml_model=ml_model, results=job_results,
+            finished_at=timezone.now()
+        )
+    except TrainingCancelled:
+        _update_job(job, status='cancelled', stage="Cancelled", finished_at=timezone.now())
+    except Exception as e:
+        _update_job(
+            job, status='failed', stage="Failed",
+            error=f"{str(e)}\n\n{traceback.format_exc()}", finished_at=timezone.now()
+        )
+    return job
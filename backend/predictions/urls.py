@@ -6,7 +6,10 @@ from .views import (
     # Function-based views
     health_check, api_info, register_employee,
     login_employee, logout_employee, user_profile, update_profile, manage_performance_data,
-    list_employees, list_departments, data_separation_stats, predict_turnover
+    list_employees, list_departments, data_separation_stats, predict_turnover,
+    predict_turnover_batch, predict_turnover_scenarios, predict_turnover_counterfactuals, rescore_predictions,
+    attrition_forecast_view, training_jobs, training_job_detail, cancel_training_job,
+    model_versions, rollback_model
 )
 
 # Create router for ViewSets
@@ -35,4 +38,14 @@ urlpatterns = [
     path('api/performance/', manage_performance_data, name='manage_performance_data'),
     path('api/stats/', data_separation_stats, name='data_separation_stats'),
     path('api/predict/', predict_turnover, name='predict_turnover'),
+    path('api/predict/batch/', predict_turnover_batch, name='predict_turnover_batch'),
+    path('api/predict/scenarios/', predict_turnover_scenarios, name='predict_turnover_scenarios'),
+    path('api/predict/counterfactuals/', predict_turnover_counterfactuals, name='predict_turnover_counterfactuals'),
+    path('api/predict/rescore/', rescore_predictions, name='rescore_predictions'),
+    path('api/forecast/attrition/', attrition_forecast_view, name='attrition_forecast'),
+    path('api/training/jobs/', training_jobs, name='training_jobs'),
+    path('api/training/jobs/<int:job_id>/', training_job_detail, name='training_job_detail'),
+    path('api/training/jobs/<int:job_id>/cancel/', cancel_training_job, name='cancel_training_job'),
+    path('api/models/versions/', model_versions, name='model_versions'),
+    path('api/models/rollback/', rollback_model, name='rollback_model'),
 ]
\ No newline at end of file
@@ -7,7 +7,9 @@ from django.contrib.auth import authenticate, login, logout
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from .models import Department, Employee, EmployeePerformanceData, TurnoverPrediction
+from django.utils import timezone
+from django.conf import settings
+from .models import Department, Employee, EmployeePerformanceData, MLModel, TrainingJob, TurnoverPrediction
 from .serializers import (
     EmployeeRegistrationSerializer, 
     EmployeeRegistrationResponseSerializer,
@@ -17,12 +19,27 @@ from .serializers import (
     EmployeePerformanceDataSerializer,
     UserProfileSerializer,
     EmployeeUpdateSerializer,
-    EmployeeListSerializer
+    EmployeeListSerializer,
+    TrainingJobSerializer
 )
 from .permissions import IsAdminUser
 from .response_utils import StandardResponse, ResponseMessages
-from .ml_utils import TurnoverPredictor, TurnoverRiskCalculator
+from .ml_utils import (
+    BASE_FEATURE_NAMES,
+    TurnoverRiskCalculator,
+    calculate_rule_based_probability,
+    calculate_rule_based_probabilities,
+    fill_feature_defaults,
+    get_risk_levels
+)
+from .model_registry import get_active_model
+from .scoring import plan_scoring, run_scoring
+from .scenarios import employee_record, parse_grid, scenario_features, scenario_table, score_scenarios
+from .counterfactuals import HIGH_RISK_THRESHOLD, counterfactual_recommendations, search_counterfactuals
+from . import attrition_forecast, feature_store, model_store, prediction_cache
 import json
+import re
+import numpy as np
 
 # ========================================
 # CRUD ViewSets for Employee & Department
@@ -539,6 +556,13 @@ def data_separation_stats(request):
     )
 
 
+def _parse_bool(value, default=False):
+    """Boolean request parameter: 'true', '1' or 'yes' (any case) is true; missing means ``default``"""
+    if value is None:
+        return default
+    return str(value).lower() in ('true', '1', 'yes')
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def predict_turnover(request):
@@ -546,7 +570,13 @@ def predict_turnover(request):
     Predict employee turnover risk using ML model - ADMIN ONLY
     
     Input: employee_id
-    Output: prediction probability, risk level, and recommendations
+    Optional:
+        force_refresh: ignore cached results and store a new prediction
+        record_history: store a new TurnoverPrediction row even if inputs are unchanged
+    Output: prediction probability, risk level, and recommendations. For
+    high-risk employees the recommendations are the smallest changes to
+    hours, projects, promotion or salary that the model predicts would take
+    them below the high-risk threshold (rule-based ones otherwise).
     """
     try:
         employee_id = request.data.get('employee_id')
@@ -586,73 +616,95 @@ def predict_turnover(request):
             'promotion_last_5years': 1 if performance_data.promotion_last_5years else 0
         }
         
-        # Initialize ML predictor
-        predictor = TurnoverPredictor()
-        
-        # For now, use a simple prediction logic since we don't have a trained model
-        # In production, you would load a pre-trained model
-        prediction_probability = 0.0
-        
-        # Simple risk calculation based on performance metrics
-        risk_score = 0.0
-        
-        # Low satisfaction increases risk
-        if features['satisfaction_level'] < 0.4:
-            risk_score += 0.3
-        elif features['satisfaction_level'] < 0.6:
-            risk_score += 0.1
-        
-        # Low evaluation increases risk
-        if features['last_evaluation'] < 0.4:
-            risk_score += 0.3
-        elif features['last_evaluation'] < 0.6:
-            risk_score += 0.1
-        
-        # High hours can increase risk
-        if features['average_monthly_hours'] > 200:
-            risk_score += 0.2
-        elif features['average_monthly_hours'] > 180:
-            risk_score += 0.1
-        
-        # Long tenure without promotion increases risk
-        if features['time_spend_company'] > 4 and features['promotion_last_5years'] == 0:
-            risk_score += 0.2
-        
-        # Work accidents increase risk
-        if features['work_accident'] == 1:
-            risk_score += 0.1
-        
-        # Low project count might indicate disengagement
-        if features['number_project'] < 2:
-            risk_score += 0.1
-        elif features['number_project'] > 6:
-            risk_score += 0.1
-        
-        prediction_probability = min(risk_score, 1.0)
-        
-        # Determine risk level
-        if prediction_probability < 0.3:
-            risk_level = 'low'
-        elif prediction_probability < 0.7:
-            risk_level = 'medium'
-        else:
-            risk_level = 'high'
-        
-        # Generate recommendations using risk calculator
-        risk_calculator = TurnoverRiskCalculator()
-        risk_analysis = risk_calculator.calculate_risk_score(performance_data)
-        recommendations = risk_calculator.get_risk_recommendations(risk_analysis)
-        
-        # Save prediction to database
-        prediction = TurnoverPrediction.objects.create(
-            employee=employee,
-            prediction_probability=prediction_probability,
-            prediction_result=prediction_probability > 0.5,
-            model_used='RuleBasedModel',
-            confidence_score=0.85,
-            features_used=features,
-            risk_level=risk_level
+        department_name = employee.department.name if employee.department else None
+        force_refresh = _parse_bool(request.data.get('force_refresh'))
+        record_history = _parse_bool(request.data.get('record_history'))
+        
+        # Results are cached per (model version, input fingerprint)
+        loaded_model = get_active_model()
+        model_version = loaded_model.version if loaded_model is not None else 'rules'
+        activity = None
+        if loaded_model is not None and loaded_model.uses_activity_features:
+            activity = feature_store.activity_record(employee.id)
+        fingerprint = prediction_cache.feature_fingerprint(
+            performance_data, salary=employee.salary, department=department_name, activity=activity
         )
+        result = None if force_refresh else prediction_cache.get_result(model_version, fingerprint)
+        cached = result is not None
+        
+        if result is None:
+            # Score with the resident model; fall back to heuristics when no artifact is loaded
+            if loaded_model is not None:
+                prediction_probability = loaded_model.predict_one(
+                    dict(features, **(activity or {})),
+                    salary=employee.salary,
+                    department=department_name
+                )
+                model_used = loaded_model.model_name
+                confidence_score = max(prediction_probability, 1 - prediction_probability)
+            else:
+                prediction_probability = calculate_rule_based_probability(features)
+                model_used = 'RuleBasedModel'
+                confidence_score = 0.85
+            
+            # Determine risk level
+            if prediction_probability < 0.3:
+                risk_level = 'low'
+            elif prediction_probability < 0.7:
+                risk_level = 'medium'
+            else:
+                risk_level = 'high'
+            
+            # Generate recommendations using risk calculator
+            risk_calculator = TurnoverRiskCalculator()
+            risk_analysis = risk_calculator.calculate_risk_score(performance_data)
+            recommendations = risk_calculator.get_risk_recommendations(risk_analysis)
+            
+            # High-risk employees get the changes the model itself says would lower their risk
+            counterfactual = None
+            if prediction_probability >= HIGH_RISK_THRESHOLD:
+                counterfactual = search_counterfactuals(
+                    loaded_model,
+                    [employee_record(employee, performance_data, loaded_model)],
+                    time_budget=settings.ML_COUNTERFACTUAL_TIME_BUDGET_MS / 1000
+                )[0]
+                recommendations = counterfactual_recommendations(counterfactual) or recommendations
+            
+            result = {
+                'probability': prediction_probability,
+                'risk_level': risk_level,
+                'confidence_score': confidence_score,
+                'model_used': model_used,
+                'risk_analysis': risk_analysis,
+                'recommendations': recommendations,
+                'counterfactual': counterfactual
+            }
+            prediction_cache.set_result(model_version, fingerprint, result)
+        
+        prediction_probability = result['probability']
+        confidence_score = result['confidence_score']
+        risk_analysis = result['risk_analysis']
+        
+        # Reuse the last stored prediction for unchanged inputs instead of writing a duplicate row
+        previous = None
+        if not (force_refresh or record_history):
+            previous = prediction_cache.get_employee_prediction(employee.id, model_version, fingerprint)
+        
+        if previous is not None:
+            prediction_id, created_at = previous['prediction_id'], previous['created_at']
+        else:
+            # Save prediction to database
+            prediction = TurnoverPrediction.objects.create(
+                employee=employee,
+                prediction_probability=prediction_probability,
+                prediction_result=prediction_probability > 0.5,
+                model_used=result['model_used'],
+                confidence_score=confidence_score,
+                features_used=features,
+                risk_level=result['risk_level']
+            )
+            prediction_cache.set_employee_prediction(employee.id, model_version, fingerprint, prediction)
+            prediction_id, created_at = prediction.id, prediction.created_at.isoformat()
         
         # Prepare response
         response_data = {
@@ -660,24 +712,26 @@ def predict_turnover(request):
                 'id': employee.id,
                 'name': employee.full_name,
                 'email': employee.email,
-                'department': employee.department.name if employee.department else None,
+                'department': department_name,
                 'position': employee.position
             },
             'prediction': {
                 'probability': round(prediction_probability, 3),
-                'risk_level': risk_level,
+                'risk_level': result['risk_level'],
                 'will_leave': prediction_probability > 0.5,
-                'confidence_score': 0.85,
-                'model_used': 'RuleBasedModel'
+                'confidence_score': round(confidence_score, 3),
+                'model_used': result['model_used']
             },
             'risk_analysis': {
                 'overall_risk_score': round(risk_analysis['overall_risk_score'], 3),
                 'risk_factors': risk_analysis['risk_details']
             },
-            'recommendations': recommendations,
+            'recommendations': result['recommendations'],
+            'counterfactual': result.get('counterfactual'),
             'features_used': features,
-            'prediction_id': prediction.id,
-            'created_at': prediction.created_at.isoformat()
+            'prediction_id': prediction_id,
+            'created_at': created_at,
+            'cached': cached
         }
         
         return StandardResponse.success(
@@ -690,3 +744,652 @@ def predict_turnover(request):
             message=f"Error in prediction: {str(e)}",
             status_code=500
         )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def predict_turnover_batch(request):
+    """
+    Batch turnover prediction for many employees in one call - ADMIN ONLY
+    
+    Input (one of):
+        employee_ids: list of employee ids, or "all" for the whole workforce
+        department_id: score every employee in a department
+    Optional:
+        save: persist predictions to TurnoverPrediction (default true)
+    Output: per-employee probability and risk level plus a risk summary
+    """
+    try:
+        employee_ids = request.data.get('employee_ids')
+        department_id = request.data.get('department_id')
+        save_results = _parse_bool(request.data.get('save'), default=True)
+        
+        queryset = EmployeePerformanceData.objects.all()
+        if employee_ids == 'all':
+            pass
+        elif isinstance(employee_ids, list) and employee_ids:
+            if not all(isinstance(employee_id, int) and not isinstance(employee_id, bool) for employee_id in employee_ids):
+                return StandardResponse.validation_error(
+                    message=ResponseMessages.VALIDATION_ERROR,
+                    errors={'employee_ids': ["Must be a list of integer employee ids"]}
+                )
+            queryset = queryset.filter(employee_id__in=employee_ids)
+        elif department_id:
+            if not str(department_id).isdigit():
+                return StandardResponse.validation_error(
+                    message=ResponseMessages.VALIDATION_ERROR,
+                    errors={'department_id': ["Must be a department id"]}
+                )
+            if not Department.objects.filter(id=department_id).exists():
+                return StandardResponse.error(
+                    message="Department not found",
+                    status_code=404
+                )
+            queryset = queryset.filter(employee__department_id=department_id)
+        else:
+            return StandardResponse.error(
+                message='Provide employee_ids (list or "all") or department_id',
+                status_code=400
+            )
+        
+        # Single query: ML features plus the employee columns the model needs
+        rows = list(queryset.order_by().values_list(
+            'employee_id', 'employee__salary', 'employee__department__name', *BASE_FEATURE_NAMES
+        ))
+        if not rows:
+            return StandardResponse.error(
+                message="No performance data found for the requested employees",
+                status_code=404
+            )
+        
+        ids, salaries, departments = [list(column) for column in zip(*(row[:3] for row in rows))]
+        X = fill_feature_defaults([row[3:] for row in rows])
+        
+        loaded_model = get_active_model()
+        if loaded_model is not None:
+            columns = dict(zip(BASE_FEATURE_NAMES, X.T))
+            columns.update(salary=salaries, department=departments)
+            if loaded_model.uses_activity_features:
+                columns.update(feature_store.activity_columns(ids))
+            probabilities = loaded_model.predict_proba(loaded_model.build_feature_matrix(columns))
+            model_used = loaded_model.model_name
+            confidence_scores = np.maximum(probabilities, 1 - probabilities)
+        else:
+            probabilities = calculate_rule_based_probabilities(X)
+            model_used = 'RuleBasedModel'
+            confidence_scores = np.full(len(ids), 0.85)
+        
+        # bulk_create skips TurnoverPrediction.save(), so risk levels are computed here
+        risk_levels = get_risk_levels(probabilities)
+        
+        if save_results:
+            TurnoverPrediction.objects.bulk_create([
+                TurnoverPrediction(
+                    employee_id=employee_pk,
+                    prediction_probability=float(probability),
+                    prediction_result=bool(probability > 0.5),
+                    model_used=model_used,
+                    confidence_score=float(confidence),
+                    features_used=dict(zip(BASE_FEATURE_NAMES, features)),
+                    risk_level=str(risk_level)
+                )
+                for employee_pk, probability, confidence, risk_level, features
+                in zip(ids, probabilities, confidence_scores, risk_levels, X.tolist())
+            ], batch_size=1000)
+        
+        level_names, level_counts = np.unique(risk_levels, return_counts=True)
+        risk_summary = {'low': 0, 'medium': 0, 'high': 0}
+        risk_summary.update({str(name): int(count) for name, count in zip(level_names, level_counts)})
+        
+        return StandardResponse.success(
+            message=f"Batch turnover prediction completed for {len(ids)} employees",
+            data={
+                'total_scored': len(ids),
+                'model_used': model_used,
+                'saved': save_results,
+                'average_probability': round(float(probabilities.mean()), 3),
+                'risk_summary': risk_summary,
+                'predictions': [
+                    {
+                        'employee_id': employee_pk,
+                        'department': department,
+                        'probability': round(float(probability), 3),
+                        'risk_level': str(risk_level)
+                    }
+                    for employee_pk, department, probability, risk_level
+                    in zip(ids, departments, probabilities, risk_levels)
+                ]
+            }
+        )
+        
+    except Exception as e:
+        return StandardResponse.error(
+            message=f"Error in batch prediction: {str(e)}",
+            status_code=500
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def predict_turnover_scenarios(request):
+    """
+    What-if turnover risk for one employee - ADMIN ONLY
+    
+    Input:
+        employee_id
+        grid: feature -> list of values to try, e.g.
+              {"promotion_last_5years": [0, 1], "average_monthly_hours": [160, 180, 200]}
+    Every combination (up to ML_SCENARIO_MAX_COMBINATIONS) is the employee's
+    current data with those overrides, scored in one batch. Nothing is stored.
+    Output: the current probability and a table with one row per combination
+    """
+    try:
+        employee_id = request.data.get('employee_id')
+        if not employee_id:
+            return StandardResponse.error(
+                message="Employee ID is required",
+                status_code=400
+            )
+        
+        try:
+            employee = Employee.objects.select_related('department', 'performance_data').get(id=employee_id)
+            performance_data = employee.performance_data
+        except Employee.DoesNotExist:
+            return StandardResponse.error(
+                message="Employee not found",
+                status_code=404
+            )
+        except EmployeePerformanceData.DoesNotExist:
+            return StandardResponse.error(
+                message="Performance data not found for this employee. Please add performance data first.",
+                status_code=404
+            )
+        
+        loaded_model = get_active_model()
+        grid, errors = parse_grid(
+            request.data.get('grid'), scenario_features(loaded_model), settings.ML_SCENARIO_MAX_COMBINATIONS
+        )
+        if errors:
+            return StandardResponse.validation_error(message=ResponseMessages.VALIDATION_ERROR, errors=errors)
+        
+        record = employee_record(employee, performance_data, loaded_model)
+        scored = score_scenarios(loaded_model, record, grid)
+        baseline = score_scenarios(loaded_model, record, {})
+        probabilities = scored['probabilities']
+        
+        level_names, level_counts = np.unique(scored['risk_levels'], return_counts=True)
+        risk_summary = {'low': 0, 'medium': 0, 'high': 0}
+        risk_summary.update({str(name): int(count) for name, count in zip(level_names, level_counts)})
+        
+        return StandardResponse.success(
+            message=f"Scored {len(probabilities)} scenarios for {employee.full_name}",
+            data={
+                'employee': {
+                    'id': employee.id,
+                    'name': employee.full_name,
+                    'department': record['department'],
+                },
+                'model_used': loaded_model.model_name if loaded_model is not None else 'RuleBasedModel',
+                'current': {
+                    'probability': round(float(baseline['probabilities'][0]), 4),
+                    'risk_level': str(baseline['risk_levels'][0]),
+                },
+                'total_scenarios': len(probabilities),
+                'risk_summary': risk_summary,
+                'lowest_probability': round(float(probabilities.min()), 4),
+                'highest_probability': round(float(probabilities.max()), 4),
+                **scenario_table(grid, scored)
+            }
+        )
+        
+    except Exception as e:
+        return StandardResponse.error(
+            message=f"Error scoring scenarios: {str(e)}",
+            status_code=500
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def predict_turnover_counterfactuals(request):
+    """
+    Counterfactual recommendations - ADMIN ONLY
+    
+    Input (one of):
+        employee_id: a single employee
+        employee_ids: list of employee ids
+        department_id: every employee in a department
+    Optional:
+        target: probability to get below (default: the high-risk threshold, 0.7)
+        max_results: change sets per employee (default 3)
+    Output: per employee the current probability and the cheapest changes to
+    hours, projects, promotion and salary band that the active model predicts
+    would bring it below the target. Nothing is stored.
+    """
+    try:
+        employee_id = request.data.get('employee_id')
+        employee_ids = request.data.get('employee_ids')
+        department_id = request.data.get('department_id')
+        
+        employees = Employee.objects.select_related('department', 'performance_data').filter(
+            performance_data__isnull=False
+        ).order_by('id')
+        if employee_id:
+            if not str(employee_id).isdigit():
+                return StandardResponse.validation_error(
+                    message=ResponseMessages.VALIDATION_ERROR,
+                    errors={'employee_id': ["Must be an employee id"]}
+                )
+            employees = employees.filter(id=employee_id)
+        elif isinstance(employee_ids, list) and employee_ids:
+            if not all(isinstance(employee_id, int) and not isinstance(employee_id, bool) for employee_id in employee_ids):
+                return StandardResponse.validation_error(
+                    message=ResponseMessages.VALIDATION_ERROR,
+                    errors={'employee_ids': ["Must be a list of integer employee ids"]}
+                )
+            employees = employees.filter(id__in=employee_ids)
+        elif department_id:
+            if not str(department_id).isdigit():
+                return StandardResponse.validation_error(
+                    message=ResponseMessages.VALIDATION_ERROR,
+                    errors={'department_id': ["Must be a department id"]}
+                )
+            if not Department.objects.filter(id=department_id).exists():
+                return StandardResponse.error(
+                    message="Department not found",
+                    status_code=404
+                )
+            employees = employees.filter(department_id=department_id)
+        else:
+            return StandardResponse.error(
+                message="Provide employee_id, employee_ids or department_id",
+                status_code=400
+            )
+        
+        errors = {}
+        try:
+            target = float(request.data.get('target', HIGH_RISK_THRESHOLD))
+            if not 0 < target < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['target'] = ["Must be a probability between 0 and 1"]
+        try:
+            max_results = int(request.data.get('max_results', 3))
+            if not 1 <= max_results <= 20:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['max_results'] = ["Must be a number between 1 and 20"]
+        if errors:
+            return StandardResponse.validation_error(message=ResponseMessages.VALIDATION_ERROR, errors=errors)
+        
+        employees = list(employees)
+        if not employees:
+            return StandardResponse.error(
+                message="No performance data found for the requested employees",
+                status_code=404
+            )
+        
+        loaded_model = get_active_model()
+        records = [employee_record(employee, employee.performance_data) for employee in employees]
+        if loaded_model is not None and loaded_model.uses_activity_features:
+            activity = feature_store.activity_columns([employee.id for employee in employees])
+            for i, record in enumerate(records):
+                record.update({name: float(values[i]) for name, values in activity.items()})
+        
+        results = search_counterfactuals(
+            loaded_model, records, target=target, max_results=max_results,
+            time_budget=settings.ML_COUNTERFACTUAL_TIME_BUDGET_MS / 1000 * len(records)
+        )
+        
+        status_counts = {}
+        for result in results:
+            status_counts[result['status']] = status_counts.get(result['status'], 0) + 1
+        
+        return StandardResponse.success(
+            message=f"Counterfactual search completed for {len(results)} employees",
+            data={
+                'model_used': loaded_model.model_name if loaded_model is not None else 'RuleBasedModel',
+                'target': target,
+                'total_employees': len(results),
+                'status_summary': status_counts,
+                'results': [
+                    dict(
+                        result,
+                        employee_id=employee.id,
+                        name=employee.full_name,
+                        department=record['department'],
+                        recommendations=counterfactual_recommendations(result)
+                    )
+                    for employee, record, result in zip(employees, records, results)
+                ]
+            }
+        )
+        
+    except Exception as e:
+        return StandardResponse.error(
+            message=f"Error in counterfactual search: {str(e)}",
+            status_code=500
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def rescore_predictions(request):
+    """
+    Re-score employees whose performance data changed since their latest prediction - ADMIN ONLY
+    
+    Only incremental runs are executed here. A full run (requested, or needed
+    because the active model changed since the last scoring run) scores the
+    whole workforce and is left to the ``rescore_workforce`` command; the
+    endpoint then only reports what it would cover (409).
+    Optional:
+        dry_run: only return how many employees would be scored (default false)
+        full: plan a full re-scoring instead of an incremental one (default false)
+    Output: scoring mode, reason and the number of employees scored
+    """
+    try:
+        dry_run = _parse_bool(request.data.get('dry_run'))
+        full = _parse_bool(request.data.get('full'))
+        
+        loaded_model = get_active_model()
+        plan = plan_scoring(loaded_model, incremental=not full)
+        employees_to_score = plan['queryset'].count()
+        
+        data = {
+            'mode': plan['mode'],
+            'reason': plan['reason'],
+            'model_version': plan['model_version'],
+            'employees_to_score': employees_to_score,
+            'total_employees': EmployeePerformanceData.objects.count(),
+            'dry_run': dry_run
+        }
+        if dry_run:
+            return StandardResponse.success(
+                message=f"{employees_to_score} employees would be re-scored",
+                data=data
+            )
+        if plan['mode'] == 'full':
+            return StandardResponse.error(
+                message=f"Full re-scoring ({plan['reason']}) must be run with the rescore_workforce command",
+                status_code=status.HTTP_409_CONFLICT,
+                extra_data={'data': data}
+            )
+        
+        run = run_scoring(plan, loaded_model)
+        data.update(
+            scoring_run_id=run.id,
+            employees_scored=run.employees_scored,
+            started_at=run.started_at.isoformat(),
+            finished_at=run.finished_at.isoformat()
+        )
+        return StandardResponse.success(
+            message=f"Re-scored {run.employees_scored} employees",
+            data=data
+        )
+        
+    except Exception as e:
+        return StandardResponse.error(
+            message=f"Error in re-scoring: {str(e)}",
+            status_code=500
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def attrition_forecast_view(request):
+    """
+    Monte Carlo attrition forecast per department - ADMIN ONLY
+    
+    Simulates every active employee's latest prediction; the simulation is
+    cached until a scoring run finishes or a new prediction is made.
+    Optional:
+        department_id: only this department (default: all)
+        confidence: confidence interval level (default 0.9)
+        at_least: comma-separated K values for "probability at least K leave" (default 1,5,10)
+        trials: number of simulated trials (default ML_FORECAST_TRIALS, max 100000)
+        refresh: simulate again even if cached (default false)
+    Output: expected leavers, simulated mean and spread, confidence interval
+    and P(at least K leave) per department and for the whole company
+    """
+    try:
+        params = request.query_params
+        refresh = _parse_bool(params.get('refresh'))
+        department_id = params.get('department_id')
+        
+        errors = {}
+        try:
+            confidence = float(params.get('confidence', 0.9))
+            if not 0 < confidence < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['confidence'] = ["Must be a number between 0 and 1"]
+        try:
+            at_least = [int(value) for value in str(params.get('at_least', '1,5,10')).split(',') if value.strip()]
+            if any(value < 0 for value in at_least):
+                raise ValueError
+        except ValueError:
+            errors['at_least'] = ["Must be comma-separated non-negative integers"]
+        try:
+            trials = int(params.get('trials', settings.ML_FORECAST_TRIALS))
+            if not 1 <= trials <= 100000:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['trials'] = ["Must be a number between 1 and 100000"]
+        if department_id is not None and not str(department_id).isdigit():
+            errors['department_id'] = ["Must be a department id"]
+        if errors:
+            return StandardResponse.validation_error(message=ResponseMessages.VALIDATION_ERROR, errors=errors)
+        
+        forecast, cached = attrition_forecast.get_forecast(n_trials=trials, refresh=refresh)
+        departments = forecast['departments']
+        if department_id is not None:
+            departments = [entry for entry in departments if entry['department_id'] == int(department_id)]
+            if not departments:
+                return StandardResponse.not_found("No predictions found for this department")
+        
+        return StandardResponse.success(
+            message=f"Attrition forecast for {forecast['employees']} employees",
+            data={
+                'scoring_run_id': forecast['scoring_run'],
+                'trials': forecast['trials'],
+                'employees': forecast['employees'],
+                'generated_at': forecast['generated_at'],
+                'cached': cached,
+                'total': attrition_forecast.summarize(forecast['total'], forecast['trials'], confidence, at_least),
+                'departments': [
+                    attrition_forecast.summarize(entry, forecast['trials'], confidence, at_least)
+                    for entry in departments
+                ]
+            }
+        )
+        
+    except Exception as e:
+        return StandardResponse.error(
+            message=f"Error in attrition forecast: {str(e)}",
+            status_code=500
+        )
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def training_jobs(request):
+    """
+    Background model training - ADMIN ONLY
+    
+    GET: the 50 most recent training jobs
+    POST: queue a training run for run_training_worker
+        source: 'database' (EmployeePerformanceData, default) or 'csv' (bundled training CSV)
+        model_name: artifact and MLModel name (default turnover_model_v1)
+        activate: make the trained model active (default false)
+        parallel, tune: as for train_model_from_csv (default false)
+        time_budget: seconds allowed for tuning (default ML_TUNING_TIME_BUDGET)
+        departments: only train on these departments (database source)
+        use_cache: reuse candidates already fitted on identical data (default true)
+        activity_features: also train on the feature store's activity features (database source)
+        compress: replace the best model by its smallest compressed variant (default false)
+        max_auc_loss: validation AUC compression may give up (default ML_COMPRESSION_MAX_AUC_LOSS)
+    """
+    if request.method == 'GET':
+        jobs = TrainingJob.objects.select_related('submitted_by', 'ml_model')[:50]
+        return StandardResponse.list_response(
+            data=TrainingJobSerializer(jobs, many=True).data,
+            message="Training jobs retrieved"
+        )
+    
+    source = request.data.get('source', 'database')
+    model_name = request.data.get('model_name') or 'turnover_model_v1'
+    departments = request.data.get('departments') or []
+    errors = {}
+    if source not in dict(TrainingJob.SOURCES):
+        errors['source'] = [f"Must be one of: {', '.join(dict(TrainingJob.SOURCES))}"]
+    if not re.fullmatch(r'[A-Za-z0-9_-]{1,100}', str(model_name)):
+        errors['model_name'] = ["Only letters, digits, '_' and '-' are allowed"]
+    if not isinstance(departments, list):
+        errors['departments'] = ["Must be a list of department names"]
+    time_budget = request.data.get('time_budget')
+    if time_budget is not None:
+        try:
+            time_budget = int(time_budget)
+        except (TypeError, ValueError):
+            errors['time_budget'] = ["Must be a number of seconds"]
+    max_auc_loss = request.data.get('max_auc_loss')
+    if max_auc_loss is not None:
+        try:
+            max_auc_loss = float(max_auc_loss)
+            if not 0 <= max_auc_loss <= 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['max_auc_loss'] = ["Must be a number between 0 and 1"]
+    if errors:
+        return StandardResponse.validation_error(message=ResponseMessages.VALIDATION_ERROR, errors=errors)
+    
+    job = TrainingJob.objects.create(
+        source=source,
+        submitted_by=request.user,
+        parameters={
+            'model_name': model_name,
+            'activate': _parse_bool(request.data.get('activate')),
+            'parallel': _parse_bool(request.data.get('parallel')),
+            'tune': _parse_bool(request.data.get('tune')),
+            'time_budget': time_budget,
+            'departments': departments,
+            'use_cache': _parse_bool(request.data.get('use_cache'), default=True),
+            'activity_features': _parse_bool(request.data.get('activity_features')),
+            'compress': _parse_bool(request.data.get('compress')),
+            'max_auc_loss': max_auc_loss
+        }
+    )
+    return StandardResponse.success(
+        message=f"Training job {job.id} queued",
+        data=TrainingJobSerializer(job).data,
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def training_job_detail(request, job_id):
+    """Status and progress (stage, elapsed time, rows processed) of a training job - ADMIN ONLY"""
+    job = TrainingJob.objects.filter(pk=job_id).select_related('submitted_by', 'ml_model').first()
+    if job is None:
+        return StandardResponse.not_found(f"Training job {job_id} not found")
+    return StandardResponse.success(
+        message=f"Training job {job.id} is {job.status}",
+        data=TrainingJobSerializer(job).data
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def cancel_training_job(request, job_id):
+    """
+    Cancel a training job - ADMIN ONLY
+    
+    Queued jobs are cancelled immediately; running jobs stop at their next
+    stage or candidate fit.
+    """
+    job = TrainingJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return StandardResponse.not_found(f"Training job {job_id} not found")
+    
+    if TrainingJob.objects.filter(pk=job.pk, status='queued').update(
+        status='cancelled', stage="Cancelled", cancel_requested=True, finished_at=timezone.now()
+    ):
+        message = f"Training job {job.id} cancelled"
+    elif TrainingJob.objects.filter(pk=job.pk, status='running').update(cancel_requested=True):
+        message = f"Cancellation of training job {job.id} requested"
+    else:
+        return StandardResponse.error(message=f"Training job {job.id} already {job.status}")
+    
+    job.refresh_from_db()
+    return StandardResponse.success(message=message, data=TrainingJobSerializer(job).data)
+
+
+def _serialize_model_version(version, ml_model):
+    return {
+        'sha256': version.sha256,
+        'model_type': version.model_type,
+        'metrics': version.metrics,
+        'created_at': version.created_at.isoformat(),
+        'in_use': version.file_path == ml_model.model_file_path
+    }
+
+
+def _get_ml_model(request):
+    """MLModel named by the ``model_name`` parameter, or the active one"""
+    model_name = request.data.get('model_name') or request.query_params.get('model_name')
+    if model_name:
+        return MLModel.objects.filter(name=model_name).first()
+    return MLModel.objects.filter(is_active=True).first()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def model_versions(request):
+    """
+    Stored versions of an ML model, newest first - ADMIN ONLY
+    
+    Optional:
+        model_name: MLModel name (default: the active model)
+    """
+    ml_model = _get_ml_model(request)
+    if ml_model is None:
+        return StandardResponse.not_found("ML model not found")
+    
+    return StandardResponse.list_response(
+        data=[_serialize_model_version(version, ml_model) for version in ml_model.versions.all()],
+        message=f"Versions of {ml_model.name}"
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def rollback_model(request):
+    """
+    Point an ML model back at an earlier stored version - ADMIN ONLY
+    
+    Workers keep the previous version loaded, so they switch without
+    reloading the artifact on their next model check.
+    Optional:
+        model_name: MLModel name (default: the active model)
+        version: sha256 (or unique prefix) to switch to (default: the previous version)
+    """
+    ml_model = _get_ml_model(request)
+    if ml_model is None:
+        return StandardResponse.not_found("ML model not found")
+    
+    version = None
+    if request.data.get('version'):
+        version = model_store.find_version(ml_model, str(request.data['version']))
+        if version is None:
+            return StandardResponse.not_found(f"Version {request.data['version']} of {ml_model.name} not found")
+    
+    try:
+        version = model_store.rollback(ml_model, version)
+    except ValueError as e:
+        return StandardResponse.error(message=str(e))
+    
+    return StandardResponse.success(
+        message=f"{ml_model.name} now uses version {version.sha256[:12]}",
+        data=_serialize_model_version(version, ml_model)
+    )
@@ -190,6 +190,38 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20
 }
 
+# Machine learning
+# Seconds between checks for a newly activated MLModel in each worker
+ML_MODEL_REGISTRY_CHECK_INTERVAL = int(os.getenv('ML_MODEL_REGISTRY_CHECK_INTERVAL', '30'))
+# Prefer memory-mapped model exports so workers share one copy of the forest
+ML_MODEL_MMAP = os.getenv('ML_MODEL_MMAP', 'True').lower() == 'true'
+# Wall-clock budget (seconds) for train_model_from_csv --tune
+ML_TUNING_TIME_BUDGET = int(os.getenv('ML_TUNING_TIME_BUDGET', '600'))
+# Score tree forests with the NumPy flat-array evaluator (verified against scikit-learn on load)
+ML_FLAT_EVALUATOR = os.getenv('ML_FLAT_EVALUATOR', 'True').lower() == 'true'
+# Load the model in the gunicorn master before fork (needs gunicorn --preload, as on the Procfile web line)
+ML_MODEL_PRELOAD = os.getenv('ML_MODEL_PRELOAD', 'False').lower() == 'true'
+# Seconds a predict_turnover result stays cached for unchanged inputs
+ML_PREDICTION_CACHE_TIMEOUT = int(os.getenv('ML_PREDICTION_CACHE_TIMEOUT', '3600'))
+# Trained versions kept per MLModel in ml_models/store/ for rollback
+ML_MODEL_STORE_KEEP = int(os.getenv('ML_MODEL_STORE_KEEP', '5'))
+# Keep the previous model version loaded in each worker so rollbacks switch instantly (0 disables)
+ML_MODEL_WARM_VERSIONS = int(os.getenv('ML_MODEL_WARM_VERSIONS', '1'))
+# Reuse candidate fits and search scores for unchanged training data (ml_models/cache/)
+ML_TRAINING_CACHE = os.getenv('ML_TRAINING_CACHE', 'True').lower() == 'true'
+ML_TRAINING_CACHE_MAX_ENTRIES = int(os.getenv('ML_TRAINING_CACHE_MAX_ENTRIES', '200'))
+# Validation AUC a compressed model may lose against the trained one (train_model_from_csv --compress)
+ML_COMPRESSION_MAX_AUC_LOSS = float(os.getenv('ML_COMPRESSION_MAX_AUC_LOSS', '0.005'))
+# Most feature combinations one what-if scenario request may score
+ML_SCENARIO_MAX_COMBINATIONS = int(os.getenv('ML_SCENARIO_MAX_COMBINATIONS', '10000'))
+# Time allowed per employee for the counterfactual recommendation search (milliseconds)
+ML_COUNTERFACTUAL_TIME_BUDGET_MS = int(os.getenv('ML_COUNTERFACTUAL_TIME_BUDGET_MS', '250'))
+# Monte Carlo trials and random seed of the department attrition forecast
+ML_FORECAST_TRIALS = int(os.getenv('ML_FORECAST_TRIALS', '10000'))
+ML_FORECAST_SEED = int(os.getenv('ML_FORECAST_SEED', '42'))
+# Seconds a forecast stays cached when no new prediction or scoring run replaces it
+ML_FORECAST_CACHE_TIMEOUT = int(os.getenv('ML_FORECAST_CACHE_TIMEOUT', '3600'))
+
 # Logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 DJANGO_LOG_LEVEL = os.getenv('DJANGO_LOG_LEVEL', 'INFO')
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'turnover_prediction.settings')
 
 application = get_wsgi_application()
+
+# Load the ML model before gunicorn forks workers (use with --preload)
+from django.conf import settings  # noqa: E402
+
+if settings.ML_MODEL_PRELOAD:
+    from predictions.model_registry import model_registry
+
+    model_registry.warmup()